@@ -5,6 +5,8 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 from app.auth.utils import decode_access_token
+from app.auth.user_cache import user_cache
+from app.dependencies import get_firestore
 from app.models.user import TokenData, UserResponse
 from app.services.firestore import FirestoreService
 
@@ -12,29 +14,41 @@ from app.services.firestore import FirestoreService
 security = HTTPBearer()
 
 
-async def get_current_user(
+async def get_token_data(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> UserResponse:
+) -> TokenData:
     """
-    Dependency to get the current authenticated user from JWT token.
+    Dependency to get the verified identity (user ID and email) from the JWT
+    token, without a database read.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    # Decode token
     token_data = decode_access_token(credentials.credentials)
     if token_data is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_data
 
-    # Get user from database
-    firestore = FirestoreService()
-    user = await firestore.get_user_by_id(token_data.user_id)
 
+async def get_current_user(
+    token_data: TokenData = Depends(get_token_data),
+    firestore: FirestoreService = Depends(get_firestore),
+) -> UserResponse:
+    """
+    Dependency to get the current authenticated user from JWT token.
+    Users are read through a short-lived cache (see app.auth.user_cache).
+    """
+    user = user_cache.get(token_data.user_id)
     if user is None:
-        raise credentials_exception
+        user = await firestore.get_user_by_id(token_data.user_id)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user_cache.put(user)
 
     return UserResponse(
         id=user.id,
@@ -44,19 +58,9 @@ async def get_current_user(
 
 
 async def get_current_user_id(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
+    token_data: TokenData = Depends(get_token_data),
 ) -> str:
     """
     Dependency to get just the current user's ID from JWT token.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
-    token_data = decode_access_token(credentials.credentials)
-    if token_data is None:
-        raise credentials_exception
-
     return token_data.user_id
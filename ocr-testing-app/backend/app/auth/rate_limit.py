@@ -0,0 +1,89 @@
+"""
+Login rate limiting.
+
+Each bcrypt check costs ~100-300 ms of CPU, so failed login attempts are
+counted per client IP and per email (sliding window, per API process), and
+a client or email over the limit is refused before any password is checked.
+Successful logins are not counted and clear the email's count.
+
+Behind a proxy (Cloud Run), the client IP is the X-Forwarded-For entry
+appended by the outermost trusted proxy (settings.trusted_proxy_hops from
+the end); entries before it are supplied by the client and never trusted.
+"""
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+from fastapi import Request
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Sweep expired keys once this many are tracked
+MAX_TRACKED_KEYS = 10000
+
+
+def client_ip(request: Request) -> str:
+    """Client address for rate limiting, resolved through trusted proxies."""
+    hops = settings.trusted_proxy_hops
+    if hops > 0:
+        forwarded = [
+            entry.strip()
+            for entry in request.headers.get("x-forwarded-for", "").split(",")
+            if entry.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else "unknown"
+
+
+class LoginRateLimiter:
+    """Sliding-window attempt counter keyed by client IP / email."""
+
+    def __init__(self, max_attempts: int, window_seconds: float):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._attempts: Dict[str, Deque[float]] = {}
+
+    def _recent(self, key: str, now: float) -> Deque[float]:
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            return deque()
+        while attempts and attempts[0] <= now - self.window_seconds:
+            attempts.popleft()
+        if not attempts:
+            del self._attempts[key]
+        return attempts
+
+    def check(self, keys: Iterable[str]) -> Optional[int]:
+        """Seconds to wait if any key is over the limit, else None."""
+        if self.max_attempts <= 0:
+            return None
+        now = time.monotonic()
+        for key in keys:
+            attempts = self._recent(key, now)
+            if len(attempts) >= self.max_attempts:
+                return max(math.ceil(attempts[0] + self.window_seconds - now), 1)
+        return None
+
+    def hit(self, keys: Iterable[str]) -> None:
+        """Record a failed attempt for each key."""
+        if self.max_attempts <= 0:
+            return
+        now = time.monotonic()
+        if len(self._attempts) > MAX_TRACKED_KEYS:
+            for key in list(self._attempts):
+                self._recent(key, now)
+        for key in keys:
+            self._attempts.setdefault(key, deque()).append(now)
+
+    def reset(self, key: str) -> None:
+        self._attempts.pop(key, None)
+
+
+login_rate_limiter = LoginRateLimiter(
+    settings.login_rate_limit_attempts,
+    settings.login_rate_limit_window_seconds,
+)
@@ -2,11 +2,14 @@
 Authentication routes.
 """
 from datetime import timedelta
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 
 from app.config import get_settings
-from app.auth.utils import verify_password, create_access_token
+from app.auth.utils import verify_password_async, create_access_token
 from app.auth.dependencies import get_current_user
+from app.auth.rate_limit import client_ip, login_rate_limiter
+from app.auth.user_cache import user_cache
+from app.dependencies import get_firestore
 from app.models.user import LoginRequest, Token, UserResponse
 from app.services.firestore import FirestoreService
 
@@ -15,30 +18,49 @@ router = APIRouter()
 
 
 @router.post("/login", response_model=Token)
-async def login(request: LoginRequest):
+async def login(
+    request: LoginRequest,
+    http_request: Request,
+    firestore: FirestoreService = Depends(get_firestore),
+):
     """
     Authenticate user and return JWT token.
+    Failed attempts are rate limited per client IP and per email.
     """
-    firestore = FirestoreService()
+    email_key = f"email:{request.email.lower()}"
+    client_key = f"ip:{client_ip(http_request)}"
+    retry_after = login_rate_limiter.check([client_key, email_key])
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
 
     # Get user by email
     user = await firestore.get_user_by_email(request.email)
 
     if user is None:
+        login_rate_limiter.hit([client_key, email_key])
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Verify password
-    if not verify_password(request.password, user.password_hash):
+    # Verify password (bcrypt runs in a worker thread, off the event loop)
+    if not await verify_password_async(request.password, user.password_hash):
+        login_rate_limiter.hit([client_key, email_key])
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    login_rate_limiter.reset(email_key)
+    # Fresh from the database, so it replaces any cached copy
+    user_cache.put(user)
+
     # Create access token
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
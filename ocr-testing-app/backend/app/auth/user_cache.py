@@ -0,0 +1,54 @@
+"""
+Short-lived cache of users for request authentication.
+
+get_current_user would otherwise read the user document on every
+authenticated request. Entries expire after ``settings.user_cache_ttl_seconds``
+so changes made elsewhere (e.g. scripts/create_user.py) show up quickly;
+code that changes a user in this process should call ``invalidate``.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from app.config import get_settings
+from app.models.user import UserInDB
+
+settings = get_settings()
+
+
+class UserCache:
+    """LRU of user_id -> user with a per-entry TTL."""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, UserInDB]]" = OrderedDict()
+
+    def get(self, user_id: str) -> Optional[UserInDB]:
+        """Cached user, or None if absent or expired."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if time.monotonic() >= expires_at:
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def put(self, user: UserInDB) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache(settings.user_cache_ttl_seconds, settings.user_cache_size)
@@ -1,9 +1,11 @@
 """
 Authentication utilities - password hashing and JWT token handling.
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
-from passlib.context import CryptContext
 from jose import JWTError, jwt
 
 from app.config import get_settings
@@ -11,18 +13,41 @@ from app.models.user import TokenData
 
 settings = get_settings()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache()
+def get_pwd_context():
+    """Password hashing context (passlib is imported on first use)."""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+@lru_cache()
+def _password_hash_executor() -> ThreadPoolExecutor:
+    """Threads reserved for bcrypt, so login bursts can't take over the
+    default executor (used for storage and image work)."""
+    return ThreadPoolExecutor(
+        max_workers=settings.password_hash_workers,
+        thread_name_prefix="password-hash",
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in the hashing pool, keeping the event loop free."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_hash_executor(), verify_password, plain_password, hashed_password
+    )
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -23,6 +23,73 @@ class Settings(BaseSettings):
     secret_key: str = "change-this-in-production-use-a-long-random-string"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    # Users looked up by get_current_user are cached per process (0 disables)
+    user_cache_ttl_seconds: float = 60
+    user_cache_size: int = 1000
+    # bcrypt runs in its own bounded thread pool (~100-300 ms per check)
+    password_hash_workers: int = 4
+    # Failed login attempts allowed per client IP and per email within the window
+    login_rate_limit_attempts: int = 10
+    login_rate_limit_window_seconds: int = 60
+    # Proxies in front of the API that each append the address they saw to
+    # X-Forwarded-For (1 on Cloud Run). The client IP is the entry this many
+    # from the end; earlier entries are client-controlled. 0 uses the peer.
+    trusted_proxy_hops: int = 0
+
+    # Document image serving (images are immutable once written)
+    image_cache_control: str = "private, max-age=31536000, immutable"
+    image_path_cache_size: int = 10000
+
+    # Derived images (WebP thumbnail + tiled pyramid) generated on upload
+    generate_image_derivatives: bool = True
+    image_thumbnail_size: int = 320
+    image_tile_size: int = 512
+
+    # Job queue shared by the API (enqueue) and workers (python -m app.worker).
+    # sqlite:///path for a single host, redis://host:port/db across hosts
+    job_queue_url: str = "sqlite:///./jobs.db"
+    job_lease_seconds: int = 300
+    job_max_attempts: int = 3
+    worker_poll_interval: float = 2.0
+    # How often a busy worker checks whether its job was cancelled
+    job_cancel_poll_seconds: float = 2.0
+    # How often workers report their engine cold starts and resident models
+    # (served by /api/info); a report lapses after three missed intervals
+    worker_status_interval: float = 60.0
+    # Minimum seconds between test run progress writes
+    progress_update_interval: float = 1.0
+    # Minimum seconds between live progress events (GET /api/tests/{id}/events)
+    progress_event_interval: float = 0.25
+    # How often the API picks up a running job's latest progress event
+    progress_stream_poll_seconds: float = 0.5
+
+    # Engines loaded (and warmed with a dummy inference) at startup, as
+    # comma-separated names. Workers load them before claiming jobs; the API
+    # only when preload_in_api is set, in a background thread by default.
+    preload_layout_detectors: str = ""
+    preload_ocr_engines: str = ""
+    preload_in_api: bool = False
+    preload_in_background: bool = True
+    warmup_inference: bool = True
+    # Attempts per engine, with exponential backoff from warmup_retry_seconds;
+    # engines still failing are reported by /api/ready but don't block it
+    warmup_attempts: int = 3
+    warmup_retry_seconds: float = 5.0
+    # Approximate memory (MB) loaded models may hold before least recently
+    # used ones are evicted; 0 disables eviction
+    model_memory_budget_mb: int = 0
+
+    # Tesseract: "region" runs once per layout region, "page" once per page
+    # (words assigned to regions by overlap), "auto" uses page mode once a
+    # page has tesseract_page_mode_min_regions regions (e.g. word-level layouts)
+    tesseract_mode: str = "auto"
+    tesseract_page_mode_min_regions: int = 8
+    # "auto" uses tesserocr (in-process, no subprocess per call) when installed
+    tesseract_backend: str = "auto"
+    # Worker processes recognizing regions/page bands in parallel (0 = one
+    # per CPU core, 1 = in-process), each limited to tesseract_omp_threads
+    tesseract_workers: int = 0
+    tesseract_omp_threads: int = 1
 
     # CORS settings - stored as a plain string, parsed by get_cors_origins()
     cors_origins: str = "http://localhost:3000,http://localhost:5173,https://ocr-app-frontend-206256614025.us-central1.run.app"
@@ -31,6 +98,14 @@ class Settings(BaseSettings):
         """Parse CORS origins from comma-separated string."""
         return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
 
+    def get_preload_layout_detectors(self) -> List[str]:
+        """Parse preloaded layout detectors from comma-separated string."""
+        return [n.strip() for n in self.preload_layout_detectors.split(",") if n.strip()]
+
+    def get_preload_ocr_engines(self) -> List[str]:
+        """Parse preloaded OCR engines from comma-separated string."""
+        return [n.strip() for n in self.preload_ocr_engines.split(",") if n.strip()]
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,38 @@
+"""
+Shared service dependencies for FastAPI routes.
+
+Creating a Google Cloud client reads service-account credentials and opens
+its own connection pool, so the API creates one Firestore and one Storage
+client in the application lifespan (init_services) and routes receive
+services wrapping them through Depends instead of constructing their own.
+"""
+from fastapi import FastAPI, Request
+
+from app.services.firestore import FirestoreService, create_firestore_client
+from app.services.storage import StorageService, create_storage_client
+
+
+def init_services(app: FastAPI) -> None:
+    """Create the application-scoped clients and services."""
+    app.state.firestore = FirestoreService(create_firestore_client())
+    app.state.storage = StorageService(create_storage_client())
+
+
+def close_services(app: FastAPI) -> None:
+    """Release the application-scoped clients."""
+    firestore = getattr(app.state, "firestore", None)
+    if firestore is not None:
+        firestore.db.close()
+    storage = getattr(app.state, "storage", None)
+    if storage is not None:
+        storage.client.close()
+
+
+def get_firestore(request: Request) -> FirestoreService:
+    """Application-scoped Firestore service."""
+    return request.app.state.firestore
+
+
+def get_storage(request: Request) -> StorageService:
+    """Application-scoped Storage service."""
+    return request.app.state.storage
@@ -3,10 +3,15 @@ Court Form OCR Testing App - FastAPI Backend
 
 Main application entry point.
 """
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.config import get_settings
+from app.dependencies import init_services, close_services
 from app.auth.routes import router as auth_router
 from app.routers.forms import router as forms_router
 from app.routers.synthetic import router as synthetic_router
@@ -17,6 +22,24 @@ from app.routers.verification import router as verification_router
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared clients and preload engines (if configured for the API)."""
+    init_services(app)
+    if settings.preload_in_api:
+        # Engine code (Pillow, model frameworks) is only imported when preloading
+        from app.services.engine_warmup import get_engine_warmup
+
+        warmup = get_engine_warmup()
+        if settings.preload_in_background:
+            warmup.start_background()
+        else:
+            await asyncio.to_thread(warmup.warm_all)
+    yield
+    close_services(app)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
@@ -24,6 +47,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -51,17 +75,40 @@ async def health_check():
     return {"status": "healthy", "app": settings.app_name}
 
 
+@app.get("/api/ready")
+async def readiness_check():
+    """
+    Readiness check: 503 until engines preloaded by the API are warm, or
+    have failed every warmup attempt (listed under "failed").
+    """
+    if not settings.preload_in_api:
+        return {"ready": True, "engines": []}
+    from app.services.engine_warmup import get_engine_warmup
+
+    warmup_status = get_engine_warmup().status()
+    return JSONResponse(warmup_status, status_code=200 if warmup_status["ready"] else 503)
+
+
 @app.get("/api/info")
 async def app_info():
     """Get application info including available processors."""
     from app.processing.layout import list_layout_detectors
     from app.processing.ocr import list_ocr_engines
+    from app.processing.cold_start import cold_start_profiles
+    from app.processing.model_manager import get_model_manager
+    from app.services.job_queue import get_job_queue
 
     return {
         "app": settings.app_name,
         "version": "1.0.0",
         "available_layout_detectors": list_layout_detectors(),
         "available_ocr_engines": list_ocr_engines(),
+        # Engines loaded by the API process (only with PRELOAD_IN_API):
+        # load time, memory, first inference
+        "engine_cold_starts": cold_start_profiles(),
+        "model_residency": get_model_manager().status(),
+        # The same, as last reported by each live worker, where inference runs
+        "workers": await get_job_queue().list_worker_status(),
     }
 
 
@@ -6,12 +6,24 @@ from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 
 
+class DocumentPage(BaseModel):
+    """One page of a multi-page (PDF/TIFF) document."""
+    page_number: int  # 1-based
+    width: Optional[int] = None
+    height: Optional[int] = None
+    # Expected values on this page; falls back to the document's field_values
+    field_values: Dict[str, str] = {}
+
+
 class SyntheticDocument(BaseModel):
     """A single synthetic document in a batch."""
     id: str
     storage_path: str
     field_values: Dict[str, str]
     is_skewed: bool = False
+    thumbnail_path: Optional[str] = None
+    # PDF/TIFF documents list their pages; empty for single-page images
+    pages: List[DocumentPage] = []
 
 
 class BatchBase(BaseModel):
@@ -0,0 +1,24 @@
+"""
+Derived image (thumbnail and tile pyramid) data models.
+"""
+from typing import List
+from pydantic import BaseModel
+
+
+class PyramidLevel(BaseModel):
+    """One resolution level of a tiled image pyramid (level 0 is full size)."""
+    level: int
+    width: int
+    height: int
+    columns: int
+    rows: int
+
+
+class ImagePyramid(BaseModel):
+    """Manifest describing the derivatives stored alongside an image."""
+    width: int
+    height: int
+    tile_size: int
+    format: str = "webp"
+    thumbnail_path: str
+    levels: List[PyramidLevel]
@@ -0,0 +1,36 @@
+"""
+Job queue data models.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Any, Optional
+from pydantic import BaseModel
+
+
+class JobStatus(str, Enum):
+    """Job lifecycle status."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobKind(str, Enum):
+    """Kinds of work handled by the worker process."""
+    TEST_RUN = "test_run"
+
+
+class Job(BaseModel):
+    """A unit of work pulled from the queue by a worker."""
+    id: str
+    kind: JobKind
+    payload: Dict[str, Any] = {}
+    status: JobStatus = JobStatus.QUEUED
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    # A running job whose lease expires (worker crashed or was recycled)
+    # is handed to the next worker that asks for work
+    lease_expires_at: Optional[datetime] = None
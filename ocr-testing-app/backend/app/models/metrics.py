@@ -0,0 +1,52 @@
+"""
+Metrics rollup data models.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from pydantic import BaseModel
+
+
+class RollupKind(str, Enum):
+    """Dimension a metrics rollup document is keyed by."""
+    GLOBAL = "global"
+    LAYOUT = "layout"
+    OCR = "ocr"
+    PAIR = "pair"
+    FIELD = "field"
+
+
+class MetricsRollup(BaseModel):
+    """Running totals for one rollup key, updated with atomic increments."""
+    id: str
+    kind: RollupKind
+    key: str
+    layout_library: Optional[str] = None
+    ocr_library: Optional[str] = None
+    run_count: int = 0
+    count: int = 0
+    total_accuracy: float = 0.0
+    verified_count: int = 0
+    total_verified_accuracy: float = 0.0
+    updated_at: Optional[datetime] = None
+
+    @property
+    def average_accuracy(self) -> float:
+        """Mean accuracy (match score for field rollups) over all samples."""
+        return self.total_accuracy / self.count if self.count else 0.0
+
+    @property
+    def average_verified_accuracy(self) -> Optional[float]:
+        """Mean verified accuracy, or None if nothing has been verified."""
+        if not self.verified_count:
+            return None
+        return self.total_verified_accuracy / self.verified_count
+
+
+class MetricsExportFilters(BaseModel):
+    """Filters applied to the test runs included in a metrics export."""
+    test_run_id: Optional[str] = None
+    layout_library: Optional[str] = None
+    ocr_library: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
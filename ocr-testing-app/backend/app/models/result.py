@@ -26,6 +26,61 @@ class ExtractedField(BaseModel):
     corrected_value: Optional[str] = None
 
 
+def document_verification_status(
+    extracted_fields: List[ExtractedField],
+    ocr_results: Dict[str, Any],
+    verified_by: Optional[str],
+) -> VerificationStatus:
+    """
+    Derive the document-level verification status of a result.
+
+    Handwritten results (no extracted fields, full-text OCR) are verified as a
+    whole; synthetic results are verified once every field has been reviewed.
+    """
+    is_handwritten = (
+        not extracted_fields
+        and ocr_results
+        and ocr_results.get("full_text") is not None
+    )
+
+    if is_handwritten:
+        if not verified_by:
+            return VerificationStatus.UNVERIFIED
+        text_regions = ocr_results.get("text_regions", [])
+        has_corrections = any(
+            r.get("verification_status") == VerificationStatus.CORRECTED.value
+            for r in text_regions
+        )
+        has_added = any(r.get("user_added") for r in text_regions)
+        if has_corrections or has_added:
+            return VerificationStatus.CORRECTED
+        return VerificationStatus.VERIFIED
+
+    if not extracted_fields or any(
+        ef.verification_status == VerificationStatus.UNVERIFIED
+        for ef in extracted_fields
+    ):
+        return VerificationStatus.UNVERIFIED
+
+    if any(ef.verification_status == VerificationStatus.CORRECTED for ef in extracted_fields):
+        return VerificationStatus.CORRECTED
+    return VerificationStatus.VERIFIED
+
+
+class PageResult(BaseModel):
+    """Per-page outcome of a multi-page document."""
+    page_number: int
+    payload_path: str
+    overall_accuracy: float = 0.0
+    num_regions: int = 0
+
+
+class StageTiming(BaseModel):
+    """Time spent in one pipeline stage for a document, in milliseconds."""
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+
+
 class ResultBase(BaseModel):
     """Base result model."""
     test_run_id: str
@@ -36,8 +91,16 @@ class ResultInDB(ResultBase):
     """Result model as stored in database."""
     id: str
     batch_id: str
-    layout_results: Dict[str, Any]  # Raw layout detection output
-    ocr_results: Dict[str, Any]  # Raw OCR output
+    # Raw layout/OCR output. Stored in Cloud Storage at payload_path and only
+    # populated when loaded via ResultPayloadService (inline on legacy results).
+    layout_results: Dict[str, Any] = {}
+    ocr_results: Dict[str, Any] = {}
+    payload_path: Optional[str] = None
+    # Multi-page documents: one payload per page, merged on load
+    pages: List[PageResult] = []
+    # Per-stage processing time (see app.processing.timing)
+    stage_timings: Dict[str, StageTiming] = {}
+    is_handwritten: bool = False
     extracted_fields: List[ExtractedField]
     overall_accuracy: float
     verified_accuracy: Optional[float] = None
@@ -45,6 +108,9 @@ class ResultInDB(ResultBase):
     verified_by_name: Optional[str] = None
     verified_at: Optional[datetime] = None
     created_at: datetime
+    # Denormalized for indexed queries (see firestore.indexes.json)
+    field_names: List[str] = []
+    verification_status: VerificationStatus = VerificationStatus.UNVERIFIED
 
 
 class ResultResponse(ResultInDB):
@@ -56,6 +122,17 @@ class ResultListResponse(BaseModel):
     """Response for listing results."""
     results: List[ResultResponse]
     total: int
+    next_page_token: Optional[str] = None
+
+
+class ResultFilters(BaseModel):
+    """Server-side filters for querying results."""
+    test_run_id: Optional[str] = None
+    batch_id: Optional[str] = None
+    min_accuracy: Optional[float] = None
+    max_accuracy: Optional[float] = None
+    verification_status: Optional[VerificationStatus] = None
+    field_name: Optional[str] = None
 
 
 class DocumentResult(BaseModel):
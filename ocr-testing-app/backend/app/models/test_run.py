@@ -2,7 +2,7 @@
 Test run data models.
 """
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 from pydantic import BaseModel
 
@@ -15,6 +15,17 @@ class TestStatus(str, Enum):
     FAILED = "failed"
 
 
+class StageTimingSummary(BaseModel):
+    """Distribution of one pipeline stage's time across a run, in milliseconds."""
+    count: int = 0
+    wall_p50_ms: float = 0.0
+    wall_p95_ms: float = 0.0
+    wall_total_ms: float = 0.0
+    cpu_p50_ms: float = 0.0
+    cpu_p95_ms: float = 0.0
+    cpu_total_ms: float = 0.0
+
+
 class TestRunBase(BaseModel):
     """Base test run model."""
     batch_ids: List[str]
@@ -38,6 +49,13 @@ class TestRunInDB(TestRunBase):
     error_message: Optional[str] = None
     total_documents: int = 0
     processed_documents: int = 0
+    # Queue job currently responsible for the run (see app.worker)
+    job_id: Optional[str] = None
+    # Per-stage timings, recorded when the run completes
+    stage_timings: Dict[str, StageTimingSummary] = {}
+    # Whether the completed run has been folded into the metrics rollups
+    # (None for runs created before the flag existed, which were)
+    metrics_rolled_up: Optional[bool] = None
 
 
 class TestRunResponse(TestRunInDB):
@@ -0,0 +1,33 @@
+"""
+Cooperative cancellation for long-running processing.
+"""
+import threading
+
+
+class RunCancelled(Exception):
+    """Raised at a checkpoint once cancellation has been requested."""
+
+    def __init__(self, message: str = "Cancelled by user"):
+        super().__init__(message)
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag. Checking it is an in-memory read, so it
+    can be done between documents, pages and regions at no cost; whoever
+    owns the token (e.g. the worker) decides when to set it.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RunCancelled()
@@ -0,0 +1,126 @@
+"""
+Engine cold-start profiling.
+
+Engines load their models lazily in ``_load_model`` on first use. The
+layout and OCR base classes instrument every engine subclass so the first
+model load (wall time and resident memory delta) and the first inference
+are recorded per process. Later calls only pay a dictionary lookup.
+Loads are also reported to the model manager, which may evict other
+models to stay within the memory budget.
+"""
+import functools
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .model_manager import get_model_manager
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+_lock = threading.Lock()
+_profiles: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_inferred: set = set()
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB (None if unknown)."""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def _profile(kind: str, name: str) -> Dict[str, Any]:
+    return _profiles.setdefault((kind, name), {
+        "kind": kind,
+        "name": name,
+        "load_seconds": None,
+        "load_rss_delta_mb": None,
+        "loaded_at": None,
+        "first_inference_seconds": None,
+        "loads": 0,
+    })
+
+
+def _profile_load(kind: str, load: Callable) -> Callable:
+    @functools.wraps(load)
+    def wrapper(self, *args, **kwargs):
+        key = (kind, self.name)
+        manager = get_model_manager()
+        if manager.is_resident(key):
+            manager.touch(key)
+            return load(self, *args, **kwargs)
+
+        manager.make_room(key)
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        result = load(self, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+        rss_after = current_rss_mb()
+        rss_delta = (
+            rss_after - rss_before
+            if rss_before is not None and rss_after is not None else None
+        )
+
+        with _lock:
+            profile = _profile(*key)
+            profile["loads"] += 1
+            # The profile describes the cold start; reloads after eviction
+            # only bump the count
+            if profile["load_seconds"] is None:
+                profile["load_seconds"] = round(elapsed, 3)
+                profile["loaded_at"] = datetime.utcnow().isoformat()
+                if rss_delta is not None:
+                    profile["load_rss_delta_mb"] = round(rss_delta, 1)
+        manager.loaded(key, type(self), rss_delta)
+        return result
+    return wrapper
+
+
+def _profile_first_inference(kind: str, infer: Callable) -> Callable:
+    @functools.wraps(infer)
+    def wrapper(self, *args, **kwargs):
+        key = (kind, self.name)
+        if key in _inferred:
+            return infer(self, *args, **kwargs)
+
+        loaded_before = get_model_manager().is_resident(key)
+        start = time.perf_counter()
+        result = infer(self, *args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        with _lock:
+            if key not in _inferred:
+                _inferred.add(key)
+                profile = _profile(*key)
+                # Exclude a model load that happened inside this call
+                if not loaded_before and profile["load_seconds"] is not None:
+                    elapsed = max(elapsed - profile["load_seconds"], 0.0)
+                profile["first_inference_seconds"] = round(elapsed, 3)
+        return result
+    return wrapper
+
+
+def instrument_engine_class(cls: type, kind: str, inference_method: str) -> None:
+    """Profile a subclass's own ``_load_model`` and inference method."""
+    if "_load_model" in cls.__dict__:
+        cls._load_model = _profile_load(kind, cls.__dict__["_load_model"])
+    if inference_method in cls.__dict__:
+        setattr(cls, inference_method,
+                _profile_first_inference(kind, cls.__dict__[inference_method]))
+
+
+def cold_start_profiles() -> List[Dict[str, Any]]:
+    """Cold-start profiles of the engines used by this process so far."""
+    with _lock:
+        return [dict(p) for p in _profiles.values()]
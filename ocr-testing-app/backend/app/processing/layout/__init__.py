@@ -1,11 +1,17 @@
 # Layout Detection Processors
-from .base import LayoutDetectorBase, Region
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    from .base import LayoutDetectorBase, Region
 
 # Lazy registry - only import implementations when requested
 _LAYOUT_DETECTOR_NAMES = ["doclayout_yolo", "doctr", "surya"]
 
-def get_layout_detector(name: str) -> LayoutDetectorBase:
-    """Get a layout detector by name (lazy import)."""
+# One instance per detector per process, so loaded models are reused
+_instances: Dict[str, "LayoutDetectorBase"] = {}
+
+def _create_layout_detector(name: str) -> "LayoutDetectorBase":
+    """Create a layout detector by name (lazy import)."""
     if name == "doclayout_yolo":
         from .doclayout_yolo import DocLayoutYOLODetector
         return DocLayoutYOLODetector()
@@ -18,6 +24,20 @@ def get_layout_detector(name: str) -> LayoutDetectorBase:
     else:
         raise ValueError(f"Unknown layout detector: {name}. Available: {_LAYOUT_DETECTOR_NAMES}")
 
+def get_layout_detector(name: str) -> "LayoutDetectorBase":
+    """Get a layout detector by name (created on first use, then reused)."""
+    detector = _instances.get(name)
+    if detector is None:
+        detector = _instances[name] = _create_layout_detector(name)
+    return detector
+
 def list_layout_detectors() -> list[str]:
     """List available layout detector names."""
     return _LAYOUT_DETECTOR_NAMES
+
+def __getattr__(name: str):
+    # Base classes are imported on demand so listing engines doesn't load Pillow
+    if name in ("LayoutDetectorBase", "Region"):
+        from . import base
+        return getattr(base, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
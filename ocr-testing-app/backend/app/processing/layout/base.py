@@ -2,10 +2,12 @@
 Base class for layout detectors.
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from dataclasses import dataclass
 from PIL import Image
 
+from ..cold_start import instrument_engine_class
+
 
 @dataclass
 class Region:
@@ -27,6 +29,15 @@ class LayoutDetectorBase(ABC):
     4. Register it in __init__.py
     """
 
+    # Class attributes holding the loaded model; cleared when the model
+    # manager evicts it (see processing/model_manager.py)
+    _model_attributes: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Record model load time/memory and first inference latency
+        instrument_engine_class(cls, "layout", "detect")
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -12,6 +12,7 @@ class DocLayoutYOLODetector(LayoutDetectorBase):
     """Layout detector using DocLayout-YOLO."""
 
     _model = None
+    _model_attributes = ("_model",)
 
     @property
     def name(self) -> str:
@@ -12,6 +12,7 @@ class DocTRLayoutDetector(LayoutDetectorBase):
     """Layout detector using DocTR."""
 
     _model = None
+    _model_attributes = ("_model",)
 
     @property
     def name(self) -> str:
@@ -11,6 +11,7 @@ class SuryaLayoutDetector(LayoutDetectorBase):
     """Layout detector using Surya."""
 
     _predictor = None
+    _model_attributes = ("_predictor",)
 
     @property
     def name(self) -> str:
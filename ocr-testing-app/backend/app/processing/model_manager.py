@@ -0,0 +1,137 @@
+"""
+Model residency management.
+
+Engines keep their models in class attributes once loaded. The manager
+tracks which models are resident, their approximate footprint (resident
+memory added by the load) and last use, and evicts least recently used
+models when loading another would exceed ``settings.model_memory_budget_mb``.
+An evicted model is reloaded on its engine's next use.
+
+Engines opt in by listing the class attributes that hold their model in
+``_model_attributes``; ``_load_model`` is hooked by the base classes (see
+cold_start.instrument_engine_class).
+"""
+import gc
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str]  # (kind, engine name)
+
+
+class ModelManager:
+    """LRU registry of loaded models under a memory budget (0 = unlimited)."""
+
+    def __init__(self, budget_mb: float = 0):
+        self.budget_mb = budget_mb
+        self._lock = threading.RLock()
+        # Resident models, least recently used first
+        self._models: "OrderedDict[ModelKey, Dict[str, Any]]" = OrderedDict()
+        # Last measured footprint per model, kept across evictions so the
+        # next load can make room up front
+        self._footprints: Dict[ModelKey, float] = {}
+
+    def is_resident(self, key: ModelKey) -> bool:
+        return key in self._models
+
+    def touch(self, key: ModelKey) -> None:
+        """Mark a resident model as just used."""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self._models.move_to_end(key)
+
+    def make_room(self, key: ModelKey) -> None:
+        """Evict models so a previously measured model fits before it loads."""
+        self._evict_until(self._footprints.get(key, 0.0), exclude=key)
+
+    def loaded(self, key: ModelKey, engine_cls: type, footprint_mb: Optional[float]) -> None:
+        """Register a freshly loaded model, then enforce the budget."""
+        with self._lock:
+            # Memory freed by an eviction is not always returned to the OS,
+            # so a reload can measure less than the model really needs
+            footprint = max(footprint_mb or 0.0, self._footprints.get(key, 0.0), 0.0)
+            self._footprints[key] = footprint
+            self._models[key] = {
+                "engine_cls": engine_cls,
+                "footprint_mb": footprint,
+                "loaded_at": time.time(),
+                "last_used": time.time(),
+            }
+            self._models.move_to_end(key)
+        self._evict_until(0.0, exclude=key)
+
+    def resident_mb(self) -> float:
+        with self._lock:
+            return sum(m["footprint_mb"] for m in self._models.values())
+
+    def _evict_until(self, incoming_mb: float, exclude: ModelKey) -> None:
+        if not self.budget_mb:
+            return
+        with self._lock:
+            while self.resident_mb() + incoming_mb > self.budget_mb:
+                victim = next(
+                    (k for k, m in self._models.items()
+                     if k != exclude and m["engine_cls"]._model_attributes),
+                    None,
+                )
+                if victim is None:
+                    logger.warning(
+                        "Model memory budget of %s MB exceeded by %s:%s alone",
+                        self.budget_mb, *exclude,
+                    )
+                    return
+                self.evict(victim)
+
+    def evict(self, key: ModelKey) -> bool:
+        """Drop a model's references so its memory can be reclaimed."""
+        with self._lock:
+            entry = self._models.pop(key, None)
+            if entry is None:
+                return False
+            engine_cls = entry["engine_cls"]
+            for attr in engine_cls._model_attributes:
+                setattr(engine_cls, attr, None)
+        gc.collect()
+        if "torch" in sys.modules:
+            torch = sys.modules["torch"]
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        logger.info("Evicted %s:%s (~%.0f MB)", *key, entry["footprint_mb"])
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            models = [
+                {
+                    "kind": kind,
+                    "name": name,
+                    "footprint_mb": round(m["footprint_mb"], 1),
+                    "last_used": m["last_used"],
+                }
+                for (kind, name), m in self._models.items()
+            ]
+        return {
+            "budget_mb": self.budget_mb,
+            "resident_mb": round(sum(m["footprint_mb"] for m in models), 1),
+            "models": models,
+        }
+
+
+_manager: Optional[ModelManager] = None
+
+
+def get_model_manager() -> ModelManager:
+    """Get the process-wide model manager."""
+    global _manager
+    if _manager is None:
+        _manager = ModelManager(get_settings().model_memory_budget_mb)
+    return _manager
@@ -1,11 +1,18 @@
 # OCR Engines
-from .base import OCREngineBase, OCRResult
+from typing import TYPE_CHECKING, Dict
+
+if TYPE_CHECKING:
+    from .base import OCREngineBase, OCRResult
 
 # Lazy registry - only import implementations when requested
 _OCR_ENGINE_NAMES = ["easyocr", "surya", "paddleocr", "tesseract", "trocr", "got_ocr", "mineru"]
 
-def get_ocr_engine(name: str) -> OCREngineBase:
-    """Get an OCR engine by name (lazy import)."""
+# One instance per engine per process, so loaded models are reused. The
+# pipeline sets cancel_token on it per run; workers run one job at a time.
+_instances: Dict[str, "OCREngineBase"] = {}
+
+def _create_ocr_engine(name: str) -> "OCREngineBase":
+    """Create an OCR engine by name (lazy import)."""
     if name == "easyocr":
         from .easyocr_engine import EasyOCREngine
         return EasyOCREngine()
@@ -30,6 +37,20 @@ def get_ocr_engine(name: str) -> OCREngineBase:
     else:
         raise ValueError(f"Unknown OCR engine: {name}. Available: {_OCR_ENGINE_NAMES}")
 
+def get_ocr_engine(name: str) -> "OCREngineBase":
+    """Get an OCR engine by name (created on first use, then reused)."""
+    engine = _instances.get(name)
+    if engine is None:
+        engine = _instances[name] = _create_ocr_engine(name)
+    return engine
+
 def list_ocr_engines() -> list[str]:
     """List available OCR engine names."""
     return _OCR_ENGINE_NAMES
+
+def __getattr__(name: str):
+    # Base classes are imported on demand so listing engines doesn't load Pillow
+    if name in ("OCREngineBase", "OCRResult"):
+        from . import base
+        return getattr(base, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,11 +2,13 @@
 Base class for OCR engines.
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from PIL import Image
 
 from ..layout.base import Region
+from ..cancellation import CancellationToken
+from ..cold_start import instrument_engine_class
 
 
 @dataclass
@@ -36,6 +38,19 @@ class OCREngineBase(ABC):
     4. Register it in __init__.py
     """
 
+    # Set by the pipeline; checked before each region so slow engines
+    # stop promptly when a run is cancelled
+    cancel_token: Optional[CancellationToken] = None
+
+    # Class attributes holding the loaded model; cleared when the model
+    # manager evicts it (see processing/model_manager.py)
+    _model_attributes: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Record model load time/memory and first inference latency
+        instrument_engine_class(cls, "ocr", "extract_text")
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -75,6 +90,9 @@ class OCREngineBase(ABC):
         Returns:
             OCRResult object
         """
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
         bbox = region.bbox
         cropped = image.crop((
             bbox["x1"],
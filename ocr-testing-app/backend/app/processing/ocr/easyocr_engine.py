@@ -13,6 +13,7 @@ class EasyOCREngine(OCREngineBase):
     """OCR engine using EasyOCR."""
 
     _reader = None
+    _model_attributes = ("_reader",)
 
     @property
     def name(self) -> str:
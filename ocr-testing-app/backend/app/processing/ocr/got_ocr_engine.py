@@ -18,6 +18,7 @@ class GotOCREngine(OCREngineBase):
 
     _processor = None
     _model = None
+    _model_attributes = ("_processor", "_model")
 
     @property
     def name(self) -> str:
@@ -19,6 +19,7 @@ class MinerUEngine(OCREngineBase):
     """OCR engine using MinerU (opendatalab/MinerU2.5-2509-1.2B)."""
 
     _client = None
+    _model_attributes = ("_client",)
 
     @property
     def name(self) -> str:
@@ -17,6 +17,7 @@ class PaddleOCREngine(OCREngineBase):
     """OCR engine using PaddleOCR (3.x API)."""
 
     _ocr = None
+    _model_attributes = ("_ocr",)
 
     @property
     def name(self) -> str:
@@ -13,6 +13,7 @@ class SuryaOCREngine(OCREngineBase):
 
     _foundation_predictor = None
     _recognition_predictor = None
+    _model_attributes = ("_foundation_predictor", "_recognition_predictor")
 
     @property
     def name(self) -> str:
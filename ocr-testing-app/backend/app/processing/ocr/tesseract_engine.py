@@ -2,33 +2,184 @@
 Tesseract 5 OCR engine implementation.
 
 Requires tesseract-ocr system package to be installed.
+
+Two backends:
+- tesserocr (optional): calls libtesseract in-process through one persistent
+  API handle, so there is no subprocess or temp file per call.
+- pytesseract: runs the tesseract CLI once per call.
+
+Two modes:
+- region: one Tesseract call per layout region.
+- page: one call on the page area covered by the regions; recognized words
+  are assigned to the region they overlap most. Word-level layouts (DocTR)
+  produce hundreds of regions per page, so this avoids one call per word.
+"auto" uses page mode once a page has settings.tesseract_page_mode_min_regions
+regions.
+
+Tesseract is single-threaded per call, so regions (or, in page mode, bands
+of regions) are recognized in parallel by a pool of worker processes, one
+per core by default. Each worker limits OpenMP to
+settings.tesseract_omp_threads threads so the pool doesn't oversubscribe.
 """
-from typing import List
+import importlib.util
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from PIL import Image
-import numpy as np
 
+from app.config import get_settings
 from .base import OCREngineBase, OCRResult, TextLine
 from ..layout.base import Region
 
+# tesserocr is imported on first use: loading libtesseract starts OpenMP,
+# which reads OMP_THREAD_LIMIT only once (see _init_worker)
+TESSEROCR_AVAILABLE = importlib.util.find_spec("tesserocr") is not None
+
+settings = get_settings()
+
+# Page segmentation: a uniform block of text for a region, automatic
+# segmentation for a page
+REGION_PSM = 6
+PAGE_PSM = 3
+# Margin (px) kept around the regions' union in page mode
+PAGE_MARGIN = 10
+# Share of a word's box that must fall inside a region to be assigned to it
+MIN_WORD_OVERLAP = 0.5
+
+# (text, confidence 0-100, x1, y1, x2, y2, line key)
+Word = Tuple[str, float, int, int, int, int, Tuple[int, ...]]
+
+
+def _overlap_area(a: Dict[str, int], b: Dict[str, int]) -> int:
+    width = min(a["x2"], b["x2"]) - max(a["x1"], b["x1"])
+    height = min(a["y2"], b["y2"]) - max(a["y1"], b["y1"])
+    return max(width, 0) * max(height, 0)
+
+
+def _area(bbox: Dict[str, int]) -> int:
+    return max(bbox["x2"] - bbox["x1"], 0) * max(bbox["y2"] - bbox["y1"], 0)
+
+
+def _group_lines(words: List[Word], offset: Tuple[int, int] = (0, 0)) -> List[TextLine]:
+    """Group words into lines (in reading order), with boxes relative to offset."""
+    line_groups: Dict[Tuple[int, ...], Dict] = {}
+    for text, conf, x1, y1, x2, y2, line_key in words:
+        group = line_groups.get(line_key)
+        if group is None:
+            group = line_groups[line_key] = {
+                'words': [], 'confs': [], 'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+            }
+        group['words'].append(text)
+        group['confs'].append(conf)
+        # Expand bounding box to encompass all words in the line
+        group['x1'] = min(group['x1'], x1)
+        group['y1'] = min(group['y1'], y1)
+        group['x2'] = max(group['x2'], x2)
+        group['y2'] = max(group['y2'], y2)
+
+    lines = []
+    dx, dy = offset
+    for line_key in sorted(line_groups):
+        group = line_groups[line_key]
+        avg_conf = sum(group['confs']) / len(group['confs']) / 100.0  # Normalize to 0-1
+        lines.append(TextLine(
+            text=' '.join(group['words']),
+            confidence=round(avg_conf, 4),
+            bbox_in_region={
+                "x1": group['x1'] - dx,
+                "y1": group['y1'] - dy,
+                "x2": group['x2'] - dx,
+                "y2": group['y2'] - dy,
+            }
+        ))
+    return lines
+
+
+def _init_worker(omp_threads: int) -> None:
+    """Pool initializer: must run before libtesseract starts OpenMP."""
+    os.environ["OMP_THREAD_LIMIT"] = str(omp_threads)
+
+
+def _recognize_in_worker(image: Image.Image, psm: int) -> List[Word]:
+    # Engine state (the tesserocr API) persists per worker process
+    return TesseractEngine()._recognize_words(image, psm)
+
+
+def worker_count() -> int:
+    """Parallel Tesseract workers (settings.tesseract_workers, 0 = cores)."""
+    if settings.tesseract_workers > 0:
+        return settings.tesseract_workers
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _to_result(region_id: int, lines: List[TextLine]) -> OCRResult:
+    return OCRResult(
+        region_id=region_id,
+        full_text=" ".join(line.text for line in lines),
+        lines=lines,
+    )
+
 
 class TesseractEngine(OCREngineBase):
-    """OCR engine using Tesseract 5 via pytesseract."""
+    """OCR engine using Tesseract 5 via tesserocr or pytesseract."""
+
+    # Persistent tesserocr API handle (None with the pytesseract backend)
+    _api = None
+    _model_attributes = ("_api",)
+
+    # Worker processes for parallel recognition, started on first use
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_lock = threading.Lock()
 
     @property
     def name(self) -> str:
         return "tesseract"
 
+    @property
+    def backend(self) -> str:
+        """The backend in use: "tesserocr" or "pytesseract"."""
+        if settings.tesseract_backend == "pytesseract" or not TESSEROCR_AVAILABLE:
+            return "pytesseract"
+        return "tesserocr"
+
+    def _load_model(self):
+        """Lazy load the tesserocr API (loads the language model once)."""
+        if self.backend == "tesserocr" and TesseractEngine._api is None:
+            import tesserocr
+
+            TesseractEngine._api = tesserocr.PyTessBaseAPI(
+                lang="eng", oem=tesserocr.OEM.LSTM_ONLY
+            )
+        return TesseractEngine._api
+
     def extract_text(
         self,
         image: Image.Image,
         regions: List[Region]
     ) -> List[OCRResult]:
         """Extract text from all regions."""
-        results = []
-        for region in regions:
-            result = self.extract_from_region(image, region)
-            results.append(result)
-        return results
+        if self._use_page_mode(regions):
+            return self._extract_page(image, regions)
+        crops = [
+            image.crop((r.bbox["x1"], r.bbox["y1"], r.bbox["x2"], r.bbox["y2"]))
+            for r in regions
+        ]
+        return [
+            _to_result(region.id, _group_lines(words))
+            for region, words in zip(regions, self._recognize_many(crops, REGION_PSM))
+        ]
+
+    def _use_page_mode(self, regions: List[Region]) -> bool:
+        mode = settings.tesseract_mode
+        if not regions or mode == "region":
+            return False
+        if mode == "page":
+            return True
+        return len(regions) >= settings.tesseract_page_mode_min_regions
 
     def _process_cropped_image(
         self,
@@ -36,76 +187,167 @@ class TesseractEngine(OCREngineBase):
         region_id: int
     ) -> OCRResult:
         """Process a cropped image with Tesseract."""
-        import pytesseract
-        from pytesseract import Output
+        return _to_result(region_id, _group_lines(self._recognize_words(image, REGION_PSM)))
+
+    def _extract_page(self, image: Image.Image, regions: List[Region]) -> List[OCRResult]:
+        """Recognize the regions' area once (per band) and assign words to regions."""
+        groups = self._page_groups(regions)
+        areas = []
+        for group in groups:
+            # Only the area covered by the group's regions (plus a margin)
+            areas.append({
+                "x1": max(min(r.bbox["x1"] for r in group) - PAGE_MARGIN, 0),
+                "y1": max(min(r.bbox["y1"] for r in group) - PAGE_MARGIN, 0),
+                "x2": min(max(r.bbox["x2"] for r in group) + PAGE_MARGIN, image.width),
+                "y2": min(max(r.bbox["y2"] for r in group) + PAGE_MARGIN, image.height),
+            })
+        crops = [image.crop((a["x1"], a["y1"], a["x2"], a["y2"])) for a in areas]
+
+        results: Dict[int, OCRResult] = {}
+        for group, area, words in zip(groups, areas, self._recognize_many(crops, PAGE_PSM)):
+            region_words: Dict[int, List[Word]] = {i: [] for i in range(len(group))}
+            for text, conf, x1, y1, x2, y2, key in words:
+                word = (text, conf, x1 + area["x1"], y1 + area["y1"],
+                        x2 + area["x1"], y2 + area["y1"], key)
+                index = self._assign_region(word, group)
+                if index is not None:
+                    region_words[index].append(word)
+            for i, region in enumerate(group):
+                results[id(region)] = _to_result(
+                    region.id,
+                    _group_lines(region_words[i], (region.bbox["x1"], region.bbox["y1"])),
+                )
+
+        return [results[id(region)] for region in regions]
+
+    def _page_groups(self, regions: List[Region]) -> List[List[Region]]:
+        """
+        Split regions into horizontal bands, one per parallel worker, each
+        with at least tesseract_page_mode_min_regions regions. A band
+        covers its regions' full boxes, so no region is cut.
+        """
+        if not regions:
+            return []
+        bands = min(
+            worker_count(),
+            max(len(regions) // max(settings.tesseract_page_mode_min_regions, 1), 1),
+        )
+        ordered = sorted(regions, key=lambda r: (r.bbox["y1"], r.bbox["x1"]))
+        size = -(-len(ordered) // bands)
+        return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+    @staticmethod
+    def _assign_region(word: Word, regions: List[Region]) -> Optional[int]:
+        """Index of the region a word overlaps most (smallest region on ties)."""
+        _, _, x1, y1, x2, y2, _ = word
+        word_box = {"x1": x1, "y1": y1, "x2": x2, "y2": y2}
+        word_area = max(_area(word_box), 1)
+        best, best_key = None, None
+        for i, region in enumerate(regions):
+            overlap = _overlap_area(word_box, region.bbox)
+            if overlap / word_area < MIN_WORD_OVERLAP:
+                continue
+            key = (overlap, -_area(region.bbox))
+            if best_key is None or key > best_key:
+                best, best_key = i, key
+        return best
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with TesseractEngine._pool_lock:
+            if TesseractEngine._pool is None:
+                TesseractEngine._pool = ProcessPoolExecutor(
+                    max_workers=worker_count(),
+                    # Workers don't inherit the models or threads of this process
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(settings.tesseract_omp_threads,),
+                )
+            return TesseractEngine._pool
+
+    def _recognize_many(self, images: List[Image.Image], psm: int) -> List[List[Word]]:
+        """Recognize images, in parallel when enabled; results keep input order."""
+        if worker_count() <= 1 or len(images) <= 1:
+            results = []
+            for image in images:
+                if self.cancel_token is not None:
+                    self.cancel_token.raise_if_cancelled()
+                results.append(self._recognize_words(image, psm))
+            return results
 
+        pool = self._get_pool()
+        futures = [pool.submit(_recognize_in_worker, image, psm) for image in images]
+        try:
+            results = []
+            for future in futures:
+                if self.cancel_token is not None:
+                    self.cancel_token.raise_if_cancelled()
+                results.append(future.result())
+            return results
+        finally:
+            # Drop queued work if cancelled or a call failed
+            for future in futures:
+                future.cancel()
+
+    def _recognize_words(self, image: Image.Image, psm: int) -> List[Word]:
+        """Recognized words with confidence, box and line key."""
         # Ensure RGB
         if image.mode != 'RGB':
             image = image.convert('RGB')
+        if self.backend == "tesserocr":
+            return self._recognize_tesserocr(image, psm)
+        return self._recognize_pytesseract(image, psm)
+
+    def _recognize_tesserocr(self, image: Image.Image, psm: int) -> List[Word]:
+        import tesserocr
+
+        api = self._load_model()
+        api.SetPageSegMode(psm)
+        api.SetImage(image)
+        api.Recognize()
+
+        words = []
+        level = tesserocr.RIL.WORD
+        line_index = -1
+        for item in tesserocr.iterate_level(api.GetIterator(), level):
+            if item.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line_index += 1
+            text = (item.GetUTF8Text(level) or "").strip()
+            conf = item.Confidence(level)
+            # Skip empty text or low-confidence noise
+            if not text or conf < 0:
+                continue
+            x1, y1, x2, y2 = item.BoundingBox(level)
+            words.append((text, conf, x1, y1, x2, y2, (line_index,)))
+        return words
+
+    def _recognize_pytesseract(self, image: Image.Image, psm: int) -> List[Word]:
+        import pytesseract
+        from pytesseract import Output
 
         # Get detailed data with bounding boxes and confidence
         data = pytesseract.image_to_data(
             image,
             output_type=Output.DICT,
-            config='--oem 3 --psm 6'  # LSTM engine, uniform block of text
+            config=f'--oem 3 --psm {psm}'  # LSTM engine
         )
 
-        lines = []
-        full_text_parts = []
-
-        # Group words by line number
-        line_groups = {}
-        n_boxes = len(data['text'])
-        for i in range(n_boxes):
+        words = []
+        for i in range(len(data['text'])):
             text = data['text'][i].strip()
-            conf = int(data['conf'][i])
+            conf = float(data['conf'][i])
 
             # Skip empty text or low-confidence noise (conf == -1 means no text)
             if not text or conf < 0:
                 continue
 
-            line_num = data['line_num'][i]
-            if line_num not in line_groups:
-                line_groups[line_num] = {
-                    'words': [],
-                    'confs': [],
-                    'x1': data['left'][i],
-                    'y1': data['top'][i],
-                    'x2': data['left'][i] + data['width'][i],
-                    'y2': data['top'][i] + data['height'][i],
-                }
-
-            group = line_groups[line_num]
-            group['words'].append(text)
-            group['confs'].append(conf)
-            # Expand bounding box to encompass all words in the line
-            group['x1'] = min(group['x1'], data['left'][i])
-            group['y1'] = min(group['y1'], data['top'][i])
-            group['x2'] = max(group['x2'], data['left'][i] + data['width'][i])
-            group['y2'] = max(group['y2'], data['top'][i] + data['height'][i])
-
-        # Convert line groups to TextLine objects
-        for line_num in sorted(line_groups.keys()):
-            group = line_groups[line_num]
-            line_text = ' '.join(group['words'])
-            avg_conf = sum(group['confs']) / len(group['confs']) / 100.0  # Normalize to 0-1
-
-            lines.append(TextLine(
-                text=line_text,
-                confidence=round(avg_conf, 4),
-                bbox_in_region={
-                    "x1": group['x1'],
-                    "y1": group['y1'],
-                    "x2": group['x2'],
-                    "y2": group['y2'],
-                }
+            left, top = data['left'][i], data['top'][i]
+            words.append((
+                text,
+                conf,
+                left,
+                top,
+                left + data['width'][i],
+                top + data['height'][i],
+                (data['block_num'][i], data['par_num'][i], data['line_num'][i]),
             ))
-            full_text_parts.append(line_text)
-
-        full_text = " ".join(full_text_parts)
-
-        return OCRResult(
-            region_id=region_id,
-            full_text=full_text,
-            lines=lines,
-        )
+        return words
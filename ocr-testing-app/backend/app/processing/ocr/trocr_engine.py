@@ -19,6 +19,7 @@ class TrOCREngine(OCREngineBase):
 
     _processor = None
     _model = None
+    _model_attributes = ("_processor", "_model")
 
     @property
     def name(self) -> str:
@@ -0,0 +1,95 @@
+"""
+Per-stage timing of the OCR pipeline.
+"""
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Pipeline stages, in order. "record" is the Firestore result write; it is
+# measured after the result is stored, so it only appears in run summaries.
+STAGES = ("download", "decode", "layout", "ocr", "match", "write", "record")
+
+
+class StageTimer:
+    """
+    Accumulates wall and CPU time per stage for one document. Cheap enough
+    for the hot path: two clock reads per stage entry.
+    CPU time is process-wide, which is accurate in the worker because it
+    runs one job at a time.
+    """
+
+    def __init__(self):
+        self.wall: Dict[str, float] = {}
+        self.cpu: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.wall[name] = self.wall.get(name, 0.0) + time.perf_counter() - wall_start
+            self.cpu[name] = self.cpu.get(name, 0.0) + time.process_time() - cpu_start
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Timings in milliseconds: {stage: {"wall_ms", "cpu_ms"}}."""
+        return {
+            name: {
+                "wall_ms": round(self.wall[name] * 1000, 3),
+                "cpu_ms": round(self.cpu[name] * 1000, 3),
+            }
+            for name in self.wall
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of unsorted values (0.0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class StageTimingStats:
+    """Per-document stage timings of a run, summarized as p50/p95/total."""
+
+    def __init__(self):
+        self._wall: Dict[str, List[float]] = {}
+        self._cpu: Dict[str, List[float]] = {}
+
+    def add(self, timings: Optional[Dict[str, Dict[str, float]]]) -> None:
+        """Add one document's timings (as produced by StageTimer.to_dict)."""
+        for name, timing in (timings or {}).items():
+            self._wall.setdefault(name, []).append(timing.get("wall_ms", 0.0))
+            self._cpu.setdefault(name, []).append(timing.get("cpu_ms", 0.0))
+
+    def averages(self) -> Dict[str, Dict[str, float]]:
+        """Mean wall/CPU ms per stage; cheaper than summary() for live updates."""
+        return {
+            name: {
+                "wall_ms": round(sum(wall) / len(wall), 3),
+                "cpu_ms": round(sum(self._cpu[name]) / len(wall), 3),
+            }
+            for name, wall in self._wall.items()
+        }
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{stage: {count, wall/cpu p50, p95 and total in ms}}, in stage order."""
+        names = [s for s in STAGES if s in self._wall]
+        names += sorted(set(self._wall) - set(STAGES))
+        summary = {}
+        for name in names:
+            wall, cpu = self._wall[name], self._cpu[name]
+            summary[name] = {
+                "count": len(wall),
+                "wall_p50_ms": round(percentile(wall, 50), 3),
+                "wall_p95_ms": round(percentile(wall, 95), 3),
+                "wall_total_ms": round(sum(wall), 3),
+                "cpu_p50_ms": round(percentile(cpu, 50), 3),
+                "cpu_p95_ms": round(percentile(cpu, 95), 3),
+                "cpu_total_ms": round(sum(cpu), 3),
+            }
+        return summary
@@ -3,11 +3,13 @@ Forms management routes.
 Supports both image (PNG/JPEG) and PDF form templates.
 """
 import io
-from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form
-from fastapi.responses import Response
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, Request
+from typing import List, Optional
 
-from app.auth.dependencies import get_current_user_id
+from app.config import get_settings
+from app.auth.dependencies import get_current_user_id, get_token_data
+from app.models.user import TokenData
+from app.dependencies import get_firestore, get_storage
 from app.models.form import (
     FormResponse,
     FormListResponse,
@@ -17,20 +19,76 @@ from app.models.form import (
 )
 from app.services.firestore import FirestoreService
 from app.services.storage import StorageService
+from app.services.image_server import ImageServingService
+from app.services.image_derivatives import ImageDerivativeService
+from app.services.pdf_rasterizer import (
+    PdfRasterizerService,
+    PYMUPDF_AVAILABLE,
+    is_pdf_path,
+)
 
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
-
+settings = get_settings()
 router = APIRouter()
 
+ALLOWED_FORM_TYPES = ["image/png", "image/jpeg", "image/jpg", "application/pdf"]
+
+
+def _validate_form_file(file: UploadFile):
+    """Reject uploads that are not a supported template type."""
+    if file.content_type not in ALLOWED_FORM_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid file type. Allowed: {ALLOWED_FORM_TYPES}"
+        )
+
+
+async def _store_form_file(storage: StorageService, file: UploadFile) -> tuple[str, Optional[str]]:
+    """
+    Upload a template, pre-render page 1 of PDFs into the rasterization
+    cache, and build its derived images. Returns (storage_path, thumbnail_path).
+    """
+    storage_path = await storage.upload_form(
+        file=file.file,
+        filename=file.filename,
+        content_type=file.content_type
+    )
+
+    file.file.seek(0)
+    data = file.file.read()
+    image = None
+    if is_pdf_path(storage_path):
+        try:
+            image = await PdfRasterizerService(storage).render_image(
+                storage_path, pdf_bytes=data
+            )
+        except RuntimeError:
+            # PDF without PyMuPDF: the form is still usable, just not rendered
+            pass
+
+    # Thumbnail and tile pyramid for the form browser/editor
+    thumbnail_path = None
+    if settings.generate_image_derivatives and (image is not None or not is_pdf_path(storage_path)):
+        pyramid = await ImageDerivativeService(storage).try_generate(
+            storage_path, image, data
+        )
+        thumbnail_path = pyramid.thumbnail_path if pyramid else None
+
+    return storage_path, thumbnail_path
+
+
+async def _delete_form_file(storage: StorageService, storage_path: str):
+    """Delete a template with its cached renderings and derived images."""
+    await storage.delete_file(storage_path)
+    await PdfRasterizerService(storage).invalidate(storage_path)
+    await ImageDerivativeService(storage).delete(storage_path)
+
 
 @router.get("", response_model=FormListResponse)
-async def list_forms(current_user_id: str = Depends(get_current_user_id)):
+async def list_forms(
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+):
     """List all form templates."""
-    firestore = FirestoreService()
     forms = await firestore.list_forms()
 
     return FormListResponse(
@@ -44,16 +102,12 @@ async def upload_form(
     file: UploadFile = File(...),
     name: str = Form(...),
     form_type: str = Form("empty"),
-    current_user_id: str = Depends(get_current_user_id)
+    token: TokenData = Depends(get_token_data),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Upload a new form template."""
-    # Validate file type
-    allowed_types = ["image/png", "image/jpeg", "image/jpg", "application/pdf"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid file type. Allowed: {allowed_types}"
-        )
+    _validate_form_file(file)
 
     # Validate form_type
     if form_type not in ("empty", "handwritten"):
@@ -63,24 +117,18 @@ async def upload_form(
         )
 
     # Upload to storage
-    storage = StorageService()
-    storage_path = await storage.upload_form(
-        file=file.file,
-        filename=file.filename,
-        content_type=file.content_type
-    )
+    storage_path, thumbnail_path = await _store_form_file(storage, file)
 
     # Create form record in Firestore
-    firestore = FirestoreService()
-    user = await firestore.get_user_by_id(current_user_id)
-    uploaded_by_name = user.email if user else ""
+    uploaded_by_name = token.email
 
     form = await firestore.create_form(
         name=name,
         storage_path=storage_path,
-        uploaded_by=current_user_id,
+        uploaded_by=token.user_id,
         form_type=form_type,
         uploaded_by_name=uploaded_by_name,
+        thumbnail_path=thumbnail_path,
     )
 
     return FormResponse(**form.model_dump())
@@ -89,10 +137,10 @@ async def upload_form(
 @router.get("/{form_id}", response_model=FormResponse)
 async def get_form(
     form_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Get form details by ID."""
-    firestore = FirestoreService()
     form = await firestore.get_form_by_id(form_id)
 
     if not form:
@@ -104,15 +152,56 @@ async def get_form(
     return FormResponse(**form.model_dump())
 
 
+@router.put("/{form_id}/file", response_model=FormResponse)
+async def replace_form_file(
+    form_id: str,
+    file: UploadFile = File(...),
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Re-upload a form template, keeping its field mappings.
+    The previous file and its cached renderings are removed."""
+    _validate_form_file(file)
+
+    form = await firestore.get_form_by_id(form_id)
+    if not form:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Form not found"
+        )
+
+    storage_path, thumbnail_path = await _store_form_file(storage, file)
+
+    success = await firestore.update_form_file(
+        form_id=form_id,
+        storage_path=storage_path,
+        thumbnail_path=thumbnail_path,
+    )
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to update form file"
+        )
+
+    # New path means new ETags, so clients never see the old rendering
+    await _delete_form_file(storage, form.storage_path)
+
+    updated_form = await firestore.get_form_by_id(form_id)
+    return FormResponse(**updated_form.model_dump())
+
+
 @router.get("/{form_id}/image")
 async def get_form_image(
     form_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Get a signed URL to access the form image.
-    For PDF templates, converts page 1 to PNG and returns it directly.
+    For PDF templates, returns the cached page 1 PNG rendering directly.
     """
-    firestore = FirestoreService()
     form = await firestore.get_form_by_id(form_id)
 
     if not form:
@@ -121,30 +210,55 @@ async def get_form_image(
             detail="Form not found"
         )
 
-    # Check if this is a PDF - if so, convert to image
-    if form.storage_path.lower().endswith('.pdf') and PYMUPDF_AVAILABLE:
-        storage = StorageService()
-        pdf_bytes = await storage.download_file(form.storage_path)
-        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        page = pdf_doc[0]
-        mat = fitz.Matrix(2, 2)  # 2x scale
-        pix = page.get_pixmap(matrix=mat)
-        png_bytes = pix.tobytes("png")
-        pdf_doc.close()
-        return Response(content=png_bytes, media_type="image/png")
-
-    storage = StorageService()
+    # PDFs are rendered once and served from the cache; ETags let the
+    # editor's repeated reloads revalidate without any storage access
+    if is_pdf_path(form.storage_path) and PYMUPDF_AVAILABLE:
+        rasterizer = PdfRasterizerService(storage)
+        return await ImageServingService(firestore, storage).serve_immutable(
+            request,
+            rasterizer.cache_blob(form.storage_path),
+            lambda: rasterizer.render_png(form.storage_path),
+            media_type="image/png",
+        )
+
     signed_url = await storage.get_signed_url(form.storage_path)
     return {"url": signed_url}
 
 
+@router.get("/{form_id}/thumbnail")
+async def get_form_thumbnail(
+    form_id: str,
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Serve the WebP thumbnail of a form template."""
+    form = await firestore.get_form_by_id(form_id)
+
+    if not form:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Form not found"
+        )
+
+    images = ImageServingService(firestore, storage)
+    derivatives = ImageDerivativeService(images.storage)
+    return await images.serve_immutable(
+        request,
+        derivatives.thumbnail_blob(form.storage_path),
+        lambda: derivatives.read_thumbnail(form.storage_path),
+        media_type="image/webp",
+    )
+
+
 @router.get("/{form_id}/config")
 async def export_field_config(
     form_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Export field config as JSON (compatible with notebook field_configs format)."""
-    firestore = FirestoreService()
     form = await firestore.get_form_by_id(form_id)
 
     if not form:
@@ -176,10 +290,10 @@ async def export_field_config(
 async def import_field_config(
     form_id: str,
     request: UpdateFieldMappingsWithConfigRequest,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Import field config from notebook JSON format."""
-    firestore = FirestoreService()
     form = await firestore.get_form_by_id(form_id)
 
     if not form:
@@ -221,11 +335,10 @@ async def import_field_config(
 async def update_field_mappings(
     form_id: str,
     request: UpdateFieldMappingsRequest,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Update field mappings for a form."""
-    firestore = FirestoreService()
-
     # Check if form exists
     form = await firestore.get_form_by_id(form_id)
     if not form:
@@ -254,11 +367,11 @@ async def update_field_mappings(
 @router.delete("/{form_id}")
 async def delete_form(
     form_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Delete a form template."""
-    firestore = FirestoreService()
-
     # Get form to get storage path
     form = await firestore.get_form_by_id(form_id)
     if not form:
@@ -267,9 +380,8 @@ async def delete_form(
             detail="Form not found"
         )
 
-    # Delete from storage
-    storage = StorageService()
-    await storage.delete_file(form.storage_path)
+    # Delete from storage (original, cached renderings and derived images)
+    await _delete_form_file(storage, form.storage_path)
 
     # Delete from Firestore
     success = await firestore.delete_form(form_id)
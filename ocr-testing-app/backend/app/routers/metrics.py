@@ -1,134 +1,108 @@
 """
 Metrics and analytics routes.
 """
-import io
-import csv
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from fastapi.responses import StreamingResponse
+from datetime import datetime
 from typing import Optional, List
 
 from app.auth.dependencies import get_current_user_id
+from app.dependencies import get_firestore
+from app.models.metrics import RollupKind, MetricsExportFilters
 from app.services.firestore import FirestoreService
+from app.services.metrics_rollup import MetricsRollupService
+from app.services.metrics_export import (
+    MetricsExportService,
+    COLUMNAR_FORMATS,
+    columnar_export_available,
+)
 
 router = APIRouter()
 
 
 @router.get("/aggregate")
 async def get_aggregate_metrics(
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
-    """Get aggregate metrics across all test runs."""
-    firestore = FirestoreService()
+    """Get aggregate metrics across all completed test runs (from rollups)."""
+    rollups = MetricsRollupService(firestore)
 
-    # Get all test runs
-    test_runs = await firestore.list_test_runs()
+    global_rollups = await rollups.get_rollups(RollupKind.GLOBAL)
+    totals = global_rollups[0] if global_rollups else None
 
-    if not test_runs:
+    if totals is None or totals.run_count == 0:
         return {
             "total_test_runs": 0,
             "total_documents_processed": 0,
             "average_accuracy": 0.0,
             "by_layout_library": {},
-            "by_ocr_library": {}
+            "by_ocr_library": {},
+            "by_library_pair": [],
         }
 
-    # Collect all results
-    all_results = []
-    layout_results = {}
-    ocr_results = {}
-
-    for test_run in test_runs:
-        if test_run.status.value != "completed":
-            continue
-
-        results = await firestore.get_results_by_test_run(test_run.id)
-        all_results.extend(results)
-
-        # Aggregate by layout library
-        if test_run.layout_library not in layout_results:
-            layout_results[test_run.layout_library] = {
-                "count": 0,
-                "total_accuracy": 0.0
-            }
-        layout_results[test_run.layout_library]["count"] += len(results)
-        layout_results[test_run.layout_library]["total_accuracy"] += sum(
-            [r.overall_accuracy for r in results]
-        )
-
-        # Aggregate by OCR library
-        if test_run.ocr_library not in ocr_results:
-            ocr_results[test_run.ocr_library] = {
-                "count": 0,
-                "total_accuracy": 0.0
-            }
-        ocr_results[test_run.ocr_library]["count"] += len(results)
-        ocr_results[test_run.ocr_library]["total_accuracy"] += sum(
-            [r.overall_accuracy for r in results]
-        )
-
-    # Calculate averages
-    total_accuracy = sum([r.overall_accuracy for r in all_results])
-    avg_accuracy = total_accuracy / len(all_results) if all_results else 0.0
-
     by_layout = {
-        lib: round(data["total_accuracy"] / data["count"], 4)
-        for lib, data in layout_results.items()
-        if data["count"] > 0
+        r.key: round(r.average_accuracy, 4)
+        for r in await rollups.get_rollups(RollupKind.LAYOUT)
+        if r.count > 0
     }
 
     by_ocr = {
-        lib: round(data["total_accuracy"] / data["count"], 4)
-        for lib, data in ocr_results.items()
-        if data["count"] > 0
+        r.key: round(r.average_accuracy, 4)
+        for r in await rollups.get_rollups(RollupKind.OCR)
+        if r.count > 0
     }
 
+    by_pair = [
+        {
+            "layout_library": r.layout_library,
+            "ocr_library": r.ocr_library,
+            "run_count": r.run_count,
+            "document_count": r.count,
+            "average_accuracy": round(r.average_accuracy, 4),
+        }
+        for r in await rollups.get_rollups(RollupKind.PAIR)
+        if r.count > 0
+    ]
+    by_pair.sort(key=lambda p: p["average_accuracy"], reverse=True)
+
+    verified_accuracy = totals.average_verified_accuracy
+
     return {
-        "total_test_runs": len([tr for tr in test_runs if tr.status.value == "completed"]),
-        "total_documents_processed": len(all_results),
-        "average_accuracy": round(avg_accuracy, 4),
+        "total_test_runs": totals.run_count,
+        "total_documents_processed": totals.count,
+        "average_accuracy": round(totals.average_accuracy, 4),
+        "verified_documents": totals.verified_count,
+        "average_verified_accuracy": (
+            round(verified_accuracy, 4) if verified_accuracy is not None else None
+        ),
         "by_layout_library": by_layout,
-        "by_ocr_library": by_ocr
+        "by_ocr_library": by_ocr,
+        "by_library_pair": by_pair,
     }
 
 
 @router.get("/by-field")
 async def get_field_metrics(
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
-    """Get per-field accuracy breakdown across all test runs."""
-    firestore = FirestoreService()
-
-    # Get all completed test runs
-    test_runs = await firestore.list_test_runs()
-
-    field_scores = {}
-    field_counts = {}
-
-    for test_run in test_runs:
-        if test_run.status.value != "completed":
-            continue
-
-        results = await firestore.get_results_by_test_run(test_run.id)
-
-        for result in results:
-            for field in result.extracted_fields:
-                if field.field_name not in field_scores:
-                    field_scores[field.field_name] = 0.0
-                    field_counts[field.field_name] = 0
-
-                field_scores[field.field_name] += field.match_score
-                field_counts[field.field_name] += 1
-
-    # Calculate averages
-    field_accuracies = {}
-    for name in field_scores:
-        if field_counts[name] > 0:
-            field_accuracies[name] = {
-                "average_accuracy": round(
-                    field_scores[name] / field_counts[name], 4
-                ),
-                "sample_count": field_counts[name]
-            }
+    """Get per-field accuracy breakdown across all test runs (from rollups)."""
+    rollups = MetricsRollupService(firestore)
+
+    field_accuracies = {
+        r.key: {
+            "average_accuracy": round(r.average_accuracy, 4),
+            "sample_count": r.count,
+            "verified_count": r.verified_count,
+            "average_verified_accuracy": (
+                round(r.average_verified_accuracy, 4)
+                if r.average_verified_accuracy is not None else None
+            ),
+        }
+        for r in await rollups.get_rollups(RollupKind.FIELD)
+        if r.count > 0
+    }
 
     # Sort by accuracy (worst first for easy identification of problem fields)
     sorted_fields = dict(sorted(
@@ -145,10 +119,10 @@ async def get_field_metrics(
 @router.get("/comparison")
 async def get_comparison_metrics(
     test_run_ids: List[str] = Query(...),
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Compare metrics across specific test runs."""
-    firestore = FirestoreService()
 
     comparisons = []
 
@@ -197,62 +171,60 @@ async def get_comparison_metrics(
     return {"comparisons": comparisons}
 
 
+EXPORT_MEDIA_TYPES = {
+    "csv": ("text/csv", "metrics.csv"),
+    "json": ("application/json", "metrics.json"),
+    "ndjson": ("application/x-ndjson", "metrics.ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "metrics.parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "metrics.arrows"),
+}
+
+
 @router.get("/export")
 async def export_metrics(
-    format: str = Query("csv", regex="^(csv|json)$"),
+    format: str = Query("csv", regex="^(csv|json|ndjson|parquet|arrow)$"),
     test_run_id: Optional[str] = Query(None),
-    current_user_id: str = Depends(get_current_user_id)
+    layout_library: Optional[str] = Query(None),
+    ocr_library: Optional[str] = Query(None),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
-    """Export metrics data as CSV or JSON."""
-    firestore = FirestoreService()
+    """
+    Export per-field metrics as CSV, JSON, NDJSON, Parquet or Arrow IPC.
+    Rows are streamed as results are read, so memory stays constant.
+    Runs can be filtered by ID, layout/OCR library and start date range.
+    """
+    exporter = MetricsExportService(firestore)
+    filters = MetricsExportFilters(
+        test_run_id=test_run_id,
+        layout_library=layout_library,
+        ocr_library=ocr_library,
+        start_date=start_date,
+        end_date=end_date,
+    )
 
-    if test_run_id:
-        test_runs = [await firestore.get_test_run_by_id(test_run_id)]
-        test_runs = [tr for tr in test_runs if tr is not None]
+    if format in COLUMNAR_FORMATS:
+        if not columnar_export_available():
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail=(
+                    f"{format} export requires pyarrow, which is not installed "
+                    "(pip install pyarrow)"
+                )
+            )
+        body = exporter.stream_columnar(filters, format=format)
+    elif format == "csv":
+        body = exporter.stream_csv(filters)
+    elif format == "ndjson":
+        body = exporter.stream_ndjson(filters)
     else:
-        test_runs = await firestore.list_test_runs()
-        test_runs = [tr for tr in test_runs if tr.status.value == "completed"]
-
-    # Collect data for export
-    export_data = []
+        body = exporter.stream_json(filters)
 
-    for test_run in test_runs:
-        results = await firestore.get_results_by_test_run(test_run.id)
-
-        for result in results:
-            for field in result.extracted_fields:
-                export_data.append({
-                    "test_run_id": test_run.id,
-                    "layout_library": test_run.layout_library,
-                    "ocr_library": test_run.ocr_library,
-                    "document_id": result.document_id,
-                    "field_name": field.field_name,
-                    "expected_value": field.expected_value,
-                    "extracted_value": field.extracted_value,
-                    "confidence": field.confidence,
-                    "match_score": field.match_score,
-                    "overall_accuracy": result.overall_accuracy
-                })
-
-    if format == "json":
-        return {"data": export_data}
-
-    # CSV export
-    if not export_data:
-        return StreamingResponse(
-            io.StringIO("No data"),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment; filename=metrics.csv"}
-        )
-
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=export_data[0].keys())
-    writer.writeheader()
-    writer.writerows(export_data)
-
-    output.seek(0)
+    media_type, filename = EXPORT_MEDIA_TYPES[format]
     return StreamingResponse(
-        output,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=metrics.csv"}
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
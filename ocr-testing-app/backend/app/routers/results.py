@@ -2,13 +2,22 @@
 Results viewing routes.
 """
 from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
-from fastapi.responses import Response
 from typing import Optional, List
 
 from app.auth.dependencies import get_current_user_id
-from app.models.result import ResultResponse, ResultListResponse, DocumentResult
+from app.dependencies import get_firestore, get_storage
+from app.models.result import (
+    ResultResponse,
+    ResultListResponse,
+    DocumentResult,
+    ResultFilters,
+    VerificationStatus,
+)
 from app.services.firestore import FirestoreService
 from app.services.storage import StorageService
+from app.processing.timing import StageTimingStats
+from app.services.result_payloads import ResultPayloadService
+from app.services.image_server import ImageServingService
 
 router = APIRouter()
 
@@ -17,40 +26,52 @@ router = APIRouter()
 async def list_results(
     test_run_id: Optional[str] = Query(None),
     batch_id: Optional[str] = Query(None),
-    current_user_id: str = Depends(get_current_user_id)
+    min_accuracy: Optional[float] = Query(None, ge=0.0, le=1.0),
+    max_accuracy: Optional[float] = Query(None, ge=0.0, le=1.0),
+    verification_status: Optional[VerificationStatus] = Query(None),
+    field_name: Optional[str] = Query(None),
+    page_size: int = Query(100, ge=1, le=500),
+    page_token: Optional[str] = Query(None),
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """
-    List results with optional filtering.
-    Filter by test_run_id and/or batch_id.
+    List results with optional filtering, ordered by accuracy (worst first).
+    Filters are applied in Firestore; pass next_page_token back as
+    page_token to fetch the following page.
     """
-    firestore = FirestoreService()
-
-    if test_run_id:
-        # Get results for specific test run
-        results = await firestore.get_results_by_test_run(test_run_id)
-
-        # Filter by batch_id if provided
-        if batch_id:
-            results = [r for r in results if r.batch_id == batch_id]
-    else:
-        # Without test_run_id, we'd need to implement a more general query
-        # For now, return empty if no test_run_id
-        results = []
+    filters = ResultFilters(
+        test_run_id=test_run_id,
+        batch_id=batch_id,
+        min_accuracy=min_accuracy,
+        max_accuracy=max_accuracy,
+        verification_status=verification_status,
+        field_name=field_name,
+    )
+    try:
+        results, next_page_token, total = await firestore.query_results(
+            filters, page_size=page_size, page_token=page_token
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
     return ResultListResponse(
         results=[ResultResponse(**r.model_dump()) for r in results],
-        total=len(results)
+        total=total,
+        next_page_token=next_page_token,
     )
 
 
 @router.get("/{test_run_id}", response_model=ResultListResponse)
 async def get_results_for_test_run(
     test_run_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Get all results for a specific test run."""
-    firestore = FirestoreService()
-
     # Verify test run exists
     test_run = await firestore.get_test_run_by_id(test_run_id)
     if not test_run:
@@ -71,11 +92,11 @@ async def get_results_for_test_run(
 async def get_document_result(
     test_run_id: str,
     document_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Get detailed result for a specific document."""
-    firestore = FirestoreService()
-
     # Get result
     result = await firestore.get_result_by_document(test_run_id, document_id)
     if not result:
@@ -105,6 +126,8 @@ async def get_document_result(
             detail="Document not found in batch"
         )
 
+    layout_results, ocr_results = await ResultPayloadService(storage).load(result)
+
     # Build proxy URL for the document image (avoids signed URL issues on Cloud Run)
     document_url = f"/api/results/{test_run_id}/document/{document_id}/image"
 
@@ -115,8 +138,8 @@ async def get_document_result(
         "extracted_fields": [ef.model_dump() for ef in result.extracted_fields],
         "overall_accuracy": result.overall_accuracy,
         "verified_accuracy": result.verified_accuracy,
-        "layout_results": result.layout_results,
-        "ocr_results": result.ocr_results
+        "layout_results": layout_results,
+        "ocr_results": ocr_results
     }
 
 
@@ -124,54 +147,31 @@ async def get_document_result(
 async def get_document_image(
     test_run_id: str,
     document_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Proxy endpoint to serve document images directly from GCS."""
-    firestore = FirestoreService()
-    storage = StorageService()
-
-    # Get result to find batch_id
-    result = await firestore.get_result_by_document(test_run_id, document_id)
-    if not result:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Result not found"
-        )
-
-    # Get batch to find document storage path
-    batch = await firestore.get_batch_by_id(result.batch_id)
-    if not batch:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Batch not found"
-        )
-
-    # Find document in batch
-    document = None
-    for doc in batch.documents:
-        if doc.id == document_id:
-            document = doc
-            break
-
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found in batch"
-        )
-
-    # Download image bytes from GCS and serve directly
-    image_bytes = await storage.download_file(document.storage_path)
-    return Response(content=image_bytes, media_type="image/png")
+    return await ImageServingService(firestore, storage).serve_document(
+        request, document_id, test_run_id=test_run_id
+    )
 
 
 @router.get("/{test_run_id}/summary")
 async def get_test_run_summary(
     test_run_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
-    """Get summary statistics for a test run."""
-    firestore = FirestoreService()
+    """
+    Get summary statistics for a test run.
 
+    Stage timings come from the run once it has completed and include
+    "record", the Firestore write of each result. A result stores its own
+    timings in that write, so they stop before it; the summary of an
+    unfinished run is built from them and has no "record" stage.
+    """
     # Get test run
     test_run = await firestore.get_test_run_by_id(test_run_id)
     if not test_run:
@@ -189,7 +189,8 @@ async def get_test_run_summary(
             "total_documents": 0,
             "average_accuracy": 0.0,
             "field_accuracies": {},
-            "accuracy_distribution": {}
+            "accuracy_distribution": {},
+            "stage_timings": {}
         }
 
     # Calculate statistics - prefer verified_accuracy over overall_accuracy
@@ -253,6 +254,18 @@ async def get_test_run_summary(
         else:
             distribution["80-100%"] += 1
 
+    # Per-stage timings: recorded on the run when it completes, otherwise
+    # summarized from the results so far (without the "record" stage)
+    if test_run.stage_timings:
+        stage_timings = {
+            name: summary.model_dump() for name, summary in test_run.stage_timings.items()
+        }
+    else:
+        stats = StageTimingStats()
+        for result in results:
+            stats.add({name: t.model_dump() for name, t in result.stage_timings.items()})
+        stage_timings = stats.summary()
+
     return {
         "test_run_id": test_run_id,
         "layout_library": test_run.layout_library,
@@ -260,5 +273,6 @@ async def get_test_run_summary(
         "total_documents": len(results),
         "average_accuracy": round(avg_accuracy, 4),
         "field_accuracies": {k: round(v, 4) for k, v in field_accuracies.items()},
-        "accuracy_distribution": distribution
+        "accuracy_distribution": distribution,
+        "stage_timings": stage_timings
     }
@@ -2,16 +2,14 @@
 Synthetic data generation routes.
 """
 import uuid
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.responses import Response
-
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
-
-from app.auth.dependencies import get_current_user_id
+from pathlib import Path
+from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request, UploadFile, File, Form
+
+from app.config import get_settings
+from app.auth.dependencies import get_current_user_id, get_token_data
+from app.models.user import TokenData
+from app.dependencies import get_firestore, get_storage
 from app.models.batch import (
     BatchResponse,
     BatchListResponse,
@@ -19,21 +17,26 @@ from app.models.batch import (
     SyntheticDocument,
 )
 from app.services.firestore import FirestoreService
-from app.services.synthetic_generator import SyntheticGeneratorService
-from app.services.scan_simulator import ScanSimulatorService
 from app.services.storage import StorageService
+from app.services.image_server import ImageServingService
+from app.services.image_derivatives import ImageDerivativeService
+from app.services.pdf_rasterizer import PdfRasterizerService, PYMUPDF_AVAILABLE, is_pdf_path
+
+# Generation and page rendering pull in Pillow, numpy and PyMuPDF, so those
+# services are imported in the handlers that use them to keep API startup lean.
 
+settings = get_settings()
 router = APIRouter()
 
 
 @router.post("/generate", response_model=BatchResponse)
 async def generate_batch(
     request: GenerateBatchRequest,
-    current_user_id: str = Depends(get_current_user_id)
+    token: TokenData = Depends(get_token_data),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Generate a batch of synthetic filled forms or skewed copies."""
-    firestore = FirestoreService()
-
     # Get the base form
     form = await firestore.get_form_by_id(request.form_id)
     if not form:
@@ -49,30 +52,25 @@ async def generate_batch(
             detail="Count must be between 1 and 100"
         )
 
-    # Look up creator name
-    user = await firestore.get_user_by_id(current_user_id)
-    created_by_name = user.email if user else ""
+    created_by_name = token.email
 
     # Branch based on form type
     if form.form_type == "handwritten":
         # Handwritten form: generate skewed copies (no field mapping needed)
-        storage = StorageService()
+        from app.services.scan_simulator import ScanSimulatorService
+
         simulator = ScanSimulatorService()
+        derivatives = ImageDerivativeService(storage)
 
-        # Download original image (convert PDF to PNG if needed)
-        base_image_bytes = await storage.download_file(form.storage_path)
-        if form.storage_path.lower().endswith('.pdf'):
-            if not PYMUPDF_AVAILABLE:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="PyMuPDF is required to process PDF forms"
-                )
-            pdf_doc = fitz.open(stream=base_image_bytes, filetype="pdf")
-            page = pdf_doc[0]
-            mat = fitz.Matrix(2, 2)  # 2x scale for quality
-            pix = page.get_pixmap(matrix=mat)
-            base_image_bytes = pix.tobytes("png")
-            pdf_doc.close()
+        # Original image (PDFs come from the cached page 1 rendering)
+        if is_pdf_path(form.storage_path) and not PYMUPDF_AVAILABLE:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="PyMuPDF is required to process PDF forms"
+            )
+        base_image_bytes = await PdfRasterizerService(storage).load_image_bytes(
+            form.storage_path
+        )
 
         preset = request.skew_preset or "medium"
         batch_uuid = str(uuid.uuid4())
@@ -92,18 +90,25 @@ async def generate_batch(
                 blob_name=f"batches/{batch_uuid}/{doc_id}.png"
             )
 
+            # Thumbnail and tile pyramid for fast browsing
+            thumbnail_path = None
+            if settings.generate_image_derivatives:
+                pyramid = await derivatives.try_generate(storage_path, data=skewed_bytes)
+                thumbnail_path = pyramid.thumbnail_path if pyramid else None
+
             documents.append(SyntheticDocument(
                 id=doc_id,
                 storage_path=storage_path,
                 field_values={},
                 is_skewed=True,
+                thumbnail_path=thumbnail_path,
             ))
 
         # Create batch record
         batch = await firestore.create_batch(
             form_id=form.id,
             form_name=form.name,
-            created_by=current_user_id,
+            created_by=token.user_id,
             count=request.count,
             documents=documents,
             batch_type="handwritten",
@@ -120,7 +125,9 @@ async def generate_batch(
                 detail="Form has no field mappings defined. Please define field mappings first."
             )
 
-        generator = SyntheticGeneratorService()
+        from app.services.synthetic_generator import SyntheticGeneratorService
+
+        generator = SyntheticGeneratorService(storage)
         documents, batch_uuid = await generator.generate_batch(
             form=form,
             count=request.count,
@@ -132,7 +139,7 @@ async def generate_batch(
         batch = await firestore.create_batch(
             form_id=form.id,
             form_name=form.name,
-            created_by=current_user_id,
+            created_by=token.user_id,
             count=request.count,
             documents=documents,
             batch_type="synthetic",
@@ -143,10 +150,105 @@ async def generate_batch(
         return BatchResponse(**batch.model_dump())
 
 
+UPLOAD_CONTENT_TYPES = {
+    "application/pdf": ".pdf",
+    "image/tiff": ".tif",
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+}
+
+
+@router.post("/batches/upload", response_model=BatchResponse)
+async def upload_batch(
+    form_id: str = Form(...),
+    files: List[UploadFile] = File(...),
+    token: TokenData = Depends(get_token_data),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Create a batch from uploaded scans (multi-page PDF/TIFF or images).
+    Uploaded documents have no ground truth and are processed with full-text OCR,
+    like handwritten batches."""
+    form = await firestore.get_form_by_id(form_id)
+    if not form:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Form not found"
+        )
+
+    if len(files) < 1 or len(files) > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload between 1 and 100 files"
+        )
+    for file in files:
+        if file.content_type not in UPLOAD_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file type. Allowed: {list(UPLOAD_CONTENT_TYPES)}"
+            )
+
+    created_by_name = token.email
+
+    from app.services.document_pages import describe_pages
+
+    derivatives = ImageDerivativeService(storage)
+    batch_uuid = str(uuid.uuid4())
+    documents = []
+
+    for file in files:
+        doc_id = str(uuid.uuid4())
+        extension = Path(file.filename or "").suffix.lower() or UPLOAD_CONTENT_TYPES[file.content_type]
+        data = await file.read()
+
+        try:
+            pages = describe_pages(data, extension)
+        except RuntimeError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=str(e)
+            )
+
+        storage_path = await storage.upload_bytes(
+            data=data,
+            blob_name=f"batches/{batch_uuid}/{doc_id}{extension}",
+            content_type=file.content_type,
+        )
+
+        # Thumbnail and tile pyramid of the first page
+        thumbnail_path = None
+        if settings.generate_image_derivatives:
+            pyramid = await derivatives.try_generate(storage_path, data=data)
+            thumbnail_path = pyramid.thumbnail_path if pyramid else None
+        del data
+
+        documents.append(SyntheticDocument(
+            id=doc_id,
+            storage_path=storage_path,
+            field_values={},
+            thumbnail_path=thumbnail_path,
+            pages=pages,
+        ))
+
+    batch = await firestore.create_batch(
+        form_id=form.id,
+        form_name=form.name,
+        created_by=token.user_id,
+        count=len(documents),
+        documents=documents,
+        batch_type="handwritten",
+        created_by_name=created_by_name,
+    )
+
+    return BatchResponse(**batch.model_dump())
+
+
 @router.get("/batches", response_model=BatchListResponse)
-async def list_batches(current_user_id: str = Depends(get_current_user_id)):
+async def list_batches(
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+):
     """List all synthetic data batches."""
-    firestore = FirestoreService()
     batches = await firestore.list_batches()
 
     return BatchListResponse(
@@ -158,10 +260,10 @@ async def list_batches(current_user_id: str = Depends(get_current_user_id)):
 @router.get("/batches/{batch_id}", response_model=BatchResponse)
 async def get_batch(
     batch_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Get batch details by ID."""
-    firestore = FirestoreService()
     batch = await firestore.get_batch_by_id(batch_id)
 
     if not batch:
@@ -177,31 +279,101 @@ async def get_batch(
 async def get_document_image(
     batch_id: str,
     document_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Proxy the document image bytes (avoids signed URL issues on Cloud Run)."""
-    firestore = FirestoreService()
-    batch = await firestore.get_batch_by_id(batch_id)
+    return await ImageServingService(firestore, storage).serve_document(
+        request, document_id, batch_id=batch_id
+    )
 
-    if not batch:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Batch not found"
-        )
 
-    # Find the document
-    document = None
-    for doc in batch.documents:
-        if doc.id == document_id:
-            document = doc
-            break
+@router.get("/batches/{batch_id}/documents/{document_id}/pages/{page_number}")
+async def get_document_page(
+    batch_id: str,
+    document_id: str,
+    page_number: int,
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Serve one page (1-based) of a multi-page PDF/TIFF document as PNG."""
+    from app.services.document_pages import DocumentPageService
+
+    images = ImageServingService(firestore, storage)
+    entry = await images.resolve_document(document_id, batch_id=batch_id)
+    pages = DocumentPageService(images.storage)
+
+    return await images.serve_immutable(
+        request,
+        f"{entry['storage_path']}#page={page_number}",
+        lambda: pages.render_page(entry["storage_path"], page_number),
+        media_type="image/png",
+    )
 
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found in batch"
-        )
 
-    storage = StorageService()
-    image_bytes = await storage.download_file(document.storage_path)
-    return Response(content=image_bytes, media_type="image/png")
+@router.get("/batches/{batch_id}/documents/{document_id}/thumbnail")
+async def get_document_thumbnail(
+    batch_id: str,
+    document_id: str,
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Serve the WebP thumbnail of a document image."""
+    images = ImageServingService(firestore, storage)
+    entry = await images.resolve_document(document_id, batch_id=batch_id)
+    derivatives = ImageDerivativeService(images.storage)
+
+    return await images.serve_immutable(
+        request,
+        derivatives.thumbnail_blob(entry["storage_path"]),
+        lambda: derivatives.read_thumbnail(entry["storage_path"]),
+        media_type="image/webp",
+    )
+
+
+@router.get("/batches/{batch_id}/documents/{document_id}/pyramid")
+async def get_document_pyramid(
+    batch_id: str,
+    document_id: str,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Get the tile pyramid manifest (levels, sizes, tile grid) of a document."""
+    images = ImageServingService(firestore, storage)
+    entry = await images.resolve_document(document_id, batch_id=batch_id)
+    manifest = await ImageDerivativeService(images.storage).get_manifest(
+        entry["storage_path"]
+    )
+    return manifest.model_dump()
+
+
+@router.get("/batches/{batch_id}/documents/{document_id}/tiles/{level}/{col}/{row}")
+async def get_document_tile(
+    batch_id: str,
+    document_id: str,
+    level: int,
+    col: int,
+    row: int,
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
+):
+    """Serve one WebP tile of a document pyramid (level 0 is full resolution)."""
+    images = ImageServingService(firestore, storage)
+    entry = await images.resolve_document(document_id, batch_id=batch_id)
+    derivatives = ImageDerivativeService(images.storage)
+
+    return await images.serve_immutable(
+        request,
+        derivatives.tile_blob(entry["storage_path"], level, col, row),
+        lambda: derivatives.read_tile(entry["storage_path"], level, col, row),
+        media_type="image/webp",
+    )
@@ -2,87 +2,53 @@
 Test execution routes.
 """
 import asyncio
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
-
-from app.auth.dependencies import get_current_user_id
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from fastapi.responses import StreamingResponse
+
+from app.auth.dependencies import get_current_user_id, get_token_data
+from app.models.user import TokenData
+from app.dependencies import get_firestore
 from app.models.test_run import (
     TestRunResponse,
     TestRunListResponse,
     RunTestsRequest,
+    TestRunInDB,
     TestStatus,
 )
+from app.models.job import JobKind, JobStatus
 from app.services.firestore import FirestoreService
-from app.services.ocr_pipeline import OCRPipelineService
+from app.services.job_queue import get_job_queue
+from app.services.progress_stream import JOB_ENDED, TERMINAL_STATUSES, get_progress_broker
 from app.processing.layout import list_layout_detectors
 from app.processing.ocr import list_ocr_engines
 
 router = APIRouter()
 
+# Comment line sent on idle event streams so proxies don't close them
+KEEPALIVE_SECONDS = 15
 
-async def run_test_background(
-    test_run_id: str,
-    batch_ids: list[str],
-    layout_library: str,
-    ocr_library: str
-):
-    """Background task to run OCR pipeline on batches."""
-    firestore = FirestoreService()
-    pipeline = OCRPipelineService()
-
-    try:
-        # Update status to running
-        await firestore.update_test_run_status(
-            test_run_id,
-            TestStatus.RUNNING
-        )
-
-        total_processed = 0
-
-        for batch_id in batch_ids:
-            batch = await firestore.get_batch_by_id(batch_id)
-            if not batch:
-                continue
-
-            # Process batch
-            await pipeline.process_batch(
-                batch=batch,
-                layout_library=layout_library,
-                ocr_library=ocr_library,
-                test_run_id=test_run_id,
-                progress_callback=lambda curr, total: firestore.update_test_run_status(
-                    test_run_id,
-                    TestStatus.RUNNING,
-                    processed_documents=total_processed + curr
-                )
-            )
-
-            total_processed += len(batch.documents)
-
-        # Update status to completed
-        await firestore.update_test_run_status(
-            test_run_id,
-            TestStatus.COMPLETED,
-            processed_documents=total_processed
-        )
 
-    except Exception as e:
-        # Update status to failed
-        await firestore.update_test_run_status(
-            test_run_id,
-            TestStatus.FAILED,
-            error_message=str(e)
-        )
+def _job_payload(test_run: TestRunInDB) -> dict:
+    """Queue payload for executing a test run."""
+    return {
+        "test_run_id": test_run.id,
+        "batch_ids": test_run.batch_ids,
+        "layout_library": test_run.layout_library,
+        "ocr_library": test_run.ocr_library,
+    }
 
 
 @router.post("/run", response_model=TestRunResponse)
 async def run_tests(
     request: RunTestsRequest,
-    background_tasks: BackgroundTasks,
-    current_user_id: str = Depends(get_current_user_id)
+    token: TokenData = Depends(get_token_data),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
-    """Start a test run on selected batches."""
-    firestore = FirestoreService()
-
+    """Start a test run on selected batches.
+    The run is queued and executed by a worker process (python -m app.worker).
+    """
     # Check if any batch is handwritten (skip layout validation for those)
     has_handwritten = False
     has_synthetic = False
@@ -129,36 +95,32 @@ async def run_tests(
     if not layout_library and has_handwritten and not has_synthetic:
         layout_library = "none"
 
-    # Look up user email
-    user = await firestore.get_user_by_id(current_user_id)
-    started_by_name = user.email if user else ""
+    started_by_name = token.email
 
     # Create test run record
     test_run = await firestore.create_test_run(
         batch_ids=request.batch_ids,
         layout_library=layout_library,
         ocr_library=request.ocr_library,
-        started_by=current_user_id,
+        started_by=token.user_id,
         total_documents=total_documents,
         started_by_name=started_by_name,
     )
 
-    # Start background processing
-    background_tasks.add_task(
-        run_test_background,
-        test_run.id,
-        request.batch_ids,
-        layout_library,
-        request.ocr_library
-    )
+    # Hand off to the worker pool
+    job = await get_job_queue().enqueue(JobKind.TEST_RUN, _job_payload(test_run))
+    await firestore.set_test_run_job(test_run.id, job.id)
+    test_run.job_id = job.id
 
     return TestRunResponse(**test_run.model_dump())
 
 
 @router.get("", response_model=TestRunListResponse)
-async def list_test_runs(current_user_id: str = Depends(get_current_user_id)):
+async def list_test_runs(
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+):
     """List all test runs."""
-    firestore = FirestoreService()
     test_runs = await firestore.list_test_runs()
 
     return TestRunListResponse(
@@ -170,10 +132,10 @@ async def list_test_runs(current_user_id: str = Depends(get_current_user_id)):
 @router.get("/{test_run_id}", response_model=TestRunResponse)
 async def get_test_run(
     test_run_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Get test run details by ID."""
-    firestore = FirestoreService()
     test_run = await firestore.get_test_run_by_id(test_run_id)
 
     if not test_run:
@@ -188,10 +150,10 @@ async def get_test_run(
 @router.get("/{test_run_id}/status")
 async def get_test_run_status(
     test_run_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Get test run status (for polling during processing)."""
-    firestore = FirestoreService()
     test_run = await firestore.get_test_run_by_id(test_run_id)
 
     if not test_run:
@@ -200,6 +162,11 @@ async def get_test_run_status(
             detail="Test run not found"
         )
 
+    return _status_snapshot(test_run)
+
+
+def _status_snapshot(test_run: TestRunInDB) -> dict:
+    """Status of a test run as stored in Firestore."""
     return {
         "id": test_run.id,
         "status": test_run.status.value,
@@ -213,13 +180,68 @@ async def get_test_run_status(
     }
 
 
+def _sse(data: dict, event: str = "progress") -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/{test_run_id}/events")
+async def stream_test_run_events(
+    test_run_id: str,
+    request: Request,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+):
+    """Stream test run progress as Server-Sent Events.
+
+    Sends the stored status first, then live events from the worker
+    (documents done, throughput, ETA) until the run completes or fails.
+    """
+    test_run = await firestore.get_test_run_by_id(test_run_id)
+
+    if not test_run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test run not found"
+        )
+
+    async def events():
+        yield _sse(_status_snapshot(test_run))
+        if test_run.status.value in TERMINAL_STATUSES or not test_run.job_id:
+            return
+
+        async with get_progress_broker().subscribe(test_run.job_id) as subscriber:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if event is JOB_ENDED:
+                    # The worker stopped without reporting; fall back to the stored status
+                    final = await firestore.get_test_run_by_id(test_run_id)
+                    if final:
+                        yield _sse(_status_snapshot(final))
+                    return
+
+                yield _sse({"id": test_run_id, **event})
+                if event.get("status") in TERMINAL_STATUSES:
+                    return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/{test_run_id}/cancel")
 async def cancel_test_run(
     test_run_id: str,
-    current_user_id: str = Depends(get_current_user_id)
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
-    """Cancel/reset a stuck test run."""
-    firestore = FirestoreService()
+    """Cancel a running test run, or reset a stuck one."""
     test_run = await firestore.get_test_run_by_id(test_run_id)
 
     if not test_run:
@@ -240,9 +262,74 @@ async def cancel_test_run(
         error_message="Cancelled by user"
     )
 
+    # Stop the worker processing it (it polls this flag every few seconds)
+    if test_run.job_id:
+        await get_job_queue().request_cancel(test_run.job_id)
+
     return {"message": "Test run cancelled", "id": test_run_id}
 
 
+@router.post("/{test_run_id}/resume", response_model=TestRunResponse)
+async def resume_test_run(
+    test_run_id: str,
+    current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+):
+    """Resume a failed, cancelled or orphaned test run.
+    Documents that already have a result are skipped.
+    """
+    test_run = await firestore.get_test_run_by_id(test_run_id)
+
+    if not test_run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test run not found"
+        )
+
+    if test_run.status == TestStatus.COMPLETED:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Test run is already completed"
+        )
+
+    queue = get_job_queue()
+    if test_run.job_id:
+        previous_job = await queue.get(test_run.job_id)
+        if previous_job and (
+            previous_job.status == JobStatus.QUEUED
+            or (
+                previous_job.status == JobStatus.RUNNING
+                and previous_job.lease_expires_at
+                and previous_job.lease_expires_at > datetime.utcnow()
+            )
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Test run is still queued or being processed"
+            )
+        if previous_job and previous_job.status == JobStatus.RUNNING:
+            # Orphaned by a dead worker: retire it so it is not picked up again
+            await queue.fail(previous_job.id, "Superseded by resume")
+
+    # Reset first (checked against concurrent resumes), so a worker claiming
+    # the new job always finds the run PENDING
+    previous = await firestore.reset_test_run_for_resume(test_run_id, test_run.job_id)
+    if previous is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Test run was resumed or completed in the meantime"
+        )
+    try:
+        job = await queue.enqueue(JobKind.TEST_RUN, _job_payload(test_run))
+    except Exception:
+        await firestore.restore_test_run(test_run_id, previous)
+        raise
+    await firestore.set_test_run_job(test_run_id, job.id)
+
+    updated_run = await firestore.get_test_run_by_id(test_run_id)
+    return TestRunResponse(**updated_run.model_dump())
+
+
 @router.get("/options/libraries")
 async def get_available_libraries(
     current_user_id: str = Depends(get_current_user_id)
@@ -2,11 +2,12 @@
 Verification routes.
 Allows users to review, confirm, and correct OCR results.
 """
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.responses import Response
-from typing import Optional
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from typing import List, Optional
 
-from app.auth.dependencies import get_current_user_id
+from app.auth.dependencies import get_current_user_id, get_token_data
+from app.models.user import TokenData
+from app.dependencies import get_firestore, get_storage
 from app.models.result import (
     VerifyDocumentRequest,
     VerificationStatus,
@@ -14,17 +15,37 @@ from app.models.result import (
 )
 from app.services.firestore import FirestoreService
 from app.services.storage import StorageService
+from app.services.metrics_rollup import MetricsRollupService
+from app.services.result_payloads import ResultPayloadService
+from app.services.image_server import ImageServingService
 
 router = APIRouter()
 
 
+async def _record_verification_rollup(
+    firestore: FirestoreService,
+    test_run_id: str,
+    previous_accuracy: Optional[float],
+    verified_accuracy: float,
+    previous_fields: Optional[List[ExtractedField]] = None,
+    fields: Optional[List[ExtractedField]] = None,
+):
+    """Apply a verification's changes to the global metrics rollups."""
+    test_run = await firestore.get_test_run_by_id(test_run_id)
+    if test_run:
+        await MetricsRollupService(firestore).record_verification(
+            test_run, previous_accuracy, verified_accuracy,
+            previous_fields or [], fields or [],
+        )
+
+
 @router.get("/{test_run_id}/documents")
 async def list_documents_for_verification(
     test_run_id: str,
     current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """List documents in a test run with their verification status."""
-    firestore = FirestoreService()
 
     test_run = await firestore.get_test_run_by_id(test_run_id)
     if not test_run:
@@ -37,48 +58,14 @@ async def list_documents_for_verification(
 
     documents = []
     for result in results:
-        # Check if this is a handwritten batch result (no extracted fields, has ocr_results)
-        is_handwritten = (
-            not result.extracted_fields
-            and result.ocr_results
-            and result.ocr_results.get("full_text") is not None
-        )
-
-        # Determine verification status for the document
-        if is_handwritten:
-            # Handwritten: check verified_by and text_regions for status
-            if result.verified_by:
-                text_regions = result.ocr_results.get("text_regions", [])
-                has_corrections = any(
-                    r.get("verification_status") == VerificationStatus.CORRECTED.value
-                    for r in text_regions
-                )
-                has_added = any(r.get("user_added") for r in text_regions)
-                doc_status = "corrected" if (has_corrections or has_added) else "verified"
-            else:
-                doc_status = "unverified"
-        elif not result.extracted_fields:
-            doc_status = "unverified"
-        elif all(
-            ef.verification_status != VerificationStatus.UNVERIFIED
-            for ef in result.extracted_fields
-        ):
-            has_corrections = any(
-                ef.verification_status == VerificationStatus.CORRECTED
-                for ef in result.extracted_fields
-            )
-            doc_status = "corrected" if has_corrections else "verified"
-        else:
-            doc_status = "unverified"
-
         documents.append({
             "result_id": result.id,
             "document_id": result.document_id,
             "batch_id": result.batch_id,
             "overall_accuracy": result.overall_accuracy,
             "verified_accuracy": result.verified_accuracy,
-            "verification_status": doc_status,
-            "is_handwritten": is_handwritten,
+            "verification_status": result.verification_status.value,
+            "is_handwritten": result.is_handwritten,
         })
 
     return {
@@ -96,9 +83,10 @@ async def get_document_for_verification(
     test_run_id: str,
     document_id: str,
     current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Get document details for verification."""
-    firestore = FirestoreService()
 
     result = await firestore.get_result_by_document(test_run_id, document_id)
     if not result:
@@ -116,6 +104,8 @@ async def get_document_for_verification(
                 document = doc
                 break
 
+    layout_results, ocr_results = await ResultPayloadService(storage).load(result)
+
     image_url = f"/api/verify/{test_run_id}/document/{document_id}/image"
 
     return {
@@ -128,8 +118,8 @@ async def get_document_for_verification(
         "extracted_fields": [ef.model_dump() for ef in result.extracted_fields],
         "overall_accuracy": result.overall_accuracy,
         "verified_accuracy": result.verified_accuracy,
-        "layout_results": result.layout_results,
-        "ocr_results": result.ocr_results,
+        "layout_results": layout_results,
+        "ocr_results": ocr_results,
     }
 
 
@@ -137,40 +127,15 @@ async def get_document_for_verification(
 async def get_document_image(
     test_run_id: str,
     document_id: str,
+    request: Request,
     current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Proxy endpoint to serve document image for verification."""
-    firestore = FirestoreService()
-    storage = StorageService()
-
-    result = await firestore.get_result_by_document(test_run_id, document_id)
-    if not result:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Result not found",
-        )
-
-    batch = await firestore.get_batch_by_id(result.batch_id)
-    if not batch:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Batch not found",
-        )
-
-    document = None
-    for doc in batch.documents:
-        if doc.id == document_id:
-            document = doc
-            break
-
-    if not document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Document not found in batch",
-        )
-
-    image_bytes = await storage.download_file(document.storage_path)
-    return Response(content=image_bytes, media_type="image/png")
+    return await ImageServingService(firestore, storage).serve_document(
+        request, document_id, test_run_id=test_run_id
+    )
 
 
 @router.put("/{test_run_id}/document/{document_id}/verify")
@@ -178,14 +143,13 @@ async def verify_document(
     test_run_id: str,
     document_id: str,
     request: VerifyDocumentRequest,
-    current_user_id: str = Depends(get_current_user_id),
+    token: TokenData = Depends(get_token_data),
+    firestore: FirestoreService = Depends(get_firestore),
+    storage: StorageService = Depends(get_storage),
 ):
     """Submit verification for a document's extracted fields or text regions."""
-    firestore = FirestoreService()
 
-    # Look up user email
-    user = await firestore.get_user_by_id(current_user_id)
-    verified_by_name = user.email if user else ""
+    verified_by_name = token.email
 
     result = await firestore.get_result_by_document(test_run_id, document_id)
     if not result:
@@ -196,7 +160,9 @@ async def verify_document(
 
     # === Handwritten path: text_regions provided ===
     if request.text_regions is not None:
-        ocr_results = dict(result.ocr_results)
+        payloads = ResultPayloadService(storage)
+        layout_results, ocr_results = await payloads.load(result)
+        ocr_results = dict(ocr_results)
         existing_regions = list(ocr_results.get("text_regions", []))
 
         # Update existing regions with verification data
@@ -231,11 +197,19 @@ async def verify_document(
         else:
             verified_accuracy = 0.0
 
+        payload_path = await payloads.save(
+            test_run_id=test_run_id,
+            document_id=document_id,
+            layout_results=layout_results,
+            ocr_results=ocr_results,
+        )
+
         success = await firestore.update_result_verification_handwritten(
             result_id=result.id,
             ocr_results=ocr_results,
+            payload_path=payload_path,
             verified_accuracy=verified_accuracy,
-            verified_by=current_user_id,
+            verified_by=token.user_id,
             verified_by_name=verified_by_name,
         )
 
@@ -245,6 +219,10 @@ async def verify_document(
                 detail="Failed to update verification",
             )
 
+        await _record_verification_rollup(
+            firestore, test_run_id, result.verified_accuracy, verified_accuracy
+        )
+
         return {
             "message": "Verification submitted successfully",
             "verified_accuracy": verified_accuracy,
@@ -294,7 +272,7 @@ async def verify_document(
         result_id=result.id,
         extracted_fields=updated_fields,
         verified_accuracy=verified_accuracy,
-        verified_by=current_user_id,
+        verified_by=token.user_id,
         verified_by_name=verified_by_name,
     )
 
@@ -304,6 +282,11 @@ async def verify_document(
             detail="Failed to update verification",
         )
 
+    await _record_verification_rollup(
+        firestore, test_run_id, result.verified_accuracy, verified_accuracy,
+        result.extracted_fields, updated_fields,
+    )
+
     return {
         "message": "Verification submitted successfully",
         "verified_accuracy": verified_accuracy,
@@ -315,9 +298,9 @@ async def verify_document(
 async def get_verification_summary(
     test_run_id: str,
     current_user_id: str = Depends(get_current_user_id),
+    firestore: FirestoreService = Depends(get_firestore),
 ):
     """Get verification progress summary for a test run."""
-    firestore = FirestoreService()
 
     test_run = await firestore.get_test_run_by_id(test_run_id)
     if not test_run:
@@ -334,49 +317,13 @@ async def get_verification_summary(
     unverified = 0
 
     for result in results:
-        # Check if handwritten (no extracted fields, has full_text)
-        is_handwritten = (
-            not result.extracted_fields
-            and result.ocr_results
-            and result.ocr_results.get("full_text") is not None
-        )
-
-        if is_handwritten:
-            if result.verified_by:
-                text_regions = result.ocr_results.get("text_regions", [])
-                has_corrections = any(
-                    r.get("verification_status") == VerificationStatus.CORRECTED.value
-                    for r in text_regions
-                )
-                has_added = any(r.get("user_added") for r in text_regions)
-                if has_corrections or has_added:
-                    corrected += 1
-                else:
-                    verified += 1
-            else:
-                unverified += 1
-            continue
-
-        if not result.extracted_fields:
-            if result.verified_by:
-                verified += 1
-            else:
-                unverified += 1
-            continue
-
-        all_done = all(
-            ef.verification_status != VerificationStatus.UNVERIFIED
-            for ef in result.extracted_fields
-        )
-        if all_done:
-            has_corrections = any(
-                ef.verification_status == VerificationStatus.CORRECTED
-                for ef in result.extracted_fields
-            )
-            if has_corrections:
-                corrected += 1
-            else:
-                verified += 1
+        if result.verification_status == VerificationStatus.CORRECTED:
+            corrected += 1
+        elif result.verification_status == VerificationStatus.VERIFIED:
+            verified += 1
+        elif not result.extracted_fields and not result.is_handwritten and result.verified_by:
+            # Results with nothing to review count as verified once submitted
+            verified += 1
         else:
             unverified += 1
 
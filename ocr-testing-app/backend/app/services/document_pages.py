@@ -0,0 +1,200 @@
+"""
+Document page service.
+Yields the pages of stored documents (single images, multi-page PDFs and
+TIFFs) one at a time. Paged originals are spooled to a temporary file rather
+than held in memory and PDF pages are rasterized lazily with PyMuPDF, so
+memory stays bounded by one rendered page regardless of document length.
+"""
+import asyncio
+import io
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from google.api_core.exceptions import NotFound
+from PIL import Image
+
+from app.models.batch import DocumentPage, SyntheticDocument
+from app.processing.timing import StageTimer
+from app.services.storage import StorageService
+from app.services.pdf_rasterizer import (
+    DEFAULT_RENDER_SCALE,
+    PYMUPDF_AVAILABLE,
+    PdfRasterizerService,
+)
+
+if PYMUPDF_AVAILABLE:
+    import fitz  # PyMuPDF
+
+PDF_EXTENSIONS = (".pdf",)
+TIFF_EXTENSIONS = (".tif", ".tiff")
+
+
+def document_format(storage_path: str) -> str:
+    """Classify a stored document as "pdf", "tiff" or "image"."""
+    suffix = Path(storage_path).suffix.lower()
+    if suffix in PDF_EXTENSIONS:
+        return "pdf"
+    if suffix in TIFF_EXTENSIONS:
+        return "tiff"
+    return "image"
+
+
+def _require_pymupdf():
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("PyMuPDF not installed. Install with: pip install pymupdf")
+
+
+def describe_pages(
+    data: bytes, filename: str, scale: int = DEFAULT_RENDER_SCALE
+) -> List[DocumentPage]:
+    """
+    List the pages of an uploaded document with their rendered sizes,
+    without rasterizing them. Single images have no page list.
+    """
+    fmt = document_format(filename)
+    if fmt == "pdf":
+        _require_pymupdf()
+        pdf_doc = fitz.open(stream=data, filetype="pdf")
+        try:
+            return [
+                DocumentPage(
+                    page_number=i + 1,
+                    width=int(page.rect.width * scale),
+                    height=int(page.rect.height * scale),
+                )
+                for i, page in enumerate(pdf_doc)
+            ]
+        finally:
+            pdf_doc.close()
+
+    if fmt == "tiff":
+        with Image.open(io.BytesIO(data)) as tiff:
+            pages = []
+            for i in range(getattr(tiff, "n_frames", 1)):
+                tiff.seek(i)
+                pages.append(DocumentPage(
+                    page_number=i + 1, width=tiff.width, height=tiff.height
+                ))
+            return pages
+
+    return []
+
+
+def _render_frame_png(source: Union[str, io.BytesIO], page_number: int) -> Optional[bytes]:
+    """Encode one frame of an image file as PNG; None if there is no such frame."""
+    with Image.open(source) as image:
+        if page_number > getattr(image, "n_frames", 1):
+            return None
+        image.seek(page_number - 1)
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="PNG")
+        return output.getvalue()
+
+
+class DocumentPageService:
+    """Service for streaming the pages of stored documents."""
+
+    def __init__(
+        self,
+        storage: Optional[StorageService] = None,
+        render_scale: int = DEFAULT_RENDER_SCALE,
+    ):
+        self.storage = storage or StorageService()
+        self.render_scale = render_scale
+
+    async def iter_pages(
+        self, document: SyntheticDocument, timer: Optional[StageTimer] = None
+    ) -> AsyncIterator[Tuple[int, Image.Image]]:
+        """
+        Yield (page_number, RGB image) for each page of a document.
+        Each page should be released by the caller before the next is read.
+        Download and rasterization time is recorded on ``timer``, if given.
+        """
+        timer = timer or StageTimer()
+        fmt = document_format(document.storage_path)
+        if fmt == "image":
+            with timer.stage("download"):
+                image_bytes = await self.storage.download_file(document.storage_path)
+            with timer.stage("decode"):
+                image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+            yield 1, image
+            return
+
+        if fmt == "pdf":
+            _require_pymupdf()
+
+        fd, path = tempfile.mkstemp(suffix=Path(document.storage_path).suffix)
+        os.close(fd)
+        try:
+            with timer.stage("download"):
+                await self.storage.download_to_path(document.storage_path, path)
+            if fmt == "pdf":
+                pdf_doc = fitz.open(path)
+                try:
+                    matrix = fitz.Matrix(self.render_scale, self.render_scale)
+                    for i in range(pdf_doc.page_count):
+                        with timer.stage("decode"):
+                            pix = pdf_doc[i].get_pixmap(matrix=matrix)
+                            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                            del pix
+                        yield i + 1, image
+                finally:
+                    pdf_doc.close()
+            else:
+                with Image.open(path) as tiff:
+                    for i in range(getattr(tiff, "n_frames", 1)):
+                        with timer.stage("decode"):
+                            tiff.seek(i)
+                            image = tiff.convert("RGB")
+                        yield i + 1, image
+        finally:
+            os.unlink(path)
+
+    async def render_page(self, storage_path: str, page_number: int) -> Optional[bytes]:
+        """
+        Render a single page as PNG for display. PDF and TIFF pages are
+        rendered once and then read from the rasterization cache. Returns
+        None if the page does not exist.
+        """
+        if page_number < 1:
+            return None
+        fmt = document_format(storage_path)
+        rasterizer = PdfRasterizerService(self.storage)
+        if fmt == "pdf":
+            try:
+                return await rasterizer.render_png(
+                    storage_path, page=page_number - 1, scale=self.render_scale
+                )
+            except IndexError:
+                return None
+
+        if fmt == "image":
+            if page_number != 1:
+                return None
+            data = await self.storage.download_file(storage_path)
+            return await asyncio.to_thread(_render_frame_png, io.BytesIO(data), 1)
+
+        # TIFF: frames are encoded at their own size (scale 1)
+        cache_blob = rasterizer.cache_blob(storage_path, page_number - 1, scale=1)
+        try:
+            return await self.storage.download_file(cache_blob)
+        except NotFound:
+            pass
+
+        # Seek the frame in a spooled copy rather than holding the file in memory
+        fd, path = tempfile.mkstemp(suffix=Path(storage_path).suffix)
+        os.close(fd)
+        try:
+            await self.storage.download_to_path(storage_path, path)
+            png_bytes = await asyncio.to_thread(_render_frame_png, path, page_number)
+        finally:
+            os.unlink(path)
+        if png_bytes is None:
+            return None
+
+        await self.storage.upload_bytes(
+            data=png_bytes, blob_name=cache_blob, content_type="image/png"
+        )
+        return png_bytes
@@ -0,0 +1,154 @@
+"""
+Engine preloading and warmup.
+Loads the configured layout detectors and OCR engines ahead of the first
+test run and runs a dummy inference on each, so lazy model loads, allocator
+setup and first-call kernel compilation don't land on a user's run.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+from app.config import get_settings
+from app.processing.layout import get_layout_detector
+from app.processing.layout.base import Region
+from app.processing.ocr import get_ocr_engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Blank page used for the dummy inference
+WARMUP_IMAGE_SIZE = (640, 160)
+
+
+class EngineWarmupService:
+    """Preloads engines and tracks which of them are warm."""
+
+    def __init__(
+        self,
+        layout_detectors: List[str],
+        ocr_engines: List[str],
+        warmup_inference: bool = True,
+        attempts: int = 1,
+        retry_seconds: float = 0.0,
+    ):
+        self.warmup_inference = warmup_inference
+        self.attempts = max(attempts, 1)
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Dict[str, Any]] = {}
+        for kind, names in (("layout", layout_detectors), ("ocr", ocr_engines)):
+            for name in names:
+                self._engines[f"{kind}:{name}"] = {
+                    "kind": kind,
+                    "name": name,
+                    "state": "cold",
+                    "seconds": None,
+                    "attempts": 0,
+                    "error": None,
+                }
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls) -> "EngineWarmupService":
+        return cls(
+            settings.get_preload_layout_detectors(),
+            settings.get_preload_ocr_engines(),
+            settings.warmup_inference,
+            settings.warmup_attempts,
+            settings.warmup_retry_seconds,
+        )
+
+    def warm_all(self) -> None:
+        """Load and warm every configured engine (blocking)."""
+        for key in list(self._engines):
+            self.warm(key)
+
+    def start_background(self) -> threading.Thread:
+        """Warm engines in a daemon thread, e.g. while the API serves requests."""
+        self._thread = threading.Thread(target=self.warm_all, name="engine-warmup", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def warm(self, key: str) -> None:
+        """
+        Warm one engine, retrying failures with exponential backoff up to
+        ``attempts`` times. Never raises; an engine that never warms is left
+        "failed" with its last error.
+        """
+        for attempt in range(1, self.attempts + 1):
+            if attempt > 1:
+                time.sleep(self.retry_seconds * 2 ** (attempt - 2))
+            self._set(key, attempts=attempt)
+            if self._warm_once(key):
+                return
+
+    def _warm_once(self, key: str) -> bool:
+        """Load one engine and, if enabled, run a dummy inference."""
+        entry = self._engines[key]
+        self._set(key, state="loading")
+        start = time.perf_counter()
+        try:
+            if entry["kind"] == "layout":
+                engine = get_layout_detector(entry["name"])
+            else:
+                engine = get_ocr_engine(entry["name"])
+            if hasattr(engine, "_load_model"):
+                engine._load_model()
+            if self.warmup_inference:
+                image = Image.new("RGB", WARMUP_IMAGE_SIZE, "white")
+                if entry["kind"] == "layout":
+                    engine.detect(image)
+                else:
+                    engine.extract_text(image, [Region(
+                        id=0,
+                        type="full_page",
+                        confidence=1.0,
+                        bbox={"x1": 0, "y1": 0, "x2": image.width, "y2": image.height},
+                    )])
+        except Exception as e:
+            logger.exception("Failed to warm %s (attempt %d)", key, entry["attempts"])
+            self._set(key, state="failed", error=str(e))
+            return False
+        self._set(key, state="warm", seconds=round(time.perf_counter() - start, 3), error=None)
+        logger.info("Warmed %s in %.1fs", key, self._engines[key]["seconds"])
+        return True
+
+    def _set(self, key: str, **values) -> None:
+        with self._lock:
+            self._engines[key].update(values)
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether warmup has finished: every engine is warm or has failed all
+        its attempts (a broken engine must not keep the process unready;
+        runs using it fail with the load error instead).
+        """
+        return self.status()["ready"]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            engines = [dict(e) for e in self._engines.values()]
+        return {
+            "ready": all(
+                e["state"] == "warm"
+                or (e["state"] == "failed" and e["attempts"] >= self.attempts)
+                for e in engines
+            ),
+            "engines": engines,
+            "failed": [f"{e['kind']}:{e['name']}" for e in engines if e["state"] == "failed"],
+        }
+
+
+_warmup: Optional[EngineWarmupService] = None
+
+
+def get_engine_warmup() -> EngineWarmupService:
+    """Get the process-wide warmup service for the configured engines."""
+    global _warmup
+    if _warmup is None:
+        _warmup = EngineWarmupService.from_settings()
+    return _warmup
@@ -3,8 +3,9 @@ Firestore database service.
 """
 import uuid
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Set, Tuple
 
+from google.api_core.exceptions import NotFound
 from google.cloud import firestore
 from google.oauth2 import service_account
 
@@ -13,27 +14,61 @@ from app.models.user import UserInDB
 from app.models.form import FormInDB, FieldMapping
 from app.models.batch import BatchInDB, SyntheticDocument
 from app.models.test_run import TestRunInDB, TestStatus
-from app.models.result import ResultInDB, ExtractedField
+from app.models.result import (
+    ResultInDB,
+    ExtractedField,
+    PageResult,
+    ResultFilters,
+    VerificationStatus,
+    document_verification_status,
+)
+from app.models.metrics import MetricsRollup, RollupKind
 
 settings = get_settings()
 
+# Fields read by list/metrics queries. Raw layout/OCR payloads are excluded so
+# listings never transfer them (legacy results may still hold them inline).
+SLIM_RESULT_FIELDS = [
+    "id",
+    "test_run_id",
+    "document_id",
+    "batch_id",
+    "payload_path",
+    "pages",
+    "stage_timings",
+    "is_handwritten",
+    "extracted_fields",
+    "overall_accuracy",
+    "verified_accuracy",
+    "verified_by",
+    "verified_by_name",
+    "verified_at",
+    "created_at",
+    "field_names",
+    "verification_status",
+]
+
+
+def create_firestore_client() -> firestore.Client:
+    """Create a Firestore client from the configured credentials."""
+    if settings.google_application_credentials:
+        credentials = service_account.Credentials.from_service_account_file(
+            settings.google_application_credentials
+        )
+        return firestore.Client(
+            project=settings.gcp_project_id,
+            credentials=credentials
+        )
+    # Use default credentials (for local development with gcloud auth)
+    return firestore.Client(project=settings.gcp_project_id)
+
 
 class FirestoreService:
     """Service for Firestore database operations."""
 
-    def __init__(self):
-        """Initialize Firestore client."""
-        if settings.google_application_credentials:
-            credentials = service_account.Credentials.from_service_account_file(
-                settings.google_application_credentials
-            )
-            self.db = firestore.Client(
-                project=settings.gcp_project_id,
-                credentials=credentials
-            )
-        else:
-            # Use default credentials (for local development with gcloud auth)
-            self.db = firestore.Client(project=settings.gcp_project_id)
+    def __init__(self, client: Optional[firestore.Client] = None):
+        """Initialize with a shared Firestore client, or create one."""
+        self.db = client or create_firestore_client()
 
     # ==================== User Operations ====================
 
@@ -143,6 +178,24 @@ class FirestoreService:
         })
         return True
 
+    async def update_form_file(
+        self,
+        form_id: str,
+        storage_path: str,
+        thumbnail_path: Optional[str] = None
+    ) -> bool:
+        """Point a form at a newly uploaded template file."""
+        doc_ref = self.db.collection("forms").document(form_id)
+        doc = doc_ref.get()
+        if not doc.exists:
+            return False
+
+        doc_ref.update({
+            "storage_path": storage_path,
+            "thumbnail_path": thumbnail_path,
+        })
+        return True
+
     async def delete_form(self, form_id: str) -> bool:
         """Delete a form."""
         doc_ref = self.db.collection("forms").document(form_id)
@@ -187,7 +240,18 @@ class FirestoreService:
             "documents": [doc.model_dump() for doc in documents],
         }
 
-        self.db.collection("batches").document(batch_id).set(batch_data)
+        write = self.db.batch()
+        write.set(self.db.collection("batches").document(batch_id), batch_data)
+        for doc in documents:
+            write.set(
+                self.db.collection("document_index").document(doc.id),
+                {
+                    "document_id": doc.id,
+                    "batch_id": batch_id,
+                    "storage_path": doc.storage_path,
+                },
+            )
+        write.commit()
 
         return BatchInDB(**batch_data)
 
@@ -220,6 +284,30 @@ class FirestoreService:
             batches.append(BatchInDB(**data))
         return batches
 
+    async def get_document_index(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a document's batch and storage path by document ID."""
+        doc = self.db.collection("document_index").document(document_id).get()
+        if doc.exists:
+            return doc.to_dict()
+        return None
+
+    async def set_document_index(
+        self,
+        document_id: str,
+        batch_id: str,
+        storage_path: str,
+        size: Optional[int] = None,
+    ) -> None:
+        """Create or update a document index entry."""
+        data: Dict[str, Any] = {
+            "document_id": document_id,
+            "batch_id": batch_id,
+            "storage_path": storage_path,
+        }
+        if size is not None:
+            data["size"] = size
+        self.db.collection("document_index").document(document_id).set(data, merge=True)
+
     # ==================== Test Run Operations ====================
 
     async def create_test_run(
@@ -246,6 +334,7 @@ class FirestoreService:
             "error_message": None,
             "total_documents": total_documents,
             "processed_documents": 0,
+            "metrics_rolled_up": False,
         }
 
         self.db.collection("test_runs").document(run_id).set(run_data)
@@ -267,28 +356,83 @@ class FirestoreService:
         run_id: str,
         status: TestStatus,
         processed_documents: Optional[int] = None,
-        error_message: Optional[str] = None
+        error_message: Optional[str] = None,
+        stage_timings: Optional[Dict[str, Dict[str, float]]] = None,
     ) -> bool:
-        """Update test run status."""
-        doc_ref = self.db.collection("test_runs").document(run_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            return False
-
+        """Update test run status (blind write; False if the run does not exist)."""
         update_data: Dict[str, Any] = {"status": status.value}
 
         if processed_documents is not None:
             update_data["processed_documents"] = processed_documents
 
+        if stage_timings is not None:
+            update_data["stage_timings"] = stage_timings
+
         if error_message is not None:
             update_data["error_message"] = error_message
 
         if status in [TestStatus.COMPLETED, TestStatus.FAILED]:
             update_data["completed_at"] = datetime.utcnow()
 
-        doc_ref.update(update_data)
+        try:
+            self.db.collection("test_runs").document(run_id).update(update_data)
+        except NotFound:
+            return False
+        return True
+
+    async def set_test_run_progress(self, run_id: str, processed_documents: int) -> bool:
+        """Record progress of a running test run (blind write, no status change)."""
+        try:
+            self.db.collection("test_runs").document(run_id).update({
+                "processed_documents": processed_documents,
+            })
+        except NotFound:
+            return False
         return True
 
+    async def set_test_run_job(self, run_id: str, job_id: str) -> None:
+        """Record the queue job executing a test run."""
+        self.db.collection("test_runs").document(run_id).update({"job_id": job_id})
+
+    async def reset_test_run_for_resume(
+        self, run_id: str, expected_job_id: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Move a stopped test run back to PENDING, detached from its old job.
+
+        Runs in a transaction that checks the run is not completed and is
+        still under ``expected_job_id``, so of two concurrent resumes only
+        one proceeds. Returns the previous values of the reset fields (for
+        restore_test_run), or None if the run changed in the meantime.
+        """
+        run_ref = self.db.collection("test_runs").document(run_id)
+        reset_fields = ("status", "error_message", "completed_at", "job_id")
+
+        @firestore.transactional
+        def reset(transaction) -> Optional[Dict[str, Any]]:
+            snapshot = run_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            data = snapshot.to_dict()
+            if (
+                data.get("status") == TestStatus.COMPLETED.value
+                or data.get("job_id") != expected_job_id
+            ):
+                return None
+            transaction.update(run_ref, {
+                "status": TestStatus.PENDING.value,
+                "error_message": None,
+                "completed_at": None,
+                "job_id": None,
+            })
+            return {name: data.get(name) for name in reset_fields}
+
+        return reset(self.db.transaction())
+
+    async def restore_test_run(self, run_id: str, previous: Dict[str, Any]) -> None:
+        """Undo reset_test_run_for_resume (e.g. when enqueueing failed)."""
+        self.db.collection("test_runs").document(run_id).update(previous)
+
     async def list_test_runs(self) -> List[TestRunInDB]:
         """List all test runs."""
         docs = self.db.collection("test_runs").order_by("started_at", direction=firestore.Query.DESCENDING).stream()
@@ -307,23 +451,35 @@ class FirestoreService:
         test_run_id: str,
         document_id: str,
         batch_id: str,
-        layout_results: Dict[str, Any],
-        ocr_results: Dict[str, Any],
+        payload_path: Optional[str],
         extracted_fields: List[ExtractedField],
-        overall_accuracy: float
+        overall_accuracy: float,
+        is_handwritten: bool = False,
+        pages: Optional[List[PageResult]] = None,
+        stage_timings: Optional[Dict[str, Dict[str, float]]] = None,
     ) -> ResultInDB:
-        """Create a new result."""
-        result_id = str(uuid.uuid4())
+        """
+        Create a new result.
+        Raw layout/OCR payloads live in storage at payload_path, or per page
+        in ``pages`` for multi-page documents. The ID is derived from the run
+        and document, so re-processing a document after a resume overwrites
+        its result instead of duplicating it.
+        """
+        result_id = f"{test_run_id}_{document_id}"
         result_data = {
             "id": result_id,
             "test_run_id": test_run_id,
             "document_id": document_id,
             "batch_id": batch_id,
-            "layout_results": layout_results,
-            "ocr_results": ocr_results,
+            "payload_path": payload_path,
+            "pages": [p.model_dump() for p in pages or []],
+            "stage_timings": stage_timings or {},
+            "is_handwritten": is_handwritten,
             "extracted_fields": [ef.model_dump() for ef in extracted_fields],
             "overall_accuracy": overall_accuracy,
             "created_at": datetime.utcnow(),
+            "field_names": [ef.field_name for ef in extracted_fields],
+            "verification_status": VerificationStatus.UNVERIFIED.value,
         }
 
         self.db.collection("results").document(result_id).set(result_data)
@@ -331,8 +487,12 @@ class FirestoreService:
         return ResultInDB(**result_data)
 
     async def get_results_by_test_run(self, test_run_id: str) -> List[ResultInDB]:
-        """Get all results for a test run."""
-        query = self.db.collection("results").where("test_run_id", "==", test_run_id)
+        """Get all results for a test run (without raw payloads)."""
+        query = (
+            self.db.collection("results")
+            .where("test_run_id", "==", test_run_id)
+            .select(SLIM_RESULT_FIELDS)
+        )
         docs = query.stream()
         results = []
         for doc in docs:
@@ -343,6 +503,143 @@ class FirestoreService:
             results.append(ResultInDB(**data))
         return results
 
+    async def get_completed_document_ids(self, test_run_id: str) -> Set[str]:
+        """IDs of documents that already have a result in a test run."""
+        query = (
+            self.db.collection("results")
+            .where("test_run_id", "==", test_run_id)
+            .select(["document_id"])
+        )
+        return {doc.get("document_id") for doc in query.stream()}
+
+    async def iter_results_by_test_run(
+        self, test_run_id: str, page_size: int = 200
+    ) -> AsyncIterator[ResultInDB]:
+        """
+        Yield results for a test run page by page.
+
+        Pages are fetched with a document-ID cursor so only one page of
+        results is held in memory at a time. Raw payloads are not loaded.
+        """
+        query = (
+            self.db.collection("results")
+            .where("test_run_id", "==", test_run_id)
+            .select(SLIM_RESULT_FIELDS)
+            .order_by("__name__")
+            .limit(page_size)
+        )
+        last_doc = None
+        while True:
+            page_query = query.start_after(last_doc) if last_doc else query
+            docs = list(page_query.stream())
+            for doc in docs:
+                data = doc.to_dict()
+                data["extracted_fields"] = [
+                    ExtractedField(**ef) for ef in data.get("extracted_fields", [])
+                ]
+                yield ResultInDB(**data)
+            if len(docs) < page_size:
+                break
+            last_doc = docs[-1]
+
+    async def query_results(
+        self,
+        filters: ResultFilters,
+        page_size: int = 100,
+        page_token: Optional[str] = None,
+    ) -> Tuple[List[ResultInDB], Optional[str], int]:
+        """
+        Query results with filters pushed down to Firestore.
+
+        Results are ordered by overall_accuracy (then document ID) and paged
+        with a cursor; ``page_token`` is the ID of the last result of the
+        previous page. Returns (results, next_page_token, total matches).
+        Raises ValueError if ``page_token`` names no result.
+        firestore.indexes.json declares an index for every combination of
+        the equality filters (test run, batch, verification status, field
+        name). Raw payloads are not loaded.
+        """
+        collection = self.db.collection("results")
+        query = collection
+
+        if filters.test_run_id:
+            query = query.where("test_run_id", "==", filters.test_run_id)
+        if filters.batch_id:
+            query = query.where("batch_id", "==", filters.batch_id)
+        if filters.verification_status:
+            query = query.where(
+                "verification_status", "==", filters.verification_status.value
+            )
+        if filters.field_name:
+            query = query.where("field_names", "array_contains", filters.field_name)
+        if filters.min_accuracy is not None:
+            query = query.where("overall_accuracy", ">=", filters.min_accuracy)
+        if filters.max_accuracy is not None:
+            query = query.where("overall_accuracy", "<=", filters.max_accuracy)
+
+        # Server-side count aggregation of every match, not just this page
+        total = int(query.count().get()[0][0].value)
+
+        query = (
+            query.select(SLIM_RESULT_FIELDS)
+            .order_by("overall_accuracy")
+            .order_by("__name__")
+        )
+
+        if page_token:
+            cursor = collection.document(page_token).get()
+            if not cursor.exists:
+                raise ValueError("Invalid or expired page_token")
+            query = query.start_after(cursor)
+
+        # Fetch one extra document to know whether another page exists
+        docs = list(query.limit(page_size + 1).stream())
+        next_page_token = docs[page_size - 1].id if len(docs) > page_size else None
+
+        results = []
+        for doc in docs[:page_size]:
+            data = doc.to_dict()
+            data["extracted_fields"] = [
+                ExtractedField(**ef) for ef in data.get("extracted_fields", [])
+            ]
+            results.append(ResultInDB(**data))
+        return results, next_page_token, total
+
+    async def backfill_result_query_fields(self) -> int:
+        """
+        Populate the denormalized query fields on results written before they
+        existed. Returns number of results updated.
+        """
+        count = 0
+        batch = self.db.batch()
+        for doc in self.db.collection("results").stream():
+            data = doc.to_dict()
+            if all(k in data for k in ("field_names", "verification_status", "is_handwritten")):
+                continue
+
+            extracted_fields = [
+                ExtractedField(**ef) for ef in data.get("extracted_fields", [])
+            ]
+            ocr_results = data.get("ocr_results", {})
+            batch.update(doc.reference, {
+                "is_handwritten": bool(
+                    not extracted_fields
+                    and ocr_results.get("full_text") is not None
+                ),
+                "field_names": [ef.field_name for ef in extracted_fields],
+                "verification_status": document_verification_status(
+                    extracted_fields,
+                    ocr_results,
+                    data.get("verified_by"),
+                ).value,
+            })
+            count += 1
+            if count % 500 == 0:
+                batch.commit()
+                batch = self.db.batch()
+        batch.commit()
+        return count
+
     async def get_result_by_document(
         self, test_run_id: str, document_id: str
     ) -> Optional[ResultInDB]:
@@ -378,6 +675,9 @@ class FirestoreService:
 
         doc_ref.update({
             "extracted_fields": [ef.model_dump() for ef in extracted_fields],
+            "verification_status": document_verification_status(
+                extracted_fields, {}, verified_by
+            ).value,
             "verified_accuracy": verified_accuracy,
             "verified_by": verified_by,
             "verified_by_name": verified_by_name,
@@ -389,18 +689,28 @@ class FirestoreService:
         self,
         result_id: str,
         ocr_results: Dict[str, Any],
+        payload_path: str,
         verified_accuracy: float,
         verified_by: str,
         verified_by_name: str = "",
     ) -> bool:
-        """Update result with handwritten verification data (text regions)."""
+        """
+        Update result with handwritten verification data (text regions).
+        The updated ocr_results must already be saved at payload_path; any
+        legacy inline payload is removed from the document.
+        """
         doc_ref = self.db.collection("results").document(result_id)
         doc = doc_ref.get()
         if not doc.exists:
             return False
 
         doc_ref.update({
-            "ocr_results": ocr_results,
+            "payload_path": payload_path,
+            "layout_results": firestore.DELETE_FIELD,
+            "ocr_results": firestore.DELETE_FIELD,
+            "verification_status": document_verification_status(
+                [], ocr_results, verified_by
+            ).value,
             "verified_accuracy": verified_accuracy,
             "verified_by": verified_by,
             "verified_by_name": verified_by_name,
@@ -418,3 +728,122 @@ class FirestoreService:
             ]
             return ResultInDB(**data)
         return None
+
+    # ==================== Metrics Rollup Operations ====================
+
+    async def increment_metrics_rollups(
+        self, updates: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Apply counter increments to rollup documents atomically.
+
+        Each update is {"id": ..., "fields": {...}, "increments": {...}}; static
+        fields are merged as-is and increments use server-side Increment so
+        concurrent writers never lose updates.
+        """
+        collection = self.db.collection("metrics_rollups")
+        # Firestore batches are capped at 500 writes
+        for start in range(0, len(updates), 500):
+            batch = self.db.batch()
+            for update in updates[start:start + 500]:
+                batch.set(
+                    collection.document(update["id"]),
+                    self._rollup_increment_data(update),
+                    merge=True,
+                )
+            batch.commit()
+
+    @staticmethod
+    def _rollup_increment_data(update: Dict[str, Any]) -> Dict[str, Any]:
+        """Document data applying one rollup update's increments."""
+        data: Dict[str, Any] = dict(update.get("fields", {}))
+        for name, delta in update.get("increments", {}).items():
+            data[name] = firestore.Increment(delta)
+        data["updated_at"] = datetime.utcnow()
+        return data
+
+    async def apply_test_run_rollups(
+        self, run_id: str, updates: List[Dict[str, Any]]
+    ) -> bool:
+        """
+        Fold a completed run into the rollups exactly once.
+
+        The increments and the run's ``metrics_rolled_up`` marker are committed
+        in one transaction that does nothing if the marker is already set, so a
+        retried run is never counted twice. Returns False if the run was
+        already rolled up or does not exist.
+        """
+        collection = self.db.collection("metrics_rollups")
+        run_ref = self.db.collection("test_runs").document(run_id)
+
+        @firestore.transactional
+        def apply(transaction) -> bool:
+            snapshot = run_ref.get(transaction=transaction)
+            if not snapshot.exists or (snapshot.to_dict() or {}).get("metrics_rolled_up"):
+                return False
+            for update in updates:
+                transaction.set(
+                    collection.document(update["id"]),
+                    self._rollup_increment_data(update),
+                    merge=True,
+                )
+            transaction.update(run_ref, {"metrics_rolled_up": True})
+            return True
+
+        return apply(self.db.transaction())
+
+    async def list_metrics_rollups(
+        self, kind: Optional[RollupKind] = None
+    ) -> List[MetricsRollup]:
+        """List rollup documents, optionally restricted to one kind."""
+        query = self.db.collection("metrics_rollups")
+        if kind is not None:
+            query = query.where("kind", "==", kind.value)
+        rollups = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            data["id"] = doc.id
+            rollups.append(MetricsRollup(**data))
+        return rollups
+
+    async def replace_metrics_rollups(
+        self, documents: List[Dict[str, Any]], rolled_up_run_ids: List[str]
+    ) -> int:
+        """
+        Overwrite the rollups with freshly computed totals.
+
+        Each document is {"id": ..., "fields": {...}, "totals": {...}} and is
+        written whole with ``set``, so readers see either the old or the new
+        totals, never an emptied collection. Rollups absent from ``documents``
+        are deleted afterwards and the included runs are marked as rolled up.
+        Returns the number of stale rollups deleted.
+        """
+        collection = self.db.collection("metrics_rollups")
+        runs = self.db.collection("test_runs")
+        now = datetime.utcnow()
+        keep = {document["id"] for document in documents}
+        stale = [
+            doc.reference for doc in collection.stream() if doc.id not in keep
+        ]
+
+        # Firestore batches are capped at 500 writes
+        for start in range(0, len(documents), 500):
+            batch = self.db.batch()
+            for document in documents[start:start + 500]:
+                batch.set(collection.document(document["id"]), {
+                    **document.get("fields", {}),
+                    **document.get("totals", {}),
+                    "updated_at": now,
+                })
+            batch.commit()
+        for start in range(0, len(rolled_up_run_ids), 500):
+            batch = self.db.batch()
+            for run_id in rolled_up_run_ids[start:start + 500]:
+                batch.update(runs.document(run_id), {"metrics_rolled_up": True})
+            batch.commit()
+        for start in range(0, len(stale), 500):
+            batch = self.db.batch()
+            for ref in stale[start:start + 500]:
+                batch.delete(ref)
+            batch.commit()
+        return len(stale)
@@ -0,0 +1,243 @@
+"""
+Image derivative service.
+Produces a WebP thumbnail and a tiled multi-resolution pyramid for stored
+document and form images. Derivatives live next to the original:
+
+    batches/{batch}/{doc}.png               original
+    batches/{batch}/{doc}/thumb.webp        thumbnail
+    batches/{batch}/{doc}/pyramid.json      ImagePyramid manifest
+    batches/{batch}/{doc}/tiles/{level}/{col}_{row}.webp
+"""
+import asyncio
+import io
+import json
+import logging
+import math
+from typing import TYPE_CHECKING, List, Tuple, Optional
+
+from google.api_core.exceptions import NotFound
+
+from app.config import get_settings
+from app.models.image import ImagePyramid, PyramidLevel
+from app.services.storage import StorageService
+from app.services.pdf_rasterizer import PdfRasterizerService, is_pdf_path
+
+if TYPE_CHECKING:
+    # Pillow is only needed to generate derivatives, not to serve them
+    from PIL import Image
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+WEBP_QUALITY = 80
+
+
+def _encode_webp(image: "Image.Image") -> bytes:
+    output = io.BytesIO()
+    image.save(output, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return output.getvalue()
+
+
+class ImageDerivativeService:
+    """Service for generating and reading thumbnails and image tiles."""
+
+    def __init__(self, storage: Optional[StorageService] = None):
+        self.storage = storage or StorageService()
+        self.rasterizer = PdfRasterizerService(self.storage)
+        self.thumbnail_size = settings.image_thumbnail_size
+        self.tile_size = settings.image_tile_size
+
+    # ---------- Paths ----------
+
+    def _prefix(self, storage_path: str) -> str:
+        """Blob prefix for derivatives: the original's blob name minus extension."""
+        blob_name = self.storage._get_blob_name(storage_path)
+        return blob_name.rsplit(".", 1)[0] if "." in blob_name else blob_name
+
+    def thumbnail_blob(self, storage_path: str) -> str:
+        return f"{self._prefix(storage_path)}/thumb.webp"
+
+    def manifest_blob(self, storage_path: str) -> str:
+        return f"{self._prefix(storage_path)}/pyramid.json"
+
+    def tile_blob(self, storage_path: str, level: int, col: int, row: int) -> str:
+        return f"{self._prefix(storage_path)}/tiles/{level}/{col}_{row}.webp"
+
+    # ---------- Generation ----------
+
+    def decode(self, data: bytes) -> "Image.Image":
+        """Decode stored image bytes to RGB."""
+        from PIL import Image
+
+        return Image.open(io.BytesIO(data)).convert("RGB")
+
+    async def load_original(
+        self, storage_path: str, data: Optional[bytes] = None
+    ) -> "Image.Image":
+        """
+        Load the original as RGB, using the cached page 1 rendering for PDFs.
+        Pass the stored bytes as ``data`` when they are already in memory.
+        """
+        if is_pdf_path(storage_path):
+            data = await self.rasterizer.render_png(storage_path, pdf_bytes=data)
+        elif data is None:
+            data = await self.storage.download_file(storage_path)
+        return await asyncio.to_thread(self.decode, data)
+
+    def build_thumbnail(self, image: "Image.Image") -> bytes:
+        """Encode a WebP thumbnail fitting within thumbnail_size."""
+        from PIL import Image
+
+        thumb = image.copy()
+        thumb.thumbnail((self.thumbnail_size, self.thumbnail_size), Image.Resampling.LANCZOS)
+        return _encode_webp(thumb)
+
+    def build_tiles(
+        self, image: "Image.Image"
+    ) -> Tuple[List[PyramidLevel], List[Tuple[int, int, int, bytes]]]:
+        """
+        Cut the image into tile_size tiles at successively halved resolutions
+        until a level fits in a single tile.
+        Returns (levels, [(level, col, row, webp_bytes), ...]).
+        """
+        levels: List[PyramidLevel] = []
+        tiles: List[Tuple[int, int, int, bytes]] = []
+        level_image = image
+        level = 0
+
+        while True:
+            width, height = level_image.size
+            columns = math.ceil(width / self.tile_size)
+            rows = math.ceil(height / self.tile_size)
+            levels.append(PyramidLevel(
+                level=level, width=width, height=height, columns=columns, rows=rows
+            ))
+
+            for row in range(rows):
+                for col in range(columns):
+                    box = (
+                        col * self.tile_size,
+                        row * self.tile_size,
+                        min((col + 1) * self.tile_size, width),
+                        min((row + 1) * self.tile_size, height),
+                    )
+                    tiles.append((level, col, row, _encode_webp(level_image.crop(box))))
+
+            if columns == 1 and rows == 1:
+                break
+            # Halve each level from the previous one (box filter, fast)
+            level_image = level_image.reduce(2)
+            level += 1
+
+        return levels, tiles
+
+    def _build(
+        self, image: "Image.Image"
+    ) -> Tuple["Image.Image", List[PyramidLevel], List[Tuple[int, int, int, bytes]], bytes]:
+        """Encode all derivatives of an image: (rgb image, levels, tiles, thumbnail)."""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        levels, tiles = self.build_tiles(image)
+        return image, levels, tiles, self.build_thumbnail(image)
+
+    async def generate(
+        self,
+        storage_path: str,
+        image: Optional["Image.Image"] = None,
+        data: Optional[bytes] = None,
+    ) -> ImagePyramid:
+        """
+        Generate and upload the thumbnail, tiles and manifest for an image.
+        Pass the decoded ``image``, or the stored bytes as ``data``, when
+        already in memory to skip the download of the original. Decoding and
+        WebP encoding run in a worker thread, off the event loop.
+        """
+        if image is None:
+            image = await self.load_original(storage_path, data)
+
+        image, levels, tiles, thumbnail = await asyncio.to_thread(self._build, image)
+        manifest = ImagePyramid(
+            width=image.width,
+            height=image.height,
+            tile_size=self.tile_size,
+            thumbnail_path=self.storage._get_gs_path(self.thumbnail_blob(storage_path)),
+            levels=levels,
+        )
+
+        uploads = [
+            (self.thumbnail_blob(storage_path), thumbnail, "image/webp"),
+        ]
+        uploads.extend(
+            (self.tile_blob(storage_path, level, col, row), tile, "image/webp")
+            for level, col, row, tile in tiles
+        )
+        await self.storage.upload_many(uploads)
+
+        # Manifest last, so its presence means every derivative exists
+        await self.storage.upload_bytes(
+            data=manifest.model_dump_json().encode("utf-8"),
+            blob_name=self.manifest_blob(storage_path),
+            content_type="application/json",
+        )
+        return manifest
+
+    async def try_generate(
+        self,
+        storage_path: str,
+        image: Optional["Image.Image"] = None,
+        data: Optional[bytes] = None,
+    ) -> Optional[ImagePyramid]:
+        """
+        Best-effort generate() for uploads and batch generation: a failure is
+        logged and returns None, and the derivatives are generated on first
+        read instead.
+        """
+        try:
+            return await self.generate(storage_path, image, data)
+        except Exception:
+            logger.exception("Failed to generate image derivatives for %s", storage_path)
+            return None
+
+    async def delete(self, storage_path: str) -> int:
+        """Delete every derivative of an image. Returns number of blobs deleted."""
+        return await self.storage.delete_prefix(f"{self._prefix(storage_path)}/")
+
+    # ---------- Reading ----------
+
+    async def get_manifest(self, storage_path: str) -> ImagePyramid:
+        """Read the pyramid manifest, generating derivatives if missing."""
+        try:
+            data = await self.storage.download_file(self.manifest_blob(storage_path))
+        except NotFound:
+            return await self.generate(storage_path)
+        return ImagePyramid(**json.loads(data))
+
+    async def read_thumbnail(self, storage_path: str) -> bytes:
+        """Read the thumbnail, generating derivatives if missing."""
+        try:
+            return await self.storage.download_file(self.thumbnail_blob(storage_path))
+        except NotFound:
+            await self.generate(storage_path)
+            return await self.storage.download_file(self.thumbnail_blob(storage_path))
+
+    async def read_tile(
+        self, storage_path: str, level: int, col: int, row: int
+    ) -> Optional[bytes]:
+        """Read one tile. Returns None if it is outside the pyramid."""
+        if level < 0 or col < 0 or row < 0:
+            return None
+        try:
+            return await self.storage.download_file(
+                self.tile_blob(storage_path, level, col, row)
+            )
+        except NotFound:
+            manifest = await self.get_manifest(storage_path)
+
+        if level >= len(manifest.levels):
+            return None
+        info = manifest.levels[level]
+        if col >= info.columns or row >= info.rows:
+            return None
+        return await self.storage.download_file(
+            self.tile_blob(storage_path, level, col, row)
+        )
@@ -0,0 +1,299 @@
+"""
+Document image serving service.
+Resolves document images through the document index (with an in-process
+cache), streams bytes from storage in chunks, and answers conditional and
+range requests. Stored images are immutable, so ETags are derived from the
+storage path and revalidations never touch Cloud Storage.
+"""
+import hashlib
+import mimetypes
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+
+from app.config import get_settings
+from app.services.firestore import FirestoreService
+from app.services.storage import StorageService
+
+settings = get_settings()
+
+# Originals served as a rendered page (see document_pages.document_format)
+PAGED_EXTENSIONS = (".pdf", ".tif", ".tiff")
+
+
+class _IndexCache:
+    """Small LRU of document_id -> index entry shared across requests."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+_index_cache = _IndexCache(settings.image_path_cache_size)
+# test_run_id -> {"batch_ids": [...]}; a run's batches never change
+_run_batches_cache = _IndexCache(settings.image_path_cache_size)
+
+
+def _etag_for(storage_path: str) -> str:
+    """Strong ETag for an immutable stored object."""
+    return '"' + hashlib.sha256(storage_path.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, per RFC 9110)."""
+    if if_none_match.strip() == "*":
+        return True
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return etag in [t[2:] if t.startswith("W/") else t for t in tags]
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single "bytes=start-end" range into an inclusive (start, end).
+    Returns None for unsatisfiable or unsupported (multi-part) ranges.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, _, end_text = spec.strip().partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                return None
+            start = max(size - length, 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+class ImageServingService:
+    """Service for serving stored document images over HTTP."""
+
+    def __init__(
+        self,
+        firestore: Optional[FirestoreService] = None,
+        storage: Optional[StorageService] = None,
+    ):
+        self.firestore = firestore or FirestoreService()
+        self.storage = storage or StorageService()
+
+    async def resolve_document(
+        self,
+        document_id: str,
+        batch_id: Optional[str] = None,
+        test_run_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Find a document's index entry ({"storage_path", "batch_id", "size"?}).
+
+        Checks the in-process cache, then the document index. Documents from
+        batches created before the index existed are found by scanning their
+        batch (located through the run's result if needed) and then indexed.
+        Raises 404 unless the document belongs to ``batch_id`` and to one of
+        the batches of ``test_run_id``, when given.
+        """
+        entry = _index_cache.get(document_id)
+        if entry is None:
+            entry = await self.firestore.get_document_index(document_id)
+            if entry is None:
+                entry = await self._index_from_batch(document_id, batch_id, test_run_id)
+            _index_cache.put(document_id, entry)
+
+        if batch_id and entry["batch_id"] != batch_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found in batch"
+            )
+        if test_run_id and entry["batch_id"] not in await self._run_batch_ids(test_run_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found in test run"
+            )
+        return entry
+
+    async def _run_batch_ids(self, test_run_id: str) -> List[str]:
+        """Batches of a test run, cached in-process."""
+        cached = _run_batches_cache.get(test_run_id)
+        if cached is not None:
+            return cached["batch_ids"]
+
+        test_run = await self.firestore.get_test_run_by_id(test_run_id)
+        if not test_run:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test run not found"
+            )
+        _run_batches_cache.put(test_run_id, {"batch_ids": list(test_run.batch_ids)})
+        return test_run.batch_ids
+
+    async def _index_from_batch(
+        self,
+        document_id: str,
+        batch_id: Optional[str],
+        test_run_id: Optional[str],
+    ) -> Dict[str, Any]:
+        """Slow path for legacy documents: scan the batch and index the result."""
+        if not batch_id and test_run_id:
+            result = await self.firestore.get_result_by_document(test_run_id, document_id)
+            if not result:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Result not found"
+                )
+            batch_id = result.batch_id
+
+        batch = await self.firestore.get_batch_by_id(batch_id) if batch_id else None
+        if not batch:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Batch not found"
+            )
+
+        document = next((d for d in batch.documents if d.id == document_id), None)
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found in batch"
+            )
+
+        await self.firestore.set_document_index(
+            document_id, batch.id, document.storage_path
+        )
+        return {
+            "document_id": document_id,
+            "batch_id": batch.id,
+            "storage_path": document.storage_path,
+        }
+
+    async def _get_size(self, document_id: str, entry: Dict[str, Any]) -> int:
+        """Size of the stored image, fetched once and remembered in the index."""
+        if entry.get("size") is None:
+            size = await self.storage.get_file_size(entry["storage_path"])
+            if size is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Image not found in storage"
+                )
+            entry["size"] = size
+            await self.firestore.set_document_index(
+                document_id, entry["batch_id"], entry["storage_path"], size=size
+            )
+        return entry["size"]
+
+    async def serve_immutable(
+        self,
+        request: Request,
+        storage_path: str,
+        load: Callable[[], Awaitable[Optional[bytes]]],
+        media_type: str,
+    ) -> Response:
+        """
+        Serve a small immutable object (thumbnail, tile) fully in memory.
+        ``load`` is only awaited when the client has no valid cached copy.
+        """
+        headers = {
+            "ETag": _etag_for(storage_path),
+            "Cache-Control": settings.image_cache_control,
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = await load()
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Image not found"
+            )
+        return Response(content=data, media_type=media_type, headers=headers)
+
+    async def serve_document(
+        self,
+        request: Request,
+        document_id: str,
+        batch_id: Optional[str] = None,
+        test_run_id: Optional[str] = None,
+        media_type: Optional[str] = None,
+    ) -> Response:
+        """
+        Serve a document image, honouring If-None-Match and Range.
+        The media type defaults to the one implied by the stored extension.
+        PDF and TIFF originals, which browsers cannot show as images, are
+        served as their first page rendered to PNG instead.
+        """
+        entry = await self.resolve_document(document_id, batch_id, test_run_id)
+        storage_path = entry["storage_path"]
+
+        if storage_path.lower().endswith(PAGED_EXTENSIONS):
+            # Pillow is only loaded when a paged document is actually served
+            from app.services.document_pages import DocumentPageService
+
+            pages = DocumentPageService(self.storage)
+            return await self.serve_immutable(
+                request,
+                f"{storage_path}#page=1",
+                lambda: pages.render_page(storage_path, 1),
+                media_type="image/png",
+            )
+
+        media_type = media_type or mimetypes.guess_type(storage_path)[0] or "image/png"
+
+        headers = {
+            "ETag": _etag_for(storage_path),
+            "Cache-Control": settings.image_cache_control,
+            "Accept-Ranges": "bytes",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        size = await self._get_size(document_id, entry)
+        start, end = 0, size - 1
+        status_code = status.HTTP_200_OK
+
+        range_header = request.headers.get("range")
+        if range_header:
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                return Response(
+                    status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers={**headers, "Content-Range": f"bytes */{size}"},
+                )
+            start, end = byte_range
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            self.storage.iter_file(storage_path, start, end),
+            status_code=status_code,
+            media_type=media_type,
+            headers=headers,
+        )
@@ -0,0 +1,529 @@
+"""
+Job queue service.
+Decouples the API from inference: routes enqueue jobs and the standalone
+worker (``python -m app.worker``) claims and runs them. Claims are leases;
+a job whose worker dies is handed out again once its lease expires.
+
+Backends are chosen by ``settings.job_queue_url``:
+
+    sqlite:///path/to/jobs.db   local file, shared by processes on one host
+    redis://host:6379/0         shared across hosts (requires ``redis``)
+"""
+import json
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterator, List, Optional
+
+from app.config import get_settings
+from app.models.job import Job, JobKind, JobStatus
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+settings = get_settings()
+
+
+class JobQueueBase(ABC):
+    """Abstract base class for job queue backends."""
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+
+    @abstractmethod
+    async def enqueue(self, kind: JobKind, payload: Dict[str, Any]) -> Job:
+        """Add a job to the queue."""
+        pass
+
+    @abstractmethod
+    async def claim(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        """
+        Lease the oldest available job to a worker: a queued job, or a
+        running job whose lease has expired. Returns None if there is none.
+        """
+        pass
+
+    @abstractmethod
+    async def expire_leases(self) -> List[Job]:
+        """
+        Give up on jobs that will never run again: running jobs whose lease
+        expired after their last attempt or after cancellation was requested,
+        and queued jobs that were cancelled. They are marked FAILED and
+        returned, so the caller can fail the work they were doing. Workers
+        call this before each claim().
+        """
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, lease_seconds: int) -> None:
+        """Extend the lease of a running job."""
+        pass
+
+    @abstractmethod
+    async def complete(self, job_id: str) -> None:
+        """Mark a job as done."""
+        pass
+
+    @abstractmethod
+    async def fail(self, job_id: str, error: str) -> None:
+        """Mark a job as failed. Failed jobs are not retried."""
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by ID."""
+        pass
+
+    @abstractmethod
+    async def request_cancel(self, job_id: str) -> None:
+        """Ask the worker running a job to stop it."""
+        pass
+
+    @abstractmethod
+    async def is_cancel_requested(self, job_id: str) -> bool:
+        """Whether cancellation was requested (cheap; polled by workers)."""
+        pass
+
+    @abstractmethod
+    async def publish_progress(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Replace a running job's latest progress event."""
+        pass
+
+    @abstractmethod
+    async def get_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Latest progress event published for a job, if any."""
+        pass
+
+    @abstractmethod
+    async def publish_worker_status(
+        self, worker_id: str, report: Dict[str, Any], ttl_seconds: float
+    ) -> None:
+        """Replace a worker's latest status report; it lapses after ttl_seconds."""
+        pass
+
+    @abstractmethod
+    async def list_worker_status(self) -> List[Dict[str, Any]]:
+        """Latest status report of every live worker."""
+        pass
+
+    @staticmethod
+    def _new_job(kind: JobKind, payload: Dict[str, Any]) -> Job:
+        return Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            payload=payload,
+            created_at=datetime.utcnow(),
+        )
+
+
+class SQLiteJobQueue(JobQueueBase):
+    """Job queue in a local SQLite file (one host, many processes)."""
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        super().__init__(max_attempts)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker_id TEXT,
+                    error TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    progress TEXT,
+                    created_at TEXT NOT NULL,
+                    lease_expires_at TEXT
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS workers (
+                    id TEXT PRIMARY KEY,
+                    report TEXT NOT NULL,
+                    expires_at TEXT NOT NULL
+                )
+                """
+            )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "cancel_requested" not in columns:
+                conn.execute(
+                    "ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0"
+                )
+            if "progress" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit mode so claim() can take the write lock explicitly
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data.pop("progress", None)
+        data["payload"] = json.loads(data["payload"])
+        data["cancel_requested"] = bool(data["cancel_requested"])
+        return Job(**data)
+
+    async def enqueue(self, kind: JobKind, payload: Dict[str, Any]) -> Job:
+        job = self._new_job(kind, payload)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job.id, job.kind.value, json.dumps(payload), job.status.value,
+                 job.created_at.isoformat()),
+            )
+        return job
+
+    async def claim(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        now = datetime.utcnow()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE (status = ? OR (status = ? AND lease_expires_at < ?))
+                  AND attempts < ? AND cancel_requested = 0
+                ORDER BY created_at
+                LIMIT 1
+                """,
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now.isoformat(),
+                 self.max_attempts),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            lease = (now + timedelta(seconds=lease_seconds)).isoformat()
+            conn.execute(
+                """
+                UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1,
+                    lease_expires_at = ?
+                WHERE id = ?
+                """,
+                (JobStatus.RUNNING.value, worker_id, lease, row["id"]),
+            )
+            conn.execute("COMMIT")
+            job = self._to_job(row)
+
+        return job.model_copy(update={
+            "status": JobStatus.RUNNING,
+            "worker_id": worker_id,
+            "attempts": job.attempts + 1,
+            "lease_expires_at": datetime.fromisoformat(lease),
+        })
+
+    async def expire_leases(self) -> List[Job]:
+        now = datetime.utcnow()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                """
+                SELECT * FROM jobs
+                WHERE (status = ? AND lease_expires_at < ?
+                       AND (attempts >= ? OR cancel_requested = 1))
+                   OR (status = ? AND cancel_requested = 1)
+                """,
+                (JobStatus.RUNNING.value, now.isoformat(), self.max_attempts,
+                 JobStatus.QUEUED.value),
+            ).fetchall()
+
+            expired = []
+            for row in rows:
+                error = (
+                    "Cancelled by user" if row["cancel_requested"]
+                    else "Lease expired too many times"
+                )
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL WHERE id = ?",
+                    (JobStatus.FAILED.value, error, row["id"]),
+                )
+                expired.append(self._to_job(row).model_copy(update={
+                    "status": JobStatus.FAILED,
+                    "error": error,
+                    "lease_expires_at": None,
+                }))
+            conn.execute("COMMIT")
+        return expired
+
+    async def heartbeat(self, job_id: str, lease_seconds: int) -> None:
+        lease = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE id = ? AND status = ?",
+                (lease.isoformat(), job_id, JobStatus.RUNNING.value),
+            )
+
+    async def complete(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires_at = NULL WHERE id = ?",
+                (JobStatus.DONE.value, job_id),
+            )
+
+    async def fail(self, job_id: str, error: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_expires_at = NULL WHERE id = ?",
+                (JobStatus.FAILED.value, error, job_id),
+            )
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    async def request_cancel(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+
+    async def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    async def publish_progress(self, job_id: str, event: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(event), job_id)
+            )
+
+    async def get_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT progress FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row["progress"]) if row and row["progress"] else None
+
+    async def publish_worker_status(
+        self, worker_id: str, report: Dict[str, Any], ttl_seconds: float
+    ) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl_seconds)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (id, report, expires_at) VALUES (?, ?, ?)",
+                (worker_id, json.dumps(report), expires_at.isoformat()),
+            )
+
+    async def list_worker_status(self) -> List[Dict[str, Any]]:
+        now = datetime.utcnow().isoformat()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE expires_at < ?", (now,))
+            rows = conn.execute("SELECT report FROM workers ORDER BY id").fetchall()
+        return [json.loads(row["report"]) for row in rows]
+
+
+class RedisJobQueue(JobQueueBase):
+    """Job queue in Redis (shared across hosts)."""
+
+    QUEUE_KEY = "jobs:queued"
+    RUNNING_KEY = "jobs:running"
+    # job_id -> lease expiry (epoch seconds) of running jobs
+    LEASES_KEY = "jobs:leases"
+
+    # Move the oldest queued job to running and write its lease in one step,
+    # so expire_leases() never sees a claimed job without a lease
+    CLAIM_SCRIPT = """
+    local job_id = redis.call('LMOVE', KEYS[1], KEYS[2], 'RIGHT', 'LEFT')
+    if job_id then
+        redis.call('HSET', KEYS[3], job_id, ARGV[1])
+    end
+    return job_id
+    """
+
+    def __init__(self, url: str, max_attempts: int = 3):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis not installed. Install with: pip install redis")
+        super().__init__(max_attempts)
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._claim = self.client.register_script(self.CLAIM_SCRIPT)
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"jobs:{job_id}"
+
+    @staticmethod
+    def _cancel_key(job_id: str) -> str:
+        return f"jobs:{job_id}:cancel"
+
+    @staticmethod
+    def _progress_key(job_id: str) -> str:
+        return f"jobs:{job_id}:progress"
+
+    @staticmethod
+    def _worker_key(worker_id: str) -> str:
+        return f"workers:{worker_id}"
+
+    def _save(self, job: Job) -> None:
+        self.client.set(self._job_key(job.id), job.model_dump_json())
+
+    async def enqueue(self, kind: JobKind, payload: Dict[str, Any]) -> Job:
+        job = self._new_job(kind, payload)
+        self._save(job)
+        self.client.lpush(self.QUEUE_KEY, job.id)
+        return job
+
+    async def expire_leases(self) -> List[Job]:
+        # Running jobs with expired leases go back onto the queue, unless
+        # they are out of attempts or cancelled. Cancelled queued jobs are
+        # dropped when claim() reaches them.
+        now = time.time()
+        expired = []
+        for job_id in self.client.lrange(self.RUNNING_KEY, 0, -1):
+            lease = self.client.hget(self.LEASES_KEY, job_id)
+            if lease is not None and float(lease) >= now:
+                continue
+            job = self._load(job_id)
+            if job is None:
+                continue
+            # Claimed before leases were kept in LEASES_KEY
+            if lease is None and job.lease_expires_at and job.lease_expires_at >= datetime.utcnow():
+                continue
+            if not self.client.lrem(self.RUNNING_KEY, 1, job_id):
+                continue
+            self.client.hdel(self.LEASES_KEY, job_id)
+            if self.client.exists(self._cancel_key(job_id)):
+                error = "Cancelled by user"
+            elif job.attempts >= self.max_attempts:
+                error = "Lease expired too many times"
+            else:
+                # Oldest end of the queue, so it is picked up next
+                self.client.rpush(self.QUEUE_KEY, job_id)
+                continue
+            job = job.model_copy(update={
+                "status": JobStatus.FAILED,
+                "error": error,
+                "lease_expires_at": None,
+            })
+            self._save(job)
+            expired.append(job)
+        return expired
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        data = self.client.get(self._job_key(job_id))
+        return Job.model_validate_json(data) if data else None
+
+    async def claim(self, worker_id: str, lease_seconds: int) -> Optional[Job]:
+        lease = datetime.utcnow() + timedelta(seconds=lease_seconds)
+        job_id = self._claim(
+            keys=[self.QUEUE_KEY, self.RUNNING_KEY, self.LEASES_KEY],
+            args=[time.time() + lease_seconds],
+        )
+        if job_id is None:
+            return None
+
+        job = self._load(job_id)
+        if job is None:
+            self.client.lrem(self.RUNNING_KEY, 1, job_id)
+            self.client.hdel(self.LEASES_KEY, job_id)
+            return None
+        if self.client.exists(self._cancel_key(job_id)):
+            await self._finish(job_id, JobStatus.FAILED, "Cancelled by user")
+            return None
+
+        job = job.model_copy(update={
+            "status": JobStatus.RUNNING,
+            "worker_id": worker_id,
+            "attempts": job.attempts + 1,
+            "lease_expires_at": lease,
+        })
+        self._save(job)
+        return job
+
+    async def heartbeat(self, job_id: str, lease_seconds: int) -> None:
+        job = self._load(job_id)
+        if job and job.status == JobStatus.RUNNING:
+            self.client.hset(self.LEASES_KEY, job_id, time.time() + lease_seconds)
+            self._save(job.model_copy(update={
+                "lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds),
+            }))
+
+    async def _finish(self, job_id: str, status: JobStatus, error: Optional[str] = None):
+        job = self._load(job_id)
+        self.client.lrem(self.RUNNING_KEY, 1, job_id)
+        self.client.hdel(self.LEASES_KEY, job_id)
+        if job:
+            self._save(job.model_copy(update={
+                "status": status,
+                "error": error,
+                "lease_expires_at": None,
+            }))
+
+    async def complete(self, job_id: str) -> None:
+        await self._finish(job_id, JobStatus.DONE)
+
+    async def fail(self, job_id: str, error: str) -> None:
+        await self._finish(job_id, JobStatus.FAILED, error)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._load(job_id)
+        if job and self.client.exists(self._cancel_key(job_id)):
+            job = job.model_copy(update={"cancel_requested": True})
+        return job
+
+    async def request_cancel(self, job_id: str) -> None:
+        # Separate key, so the flag never races with job state writes
+        self.client.set(self._cancel_key(job_id), 1, ex=7 * 24 * 3600)
+
+    async def is_cancel_requested(self, job_id: str) -> bool:
+        return bool(self.client.exists(self._cancel_key(job_id)))
+
+    async def publish_progress(self, job_id: str, event: Dict[str, Any]) -> None:
+        self.client.set(self._progress_key(job_id), json.dumps(event), ex=7 * 24 * 3600)
+
+    async def get_progress(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.client.get(self._progress_key(job_id))
+        return json.loads(data) if data else None
+
+    async def publish_worker_status(
+        self, worker_id: str, report: Dict[str, Any], ttl_seconds: float
+    ) -> None:
+        self.client.set(
+            self._worker_key(worker_id), json.dumps(report),
+            ex=max(int(ttl_seconds), 1),
+        )
+
+    async def list_worker_status(self) -> List[Dict[str, Any]]:
+        keys = sorted(self.client.scan_iter(match=self._worker_key("*")))
+        reports = self.client.mget(keys) if keys else []
+        # A report may lapse between the scan and the read
+        return [json.loads(report) for report in reports if report]
+
+
+_queue: Optional[JobQueueBase] = None
+
+
+def get_job_queue() -> JobQueueBase:
+    """Get the process-wide job queue for the configured backend."""
+    global _queue
+    if _queue is None:
+        url = settings.job_queue_url
+        if url.startswith("redis://") or url.startswith("rediss://"):
+            _queue = RedisJobQueue(url, settings.job_max_attempts)
+        elif url.startswith("sqlite:///"):
+            _queue = SQLiteJobQueue(url[len("sqlite:///"):], settings.job_max_attempts)
+        else:
+            raise ValueError(f"Unsupported job queue URL: {url}")
+    return _queue
@@ -0,0 +1,256 @@
+"""
+Streaming metrics export.
+Pages through test runs and results and yields encoded rows as they are
+read, so exports use constant memory and start sending immediately.
+Columnar formats (Parquet, Arrow IPC) require pyarrow.
+"""
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Any, List, Optional
+
+from app.models.metrics import MetricsExportFilters
+from app.models.test_run import TestRunInDB, TestStatus
+from app.services.firestore import FirestoreService
+
+EXPORT_COLUMNS = [
+    "test_run_id",
+    "layout_library",
+    "ocr_library",
+    "document_id",
+    "field_name",
+    "expected_value",
+    "extracted_value",
+    "confidence",
+    "match_score",
+    "overall_accuracy",
+]
+
+# Columns stored dictionary-encoded in columnar exports (few distinct values)
+DICTIONARY_COLUMNS = {"test_run_id", "layout_library", "ocr_library", "field_name"}
+FLOAT_COLUMNS = {"confidence", "match_score", "overall_accuracy"}
+
+# Flush encoded rows to the client once this many characters are buffered
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Rows per record batch / Parquet row group in columnar exports
+COLUMNAR_BATCH_ROWS = 10_000
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+
+def columnar_export_available() -> bool:
+    """Check whether pyarrow (with Parquet support) is installed for exports."""
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Normalise a datetime to naive UTC so stored and query dates compare."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers bytes until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """Return and forget everything written since the last drain."""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class MetricsExportService:
+    """Service for streaming per-field result exports."""
+
+    def __init__(self, firestore: Optional[FirestoreService] = None):
+        self.firestore = firestore or FirestoreService()
+
+    async def _select_test_runs(
+        self, filters: MetricsExportFilters
+    ) -> List[TestRunInDB]:
+        """
+        Resolve the runs to export: one explicit run, or every completed run,
+        narrowed by library and start-date filters.
+        """
+        if filters.test_run_id:
+            test_run = await self.firestore.get_test_run_by_id(filters.test_run_id)
+            test_runs = [test_run] if test_run else []
+        else:
+            test_runs = [
+                tr for tr in await self.firestore.list_test_runs()
+                if tr.status == TestStatus.COMPLETED
+            ]
+
+        if filters.layout_library:
+            test_runs = [tr for tr in test_runs if tr.layout_library == filters.layout_library]
+        if filters.ocr_library:
+            test_runs = [tr for tr in test_runs if tr.ocr_library == filters.ocr_library]
+        if filters.start_date:
+            start = _naive_utc(filters.start_date)
+            test_runs = [tr for tr in test_runs if _naive_utc(tr.started_at) >= start]
+        if filters.end_date:
+            end = _naive_utc(filters.end_date)
+            test_runs = [tr for tr in test_runs if _naive_utc(tr.started_at) <= end]
+
+        return test_runs
+
+    async def iter_rows(
+        self, filters: MetricsExportFilters
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one export row per extracted field, page by page."""
+        for test_run in await self._select_test_runs(filters):
+            async for result in self.firestore.iter_results_by_test_run(test_run.id):
+                for field in result.extracted_fields:
+                    yield {
+                        "test_run_id": test_run.id,
+                        "layout_library": test_run.layout_library,
+                        "ocr_library": test_run.ocr_library,
+                        "document_id": result.document_id,
+                        "field_name": field.field_name,
+                        "expected_value": field.expected_value,
+                        "extracted_value": field.extracted_value,
+                        "confidence": field.confidence,
+                        "match_score": field.match_score,
+                        "overall_accuracy": result.overall_accuracy,
+                    }
+
+    async def stream_csv(
+        self, filters: MetricsExportFilters
+    ) -> AsyncIterator[str]:
+        """Yield the export as CSV text, header first."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+
+        # Send the header straight away so the download starts immediately
+        writer.writeheader()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+        async for row in self.iter_rows(filters):
+            writer.writerow(row)
+            if buffer.tell() >= STREAM_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    async def stream_ndjson(
+        self, filters: MetricsExportFilters
+    ) -> AsyncIterator[str]:
+        """Yield the export as newline-delimited JSON, one row per line."""
+        chunk: List[str] = []
+        size = 0
+        async for row in self.iter_rows(filters):
+            line = json.dumps(row) + "\n"
+            chunk.append(line)
+            size += len(line)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk, size = [], 0
+
+        if chunk:
+            yield "".join(chunk)
+
+    async def stream_json(
+        self, filters: MetricsExportFilters
+    ) -> AsyncIterator[str]:
+        """Yield the export as a single {"data": [...]} JSON document."""
+        yield '{"data": ['
+        chunk: List[str] = []
+        size = 0
+        separator = ""
+        async for row in self.iter_rows(filters):
+            item = separator + json.dumps(row)
+            separator = ","
+            chunk.append(item)
+            size += len(item)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk, size = [], 0
+
+        if chunk:
+            yield "".join(chunk)
+        yield "]}"
+
+    async def stream_columnar(
+        self, filters: MetricsExportFilters, format: str = "parquet"
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the export as Parquet or an Arrow IPC stream.
+
+        Rows are converted to record batches of COLUMNAR_BATCH_ROWS, with the
+        library, run and field-name columns dictionary-encoded, and each batch
+        is flushed to the client as soon as it is written.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        dictionary_type = pa.dictionary(pa.int32(), pa.string())
+        schema = pa.schema([
+            (
+                name,
+                dictionary_type if name in DICTIONARY_COLUMNS
+                else pa.float64() if name in FLOAT_COLUMNS
+                else pa.string(),
+            )
+            for name in EXPORT_COLUMNS
+        ])
+
+        sink = _ChunkSink()
+        if format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        else:
+            writer = pa.ipc.new_stream(sink, schema)
+
+        def write_batch(rows: List[Dict[str, Any]]) -> None:
+            arrays = []
+            for field in schema:
+                values = [row[field.name] for row in rows]
+                if field.name in DICTIONARY_COLUMNS:
+                    arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+                else:
+                    arrays.append(pa.array(values, type=field.type))
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            if format == "parquet":
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+
+        rows: List[Dict[str, Any]] = []
+        async for row in self.iter_rows(filters):
+            rows.append(row)
+            if len(rows) >= COLUMNAR_BATCH_ROWS:
+                write_batch(rows)
+                rows = []
+                yield sink.drain()
+
+        if rows:
+            write_batch(rows)
+        writer.close()
+        yield sink.drain()
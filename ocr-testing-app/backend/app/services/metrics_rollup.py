@@ -0,0 +1,220 @@
+"""
+Metrics rollup service.
+Maintains pre-aggregated accuracy totals per OCR library, layout library,
+library pair and field name so metrics endpoints read a few small documents
+instead of scanning every result.
+"""
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from urllib.parse import quote
+
+from app.models.metrics import MetricsRollup, RollupKind
+from app.models.result import ExtractedField, VerificationStatus
+from app.models.test_run import TestRunInDB, TestStatus
+from app.services.firestore import FirestoreService
+
+
+def _rollup_id(kind: RollupKind, key: str) -> str:
+    """Build a Firestore-safe document ID for a rollup key."""
+    return f"{kind.value}:{quote(key, safe='')}"
+
+
+def _pair_key(layout_library: str, ocr_library: str) -> str:
+    return f"{layout_library}|{ocr_library}"
+
+
+def _field_verification(field: ExtractedField) -> Tuple[int, float]:
+    """
+    (verified_count, verified accuracy) a field adds to its rollup: reviewed
+    fields count, and score 1.0 if confirmed correct, 0.0 if corrected.
+    """
+    if field.verification_status == VerificationStatus.UNVERIFIED:
+        return 0, 0.0
+    return 1, 1.0 if field.verification_status == VerificationStatus.VERIFIED else 0.0
+
+
+class MetricsRollupService:
+    """Service for incrementally maintained global metrics."""
+
+    def __init__(self, firestore: Optional[FirestoreService] = None):
+        self.firestore = firestore or FirestoreService()
+
+    def _library_keys(self, test_run: TestRunInDB) -> List[tuple]:
+        """Rollup (kind, key, static fields) that a run's documents count toward."""
+        layout, ocr = test_run.layout_library, test_run.ocr_library
+        return [
+            (RollupKind.GLOBAL, "global", {}),
+            (RollupKind.LAYOUT, layout, {"layout_library": layout}),
+            (RollupKind.OCR, ocr, {"ocr_library": ocr}),
+            (
+                RollupKind.PAIR,
+                _pair_key(layout, ocr),
+                {"layout_library": layout, "ocr_library": ocr},
+            ),
+        ]
+
+    def _accumulate(
+        self,
+        totals: Dict[str, Dict[str, Any]],
+        test_run: TestRunInDB,
+        results: Iterable[Dict[str, Any]],
+    ) -> None:
+        """
+        Add a completed run's results into ``totals`` (keyed by rollup ID).
+
+        Each result needs ``overall_accuracy`` and ``extracted_fields``;
+        ``verified_accuracy`` is optional.
+        """
+        count = 0
+        total_accuracy = 0.0
+        verified_count = 0
+        total_verified = 0.0
+        field_totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0, 0.0])
+
+        for result in results:
+            count += 1
+            total_accuracy += result["overall_accuracy"]
+            if result.get("verified_accuracy") is not None:
+                verified_count += 1
+                total_verified += result["verified_accuracy"]
+            for field in result.get("extracted_fields", []):
+                if isinstance(field, dict):
+                    field = ExtractedField(**field)
+                reviewed, verified = _field_verification(field)
+                entry = field_totals[field.field_name]
+                entry[0] += 1
+                entry[1] += field.match_score
+                entry[2] += reviewed
+                entry[3] += verified
+
+        updates = [
+            (kind, key, fields, {
+                "run_count": 1,
+                "count": count,
+                "total_accuracy": total_accuracy,
+                "verified_count": verified_count,
+                "total_verified_accuracy": total_verified,
+            })
+            for kind, key, fields in self._library_keys(test_run)
+        ]
+        for name, (n, score, reviewed, verified) in field_totals.items():
+            updates.append((
+                RollupKind.FIELD, name, {},
+                {
+                    "count": n,
+                    "total_accuracy": score,
+                    "verified_count": reviewed,
+                    "total_verified_accuracy": verified,
+                },
+            ))
+
+        for kind, key, fields, increments in updates:
+            doc_id = _rollup_id(kind, key)
+            entry = totals.setdefault(doc_id, {
+                "id": doc_id,
+                "fields": {"kind": kind.value, "key": key, **fields},
+                "increments": defaultdict(int),
+            })
+            for name, delta in increments.items():
+                entry["increments"][name] += delta
+
+    async def record_test_run(
+        self,
+        test_run: TestRunInDB,
+        results: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        Fold a completed run's document results into the rollups, unless it
+        has been already (see FirestoreService.apply_test_run_rollups).
+        Returns whether the rollups were updated.
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        self._accumulate(totals, test_run, results)
+        return await self.firestore.apply_test_run_rollups(
+            test_run.id, list(totals.values())
+        )
+
+    async def record_verification(
+        self,
+        test_run: TestRunInDB,
+        previous_accuracy: Optional[float],
+        verified_accuracy: float,
+        previous_fields: Iterable[ExtractedField] = (),
+        fields: Iterable[ExtractedField] = (),
+    ) -> None:
+        """
+        Apply the change in a result's verified accuracy to the library
+        rollups, and the change in each field's verification to its field
+        rollup (``previous_fields`` before the verification, ``fields`` after).
+        """
+        # Runs not yet folded in pick the verification up from their stored
+        # results when they are (TestRunnerService._roll_up)
+        if test_run.status != TestStatus.COMPLETED or test_run.metrics_rolled_up is False:
+            return
+
+        increments: Dict[str, Any] = {
+            "total_verified_accuracy": verified_accuracy - (previous_accuracy or 0.0),
+        }
+        if previous_accuracy is None:
+            increments["verified_count"] = 1
+
+        updates = [
+            {
+                "id": _rollup_id(kind, key),
+                "fields": {"kind": kind.value, "key": key, **static},
+                "increments": increments,
+            }
+            for kind, key, static in self._library_keys(test_run)
+        ]
+
+        field_deltas: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        for sign, group in ((-1, previous_fields), (1, fields)):
+            for field in group:
+                reviewed, verified = _field_verification(field)
+                field_deltas[field.field_name][0] += sign * reviewed
+                field_deltas[field.field_name][1] += sign * verified
+        for name, (reviewed, verified) in field_deltas.items():
+            if reviewed or verified:
+                updates.append({
+                    "id": _rollup_id(RollupKind.FIELD, name),
+                    "fields": {"kind": RollupKind.FIELD.value, "key": name},
+                    "increments": {
+                        "verified_count": reviewed,
+                        "total_verified_accuracy": verified,
+                    },
+                })
+
+        await self.firestore.increment_metrics_rollups(updates)
+
+    async def rebuild(self) -> int:
+        """
+        Recompute all rollups from raw results of completed runs.
+        Returns the number of runs included.
+        """
+        totals: Dict[str, Dict[str, Any]] = {}
+        run_ids = []
+        for test_run in await self.firestore.list_test_runs():
+            if test_run.status != TestStatus.COMPLETED:
+                continue
+            results = await self.firestore.get_results_by_test_run(test_run.id)
+            self._accumulate(totals, test_run, (r.model_dump() for r in results))
+            run_ids.append(test_run.id)
+
+        # Overwrite with the recomputed totals rather than delete and
+        # re-increment, so the rollups are never seen empty or half-built
+        await self.firestore.replace_metrics_rollups(
+            [
+                {
+                    "id": entry["id"],
+                    "fields": entry["fields"],
+                    "totals": dict(entry["increments"]),
+                }
+                for entry in totals.values()
+            ],
+            run_ids,
+        )
+        return len(run_ids)
+
+    async def get_rollups(self, kind: RollupKind) -> List[MetricsRollup]:
+        """Read all rollups of one kind."""
+        return await self.firestore.list_metrics_rollups(kind)
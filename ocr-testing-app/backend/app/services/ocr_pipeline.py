@@ -3,30 +3,49 @@ OCR Pipeline service.
 Orchestrates layout detection and OCR extraction.
 """
 import io
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from PIL import Image
 from difflib import SequenceMatcher
 
 from app.models.batch import BatchInDB, SyntheticDocument
-from app.models.result import ExtractedField
+from app.models.result import ExtractedField, PageResult
 from app.services.storage import StorageService
 from app.services.firestore import FirestoreService
+from app.services.result_payloads import ResultPayloadService
+from app.services.document_pages import DocumentPageService
 from app.processing.layout import get_layout_detector, list_layout_detectors
 from app.processing.ocr import get_ocr_engine, list_ocr_engines
+from app.processing.cancellation import CancellationToken
+from app.processing.timing import StageTimer, StageTimingStats
 
 
 class OCRPipelineService:
     """Service for running the OCR pipeline on documents."""
 
-    def __init__(self):
-        self.storage = StorageService()
-        self.firestore = FirestoreService()
+    def __init__(
+        self,
+        storage: Optional[StorageService] = None,
+        firestore: Optional[FirestoreService] = None,
+    ):
+        self.storage = storage or StorageService()
+        self.firestore = firestore or FirestoreService()
+        self.payloads = ResultPayloadService(self.storage)
+        self.pages = DocumentPageService(self.storage)
+
+    @staticmethod
+    def _get_ocr_engine(name: str, cancel_token: Optional[CancellationToken] = None):
+        """OCR engine that checks ``cancel_token`` before each region."""
+        ocr_engine = get_ocr_engine(name)
+        ocr_engine.cancel_token = cancel_token
+        return ocr_engine
 
     async def process_document(
         self,
         document: SyntheticDocument,
         layout_library: str,
         ocr_library: str,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[StageTimer] = None,
     ) -> Dict[str, Any]:
         """
         Process a single document through the pipeline.
@@ -35,34 +54,58 @@ class OCRPipelineService:
             document: The synthetic document to process
             layout_library: Name of layout detector to use
             ocr_library: Name of OCR engine to use
+            cancel_token: Optional token checked between OCR regions
+            timer: Optional timer recording time per pipeline stage
 
         Returns:
             Dictionary with layout_results, ocr_results, extracted_fields, accuracy
         """
+        timer = timer or StageTimer()
+
         # Download document image
-        image_bytes = await self.storage.download_file(document.storage_path)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        with timer.stage("download"):
+            image_bytes = await self.storage.download_file(document.storage_path)
+        with timer.stage("decode"):
+            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+        return self._process_image(
+            image,
+            document.field_values,
+            get_layout_detector(layout_library),
+            self._get_ocr_engine(ocr_library, cancel_token),
+            timer,
+        )
 
-        # Get layout detector and OCR engine
-        layout_detector = get_layout_detector(layout_library)
-        ocr_engine = get_ocr_engine(ocr_library)
+    def _process_image(
+        self,
+        image: Image.Image,
+        field_values: Dict[str, str],
+        layout_detector,
+        ocr_engine,
+        timer: Optional[StageTimer] = None,
+    ) -> Dict[str, Any]:
+        """Run layout detection, OCR and field matching on one page image."""
+        timer = timer or StageTimer()
 
         # Run layout detection
-        regions = layout_detector.detect(image)
-        layout_results = layout_detector.to_dict(regions)
+        with timer.stage("layout"):
+            regions = layout_detector.detect(image)
+            layout_results = layout_detector.to_dict(regions)
 
         # Run OCR on detected regions
-        ocr_results_list = ocr_engine.extract_text(image, regions)
-        ocr_results = ocr_engine.to_dict(ocr_results_list)
-
-        # Extract and match fields
-        extracted_fields = self._match_fields(
-            document.field_values,
-            ocr_results_list
-        )
+        with timer.stage("ocr"):
+            ocr_results_list = ocr_engine.extract_text(image, regions)
+            ocr_results = ocr_engine.to_dict(ocr_results_list)
+
+        with timer.stage("match"):
+            # Extract and match fields
+            extracted_fields = self._match_fields(
+                field_values,
+                ocr_results_list
+            )
 
-        # Calculate overall accuracy
-        overall_accuracy = self._calculate_accuracy(extracted_fields)
+            # Calculate overall accuracy
+            overall_accuracy = self._calculate_accuracy(extracted_fields)
 
         return {
             "layout_results": layout_results,
@@ -147,6 +190,8 @@ class OCRPipelineService:
         self,
         document: SyntheticDocument,
         ocr_library: str,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[StageTimer] = None,
     ) -> Dict[str, Any]:
         """
         Process a document with full-text OCR (no layout detection).
@@ -155,16 +200,32 @@ class OCRPipelineService:
         Args:
             document: The document to process
             ocr_library: Name of OCR engine to use
+            cancel_token: Optional token checked between OCR regions
+            timer: Optional timer recording time per pipeline stage
 
         Returns:
             Dictionary with ocr_results (including full_text and regions)
         """
+        timer = timer or StageTimer()
+
         # Download document image
-        image_bytes = await self.storage.download_file(document.storage_path)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        with timer.stage("download"):
+            image_bytes = await self.storage.download_file(document.storage_path)
+        with timer.stage("decode"):
+            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
 
-        # Get OCR engine
-        ocr_engine = get_ocr_engine(ocr_library)
+        return self._process_image_full_text(
+            image, self._get_ocr_engine(ocr_library, cancel_token), timer
+        )
+
+    def _process_image_full_text(
+        self,
+        image: Image.Image,
+        ocr_engine,
+        timer: Optional[StageTimer] = None,
+    ) -> Dict[str, Any]:
+        """Run full-page OCR (no layout detection) on one page image."""
+        timer = timer or StageTimer()
 
         # Run OCR on the full image as a single region
         # Create a single region covering the entire image
@@ -176,8 +237,9 @@ class OCRPipelineService:
             bbox={"x1": 0, "y1": 0, "x2": image.width, "y2": image.height},
         )
 
-        ocr_results_list = ocr_engine.extract_text(image, [full_region])
-        ocr_results = ocr_engine.to_dict(ocr_results_list)
+        with timer.stage("ocr"):
+            ocr_results_list = ocr_engine.extract_text(image, [full_region])
+            ocr_results = ocr_engine.to_dict(ocr_results_list)
 
         # Combine all text
         full_text = " ".join([r.full_text for r in ocr_results_list])
@@ -200,13 +262,87 @@ class OCRPipelineService:
             "overall_accuracy": 0.0,
         }
 
+    async def process_document_pages(
+        self,
+        document: SyntheticDocument,
+        layout_library: str,
+        ocr_library: str,
+        test_run_id: str,
+        is_handwritten: bool = False,
+        cancel_token: Optional[CancellationToken] = None,
+        timer: Optional[StageTimer] = None,
+    ) -> Dict[str, Any]:
+        """
+        Process a multi-page document one page at a time.
+
+        Each page is rasterized, processed and its payload stored before the
+        next page is read, so memory is bounded by a single page. Fields are
+        matched per page and the best match across pages is kept.
+
+        Returns:
+            Dictionary with extracted_fields, overall_accuracy and pages
+        """
+        timer = timer or StageTimer()
+        layout_detector = None if is_handwritten else get_layout_detector(layout_library)
+        ocr_engine = self._get_ocr_engine(ocr_library, cancel_token)
+        page_field_values = {p.page_number: p.field_values for p in document.pages}
+
+        pages: List[PageResult] = []
+        best_fields: Dict[str, ExtractedField] = {}
+
+        async for page_number, image in self.pages.iter_pages(document, timer):
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+
+            if is_handwritten:
+                page_results = self._process_image_full_text(image, ocr_engine, timer)
+            else:
+                page_results = self._process_image(
+                    image,
+                    page_field_values.get(page_number) or document.field_values,
+                    layout_detector,
+                    ocr_engine,
+                    timer,
+                )
+            del image
+
+            with timer.stage("write"):
+                payload_path = await self.payloads.save(
+                    test_run_id=test_run_id,
+                    document_id=document.id,
+                    layout_results=page_results["layout_results"],
+                    ocr_results=page_results["ocr_results"],
+                    page_number=page_number,
+                )
+            pages.append(PageResult(
+                page_number=page_number,
+                payload_path=payload_path,
+                overall_accuracy=page_results["overall_accuracy"],
+                num_regions=page_results["ocr_results"].get("num_regions", 0),
+            ))
+
+            for field in page_results["extracted_fields"]:
+                best = best_fields.get(field.field_name)
+                if best is None or field.match_score > best.match_score:
+                    best_fields[field.field_name] = field
+
+        extracted_fields = list(best_fields.values())
+        return {
+            "extracted_fields": extracted_fields,
+            "overall_accuracy": self._calculate_accuracy(extracted_fields),
+            "pages": pages,
+        }
+
     async def process_batch(
         self,
         batch: BatchInDB,
         layout_library: str,
         ocr_library: str,
         test_run_id: str,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        skip_document_ids: Optional[Set[str]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        stage_stats: Optional[StageTimingStats] = None,
     ) -> List[Dict[str, Any]]:
         """
         Process all documents in a batch.
@@ -217,40 +353,85 @@ class OCRPipelineService:
             ocr_library: Name of OCR engine to use
             test_run_id: ID of the test run
             progress_callback: Optional callback for progress updates
+            skip_document_ids: Documents already processed (resumed runs)
+            cancel_token: Optional token checked between documents, pages
+                and OCR regions; raises RunCancelled once set
+            stage_stats: Optional collector of each document's stage timings
 
         Returns:
-            List of results for each document
+            List of results for each newly processed document, with the
+            time spent per stage in ``stage_timings``
         """
         results = []
         is_handwritten = getattr(batch, "batch_type", "synthetic") == "handwritten"
 
         for i, document in enumerate(batch.documents):
-            # Process document based on batch type
-            if is_handwritten:
-                doc_results = await self.process_document_full_text(
+            if skip_document_ids and document.id in skip_document_ids:
+                continue
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            timer = StageTimer()
+
+            if document.pages:
+                # PDF/TIFF: streamed page by page, payloads stored per page
+                doc_results = await self.process_document_pages(
                     document=document,
+                    layout_library=layout_library,
                     ocr_library=ocr_library,
+                    test_run_id=test_run_id,
+                    is_handwritten=is_handwritten,
+                    cancel_token=cancel_token,
+                    timer=timer,
                 )
+                payload_path = None
             else:
-                doc_results = await self.process_document(
-                    document=document,
-                    layout_library=layout_library,
-                    ocr_library=ocr_library
+                # Process document based on batch type
+                if is_handwritten:
+                    doc_results = await self.process_document_full_text(
+                        document=document,
+                        ocr_library=ocr_library,
+                        cancel_token=cancel_token,
+                        timer=timer,
+                    )
+                else:
+                    doc_results = await self.process_document(
+                        document=document,
+                        layout_library=layout_library,
+                        ocr_library=ocr_library,
+                        cancel_token=cancel_token,
+                        timer=timer,
+                    )
+
+                # Store raw payloads in storage and a slim result in Firestore
+                with timer.stage("write"):
+                    payload_path = await self.payloads.save(
+                        test_run_id=test_run_id,
+                        document_id=document.id,
+                        layout_results=doc_results["layout_results"],
+                        ocr_results=doc_results["ocr_results"],
+                    )
+
+            # The result carries the timings up to this write; the "record"
+            # stage itself is only counted in the run's summary (stage_stats)
+            with timer.stage("record"):
+                await self.firestore.create_result(
+                    test_run_id=test_run_id,
+                    document_id=document.id,
+                    batch_id=batch.id,
+                    payload_path=payload_path,
+                    extracted_fields=doc_results["extracted_fields"],
+                    overall_accuracy=doc_results["overall_accuracy"],
+                    is_handwritten=is_handwritten,
+                    pages=doc_results.get("pages"),
+                    stage_timings=timer.to_dict(),
                 )
 
-            # Store result in Firestore
-            await self.firestore.create_result(
-                test_run_id=test_run_id,
-                document_id=document.id,
-                batch_id=batch.id,
-                layout_results=doc_results["layout_results"],
-                ocr_results=doc_results["ocr_results"],
-                extracted_fields=doc_results["extracted_fields"],
-                overall_accuracy=doc_results["overall_accuracy"]
-            )
-
+            stage_timings = timer.to_dict()
+            if stage_stats is not None:
+                stage_stats.add(stage_timings)
             results.append({
                 "document_id": document.id,
+                "stage_timings": stage_timings,
                 **doc_results
             })
 
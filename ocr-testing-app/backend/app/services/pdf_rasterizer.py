@@ -0,0 +1,131 @@
+"""
+PDF rasterization service.
+Renders PDF template pages to PNG once per (page, scale) and keeps the result
+next to the source in storage:
+
+    forms/{form}.pdf                        original
+    forms/{form}/pages/{page}@{scale}x.png  cached rendering
+
+Later requests read the cached PNG instead of downloading and re-rendering
+the PDF. Re-uploading or deleting a template invalidates its renderings.
+"""
+import asyncio
+import importlib.util
+import io
+from typing import TYPE_CHECKING, Optional
+
+from google.api_core.exceptions import NotFound
+
+from app.services.storage import StorageService
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# PyMuPDF and Pillow are imported on first render rather than at import, so
+# web processes that only serve cached pages never load them
+PYMUPDF_AVAILABLE = importlib.util.find_spec("fitz") is not None
+
+DEFAULT_RENDER_SCALE = 2  # Matches the notebook RENDER_SCALE used for field coordinates
+
+
+def is_pdf_path(storage_path: str) -> bool:
+    """Whether a stored object is a PDF, judged by its extension."""
+    return storage_path.lower().endswith(".pdf")
+
+
+def render_pdf_page(pdf_bytes: bytes, page: int = 0, scale: int = DEFAULT_RENDER_SCALE) -> bytes:
+    """Render one PDF page to PNG bytes."""
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("PyMuPDF not installed. Install with: pip install pymupdf")
+    import fitz  # PyMuPDF
+
+    pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        pix = pdf_doc[page].get_pixmap(matrix=fitz.Matrix(scale, scale))
+        return pix.tobytes("png")
+    finally:
+        pdf_doc.close()
+
+
+def render_pdf_page_image(
+    pdf_bytes: bytes, page: int = 0, scale: int = DEFAULT_RENDER_SCALE
+) -> "Image.Image":
+    """Render one PDF page straight to an RGB PIL Image (no PNG round trip)."""
+    if not PYMUPDF_AVAILABLE:
+        raise RuntimeError("PyMuPDF not installed. Install with: pip install pymupdf")
+    import fitz  # PyMuPDF
+    from PIL import Image
+
+    pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        pix = pdf_doc[page].get_pixmap(matrix=fitz.Matrix(scale, scale))
+        return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    finally:
+        pdf_doc.close()
+
+
+class PdfRasterizerService:
+    """Service for rendering PDF templates with a persistent storage cache."""
+
+    def __init__(self, storage: Optional[StorageService] = None):
+        self.storage = storage or StorageService()
+
+    def _prefix(self, storage_path: str) -> str:
+        blob_name = self.storage._get_blob_name(storage_path)
+        return blob_name.rsplit(".", 1)[0] if "." in blob_name else blob_name
+
+    def cache_blob(self, storage_path: str, page: int = 0, scale: int = DEFAULT_RENDER_SCALE) -> str:
+        """Blob name of the cached rendering of a page."""
+        return f"{self._prefix(storage_path)}/pages/{page}@{scale}x.png"
+
+    async def render_png(
+        self,
+        storage_path: str,
+        page: int = 0,
+        scale: int = DEFAULT_RENDER_SCALE,
+        pdf_bytes: Optional[bytes] = None,
+    ) -> bytes:
+        """
+        Return a page of a stored PDF as PNG bytes, rendering and caching it
+        on first use. Pass ``pdf_bytes`` when the PDF is already in memory
+        (e.g. right after upload) to skip downloading it.
+        """
+        cache_blob = self.cache_blob(storage_path, page, scale)
+        try:
+            return await self.storage.download_file(cache_blob)
+        except NotFound:
+            pass
+
+        if pdf_bytes is None:
+            pdf_bytes = await self.storage.download_file(storage_path)
+        png_bytes = await asyncio.to_thread(render_pdf_page, pdf_bytes, page, scale)
+
+        await self.storage.upload_bytes(
+            data=png_bytes, blob_name=cache_blob, content_type="image/png"
+        )
+        return png_bytes
+
+    async def render_image(
+        self,
+        storage_path: str,
+        page: int = 0,
+        scale: int = DEFAULT_RENDER_SCALE,
+        pdf_bytes: Optional[bytes] = None,
+    ) -> "Image.Image":
+        """Like render_png, decoded to an RGB PIL Image."""
+        from PIL import Image
+        png_bytes = await self.render_png(storage_path, page, scale, pdf_bytes)
+        return Image.open(io.BytesIO(png_bytes)).convert("RGB")
+
+    async def load_image_bytes(self, storage_path: str) -> bytes:
+        """
+        Bytes of a template as a raster image: the cached page 1 rendering
+        for PDFs, the original file otherwise.
+        """
+        if is_pdf_path(storage_path):
+            return await self.render_png(storage_path)
+        return await self.storage.download_file(storage_path)
+
+    async def invalidate(self, storage_path: str) -> int:
+        """Delete every cached rendering of a PDF. Returns number of blobs deleted."""
+        return await self.storage.delete_prefix(f"{self._prefix(storage_path)}/pages/")
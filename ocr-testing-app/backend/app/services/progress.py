@@ -0,0 +1,103 @@
+"""
+Test run progress reporting.
+Coalesces per-document progress into at most one Firestore write per
+interval, so fast engines don't spend a measurable share of a run on
+progress round-trips. The final count is written by the test runner
+together with the run's terminal status.
+
+Live progress events (documents done, throughput, ETA, mean time per
+pipeline stage) are published more often through an optional publisher,
+normally the job queue, from which the API streams them to clients
+without touching Firestore.
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import get_settings
+from app.processing.timing import StageTimingStats
+from app.services.firestore import FirestoreService
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ProgressPublisher = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class ProgressReporter:
+    """Rate-limited writer of a test run's processed_documents count."""
+
+    def __init__(
+        self,
+        firestore: FirestoreService,
+        test_run_id: str,
+        min_interval: Optional[float] = None,
+        total: int = 0,
+        publisher: Optional[ProgressPublisher] = None,
+        stage_stats: Optional[StageTimingStats] = None,
+    ):
+        self.firestore = firestore
+        self.test_run_id = test_run_id
+        self.min_interval = (
+            settings.progress_update_interval if min_interval is None else min_interval
+        )
+        self.total = total
+        self.publisher = publisher
+        self.stage_stats = stage_stats
+        self.processed = 0
+        self._last_write = float("-inf")
+        self._last_publish = float("-inf")
+        self._started_at = time.monotonic()
+        self._start_processed = 0
+
+    def start(self, processed: int) -> None:
+        """Set the starting count (documents done by earlier attempts)."""
+        self.processed = processed
+        self._start_processed = processed
+        self._started_at = time.monotonic()
+
+    async def update(self, processed: int) -> None:
+        """Record progress; written only if min_interval has passed."""
+        self.processed = processed
+        now = time.monotonic()
+        if now - self._last_write >= self.min_interval:
+            await self._write()
+        if now - self._last_publish >= settings.progress_event_interval:
+            await self.publish("running")
+
+    def event(self, status: str, error_message: Optional[str] = None) -> Dict[str, Any]:
+        """Build a progress event for the current count."""
+        elapsed = time.monotonic() - self._started_at
+        done = self.processed - self._start_processed
+        throughput = done / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.processed, 0)
+        return {
+            "test_run_id": self.test_run_id,
+            "status": status,
+            "processed_documents": self.processed,
+            "total_documents": self.total,
+            "progress_percent": (
+                round(self.processed / self.total * 100, 1) if self.total else 0
+            ),
+            "documents_per_second": round(throughput, 3),
+            "eta_seconds": round(remaining / throughput, 1) if throughput > 0 else None,
+            "elapsed_seconds": round(elapsed, 1),
+            "stage_timings": self.stage_stats.averages() if self.stage_stats else {},
+            "error_message": error_message,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    async def publish(self, status: str, error_message: Optional[str] = None) -> None:
+        """Publish a live progress event. Failures never fail the run."""
+        if self.publisher is None:
+            return
+        self._last_publish = time.monotonic()
+        try:
+            await self.publisher(self.event(status, error_message))
+        except Exception:
+            logger.exception("Failed to publish progress for test run %s", self.test_run_id)
+
+    async def _write(self) -> None:
+        await self.firestore.set_test_run_progress(self.test_run_id, self.processed)
+        self._last_write = time.monotonic()
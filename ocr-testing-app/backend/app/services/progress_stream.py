@@ -0,0 +1,102 @@
+"""
+Live test run progress for streaming endpoints.
+Workers publish progress events to the job queue (see ProgressReporter).
+Within the API process, one feeder task per watched run picks up the
+latest event and fans it out to every subscribed client, so the number
+of open streams does not multiply queue reads and none reach Firestore.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.config import get_settings
+from app.models.job import JobStatus
+from app.services.job_queue import JobQueueBase, get_job_queue
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+# Put on subscriber queues when a job ends without a terminal event
+# (e.g. its worker crashed); the subscriber should re-read the run.
+JOB_ENDED = None
+
+
+class ProgressBroker:
+    """In-process pub/sub of test run progress events."""
+
+    def __init__(self, queue: Optional[JobQueueBase] = None):
+        self._queue = queue
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._feeders: Dict[str, asyncio.Task] = {}
+        self._latest: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def queue(self) -> JobQueueBase:
+        if self._queue is None:
+            self._queue = get_job_queue()
+        return self._queue
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive a job's progress events (and JOB_ENDED) on a queue."""
+        subscriber: asyncio.Queue = asyncio.Queue()
+        if job_id in self._latest:
+            subscriber.put_nowait(self._latest[job_id])
+        self._subscribers.setdefault(job_id, set()).add(subscriber)
+        if job_id not in self._feeders:
+            self._feeders[job_id] = asyncio.create_task(self._feed(job_id))
+        try:
+            yield subscriber
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[job_id]
+                    self._latest.pop(job_id, None)
+                    feeder = self._feeders.pop(job_id, None)
+                    if feeder:
+                        feeder.cancel()
+
+    def _broadcast(self, job_id: str, event: Optional[Dict[str, Any]]) -> None:
+        for subscriber in self._subscribers.get(job_id, ()):
+            subscriber.put_nowait(event)
+
+    async def _feed(self, job_id: str) -> None:
+        last: Optional[Dict[str, Any]] = None
+        try:
+            while self._subscribers.get(job_id):
+                event = await self.queue.get_progress(job_id)
+                if event is not None and event != last:
+                    last = self._latest[job_id] = event
+                    self._broadcast(job_id, event)
+                    if event.get("status") in TERMINAL_STATUSES:
+                        return
+                else:
+                    job = await self.queue.get(job_id)
+                    if job is None or job.status in (JobStatus.DONE, JobStatus.FAILED):
+                        self._broadcast(job_id, JOB_ENDED)
+                        return
+                await asyncio.sleep(settings.progress_stream_poll_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Progress feed for job %s failed", job_id)
+            self._broadcast(job_id, JOB_ENDED)
+        finally:
+            if self._feeders.get(job_id) is asyncio.current_task():
+                del self._feeders[job_id]
+
+
+_broker: Optional[ProgressBroker] = None
+
+
+def get_progress_broker() -> ProgressBroker:
+    """Get the process-wide progress broker."""
+    global _broker
+    if _broker is None:
+        _broker = ProgressBroker()
+    return _broker
@@ -0,0 +1,104 @@
+"""
+Result payload service.
+Stores the raw layout/OCR output of a result as a gzip-compressed JSON blob
+in Cloud Storage, keeping the Firestore result document small. Payloads are
+only loaded by the detail endpoints that actually display them.
+"""
+import gzip
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.models.result import ResultInDB
+from app.services.storage import StorageService
+
+
+def merge_page_payloads(pages: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Merge per-page layout or OCR payloads into one document payload.
+    List entries (regions, text_regions) are concatenated and tagged with
+    their page number, so region indexes stay stable for verification.
+    """
+    merged: Dict[str, Any] = {}
+    for page_number, payload in pages:
+        for key, value in payload.items():
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(
+                    {**item, "page": page_number} if isinstance(item, dict) else item
+                    for item in value
+                )
+            elif key == "num_regions":
+                merged[key] = merged.get(key, 0) + value
+            elif key == "full_text" and key in merged:
+                merged[key] = f"{merged[key]}\n\n{value}"
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+
+class ResultPayloadService:
+    """Service for reading and writing raw result payload blobs."""
+
+    def __init__(self, storage: Optional[StorageService] = None):
+        self.storage = storage or StorageService()
+
+    @staticmethod
+    def blob_name(test_run_id: str, document_id: str) -> str:
+        """Storage path of the payload blob for a document in a run."""
+        return f"results/{test_run_id}/{document_id}.json.gz"
+
+    @staticmethod
+    def page_blob_name(test_run_id: str, document_id: str, page_number: int) -> str:
+        """Storage path of the payload blob for one page of a document."""
+        return f"results/{test_run_id}/{document_id}/page-{page_number}.json.gz"
+
+    async def save(
+        self,
+        test_run_id: str,
+        document_id: str,
+        layout_results: Dict[str, Any],
+        ocr_results: Dict[str, Any],
+        page_number: Optional[int] = None,
+    ) -> str:
+        """
+        Compress and upload a payload. Returns its storage path.
+        Pass ``page_number`` to store one page of a multi-page document.
+        """
+        data = gzip.compress(
+            json.dumps({
+                "layout_results": layout_results,
+                "ocr_results": ocr_results,
+            }).encode("utf-8")
+        )
+        return await self.storage.upload_bytes(
+            data=data,
+            blob_name=(
+                self.page_blob_name(test_run_id, document_id, page_number)
+                if page_number is not None
+                else self.blob_name(test_run_id, document_id)
+            ),
+            content_type="application/gzip",
+        )
+
+    async def _read(self, payload_path: str) -> Dict[str, Any]:
+        return json.loads(gzip.decompress(await self.storage.download_file(payload_path)))
+
+    async def load(self, result: ResultInDB) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Return (layout_results, ocr_results) for a result.
+        Multi-page results are merged from their page payloads until a
+        document-level payload is saved (e.g. by verification). Legacy
+        results that still carry inline payloads are returned as-is.
+        """
+        if result.payload_path:
+            payload = await self._read(result.payload_path)
+            return payload.get("layout_results", {}), payload.get("ocr_results", {})
+
+        if result.pages:
+            layout_pages, ocr_pages = [], []
+            for page in result.pages:
+                payload = await self._read(page.payload_path)
+                layout_pages.append((page.page_number, payload.get("layout_results", {})))
+                ocr_pages.append((page.page_number, payload.get("ocr_results", {})))
+            return merge_page_payloads(layout_pages), merge_page_payloads(ocr_pages)
+
+        return result.layout_results, result.ocr_results
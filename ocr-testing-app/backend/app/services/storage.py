@@ -1,8 +1,10 @@
 """
 Google Cloud Storage service.
 """
+import asyncio
 import uuid
-from typing import Optional, BinaryIO
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, BinaryIO, Iterator, List, Tuple
 from pathlib import Path
 
 from google.cloud import storage
@@ -13,22 +15,26 @@ from app.config import get_settings
 settings = get_settings()
 
 
+def create_storage_client() -> storage.Client:
+    """Create a Storage client from the configured credentials."""
+    if settings.google_application_credentials:
+        credentials = service_account.Credentials.from_service_account_file(
+            settings.google_application_credentials
+        )
+        return storage.Client(
+            project=settings.gcp_project_id,
+            credentials=credentials
+        )
+    # Use default credentials
+    return storage.Client(project=settings.gcp_project_id)
+
+
 class StorageService:
     """Service for Google Cloud Storage operations."""
 
-    def __init__(self):
-        """Initialize Storage client."""
-        if settings.google_application_credentials:
-            credentials = service_account.Credentials.from_service_account_file(
-                settings.google_application_credentials
-            )
-            self.client = storage.Client(
-                project=settings.gcp_project_id,
-                credentials=credentials
-            )
-        else:
-            # Use default credentials
-            self.client = storage.Client(project=settings.gcp_project_id)
+    def __init__(self, client: Optional[storage.Client] = None):
+        """Initialize with a shared Storage client, or create one."""
+        self.client = client or create_storage_client()
 
         self.bucket_name = settings.gcp_storage_bucket
         self.bucket = self.client.bucket(self.bucket_name)
@@ -37,6 +43,12 @@ class StorageService:
         """Get the gs:// path for a blob."""
         return f"gs://{self.bucket_name}/{blob_name}"
 
+    def _get_blob_name(self, storage_path: str) -> str:
+        """Get the blob name from either gs://bucket/path or just the path."""
+        if storage_path.startswith("gs://"):
+            return storage_path.replace(f"gs://{self.bucket_name}/", "")
+        return storage_path
+
     async def upload_form(
         self,
         file: BinaryIO,
@@ -90,6 +102,26 @@ class StorageService:
 
         return self._get_gs_path(blob_name)
 
+    async def upload_many(
+        self,
+        items: List[Tuple[str, bytes, str]],
+        max_workers: int = 8,
+    ) -> List[str]:
+        """
+        Upload many small blobs concurrently.
+        Each item is (blob_name, data, content_type). Returns storage paths.
+        """
+        def upload(item: Tuple[str, bytes, str]) -> str:
+            blob_name, data, content_type = item
+            self.bucket.blob(blob_name).upload_from_string(data, content_type=content_type)
+            return self._get_gs_path(blob_name)
+
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return await asyncio.gather(*[
+                loop.run_in_executor(pool, upload, item) for item in items
+            ])
+
     async def download_file(self, storage_path: str) -> bytes:
         """
         Download a file from storage.
@@ -105,6 +137,45 @@ class StorageService:
         blob = self.bucket.blob(blob_name)
         return blob.download_as_bytes()
 
+    async def download_to_path(self, storage_path: str, path: str) -> None:
+        """
+        Download a file from storage to a local path without holding it in memory.
+        Accepts either gs://bucket/path or just the path.
+        """
+        blob = self.bucket.blob(self._get_blob_name(storage_path))
+        blob.download_to_filename(path)
+
+    async def get_file_size(self, storage_path: str) -> Optional[int]:
+        """
+        Get the size in bytes of a stored file (metadata only).
+        Returns None if the file does not exist.
+        """
+        blob = self.bucket.get_blob(self._get_blob_name(storage_path))
+        return blob.size if blob is not None else None
+
+    def iter_file(
+        self,
+        storage_path: str,
+        start: int,
+        end: int,
+        chunk_size: int = 1024 * 1024,
+    ) -> Iterator[bytes]:
+        """
+        Yield the inclusive byte range [start, end] of a file in chunks.
+
+        This is a plain generator so Starlette runs it in a threadpool,
+        keeping blocking GCS reads off the event loop.
+        """
+        blob = self.bucket.blob(self._get_blob_name(storage_path))
+        position = start
+        while position <= end:
+            chunk_end = min(position + chunk_size - 1, end)
+            data = blob.download_as_bytes(start=position, end=chunk_end)
+            if not data:
+                break
+            yield data
+            position += len(data)
+
     async def get_signed_url(
         self,
         storage_path: str,
@@ -171,7 +242,13 @@ class StorageService:
         Delete all files in a batch folder.
         Returns number of files deleted.
         """
-        prefix = f"batches/{batch_id}/"
+        return await self.delete_prefix(f"batches/{batch_id}/")
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """
+        Delete all files under a prefix.
+        Returns number of files deleted.
+        """
         blobs = self.bucket.list_blobs(prefix=prefix)
 
         count = 0
@@ -11,13 +11,12 @@ from PIL import Image, ImageDraw, ImageFont
 
 from app.models.form import FormInDB, FieldMapping, FieldType
 from app.models.batch import SyntheticDocument
+from app.config import get_settings
 from app.services.storage import StorageService
+from app.services.image_derivatives import ImageDerivativeService
+from app.services.pdf_rasterizer import PdfRasterizerService, render_pdf_page_image, is_pdf_path
 
-try:
-    import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+settings = get_settings()
 
 # Field-type-based synthetic data pools
 FIELD_TYPE_DATA = {
@@ -84,21 +83,15 @@ DEFAULT_SYNTHETIC_DATA = {
 class SyntheticGeneratorService:
     """Service for generating synthetic filled forms."""
 
-    def __init__(self):
-        self.storage = StorageService()
+    def __init__(self, storage: Optional[StorageService] = None):
+        self.storage = storage or StorageService()
+        self.derivatives = ImageDerivativeService(self.storage)
+        self.rasterizer = PdfRasterizerService(self.storage)
         self.render_scale = 2  # Match notebook RENDER_SCALE
 
     def _pdf_to_image(self, pdf_bytes: bytes, page_num: int = 0) -> Image.Image:
         """Convert a PDF page to a PIL Image using PyMuPDF."""
-        if not PYMUPDF_AVAILABLE:
-            raise RuntimeError("PyMuPDF not installed. Install with: pip install pymupdf")
-        pdf_doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        page = pdf_doc[page_num]
-        mat = fitz.Matrix(self.render_scale, self.render_scale)
-        pix = page.get_pixmap(matrix=mat)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        pdf_doc.close()
-        return img
+        return render_pdf_page_image(pdf_bytes, page_num, self.render_scale)
 
     def _is_pdf(self, data: bytes) -> bool:
         """Check if bytes represent a PDF file."""
@@ -223,8 +216,13 @@ class SyntheticGeneratorService:
         Returns:
             List of SyntheticDocument objects
         """
-        # Download base form image
-        base_image_bytes = await self.storage.download_file(form.storage_path)
+        # Base form image; PDFs come from the cached rendering
+        if is_pdf_path(form.storage_path):
+            base_image_bytes = await self.rasterizer.render_png(
+                form.storage_path, scale=self.render_scale
+            )
+        else:
+            base_image_bytes = await self.storage.download_file(form.storage_path)
 
         # Lazy-import scan simulator only when needed
         simulator = None
@@ -257,11 +255,20 @@ class SyntheticGeneratorService:
                 blob_name=f"batches/{batch_id}/{doc_id}.png"
             )
 
+            # Thumbnail and tile pyramid for fast browsing
+            thumbnail_path = None
+            if settings.generate_image_derivatives:
+                pyramid = await self.derivatives.try_generate(
+                    storage_path, data=filled_image_bytes
+                )
+                thumbnail_path = pyramid.thumbnail_path if pyramid else None
+
             documents.append(SyntheticDocument(
                 id=doc_id,
                 storage_path=storage_path,
                 field_values=field_values,
                 is_skewed=bool(skew_preset),
+                thumbnail_path=thumbnail_path,
             ))
 
         return documents, batch_id
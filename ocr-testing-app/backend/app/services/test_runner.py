@@ -0,0 +1,166 @@
+"""
+Test run execution service.
+Runs the OCR pipeline over a test run's batches and records its outcome.
+Executed by the worker process (app.worker), not by the API.
+
+Runs are checkpointed by their results: each processed document's result is
+written as soon as it is done, and a re-executed run (worker lease expired,
+or POST /api/tests/{id}/resume) skips documents that already have one.
+"""
+from typing import List, Optional
+
+from app.models.test_run import TestRunInDB, TestStatus
+from app.processing.cancellation import CancellationToken
+from app.processing.timing import StageTimingStats
+from app.services.firestore import FirestoreService
+from app.services.storage import StorageService
+from app.services.ocr_pipeline import OCRPipelineService
+from app.services.metrics_rollup import MetricsRollupService
+from app.services.progress import ProgressPublisher, ProgressReporter
+
+
+class TestRunnerService:
+    """Service for executing test runs."""
+
+    def __init__(
+        self,
+        firestore: Optional[FirestoreService] = None,
+        storage: Optional[StorageService] = None,
+    ):
+        self.firestore = firestore or FirestoreService()
+        self.storage = storage or StorageService()
+
+    async def run(
+        self,
+        test_run_id: str,
+        batch_ids: List[str],
+        layout_library: str,
+        ocr_library: str,
+        cancel_token: Optional[CancellationToken] = None,
+        progress_publisher: Optional[ProgressPublisher] = None,
+    ) -> None:
+        """
+        Run the OCR pipeline on every batch of a test run, skipping documents
+        completed by an earlier attempt.
+        The run is marked FAILED and the error re-raised if processing fails
+        or is cancelled through ``cancel_token`` (RunCancelled).
+        Live progress events are sent to ``progress_publisher``, if given.
+        """
+        firestore = self.firestore
+        pipeline = OCRPipelineService(self.storage, firestore)
+
+        test_run = await firestore.get_test_run_by_id(test_run_id)
+
+        # Completed by an earlier attempt that stopped before the rollup
+        if test_run and test_run.status == TestStatus.COMPLETED and test_run.metrics_rolled_up is False:
+            await self._roll_up(test_run)
+            return
+
+        # Completed or cancelled in the meantime: nothing to do
+        if not test_run or test_run.status not in (TestStatus.PENDING, TestStatus.RUNNING):
+            return
+
+        stage_stats = StageTimingStats()
+        progress = ProgressReporter(
+            firestore,
+            test_run_id,
+            total=test_run.total_documents,
+            publisher=progress_publisher,
+            stage_stats=stage_stats,
+        )
+
+        try:
+            completed = await firestore.get_completed_document_ids(test_run_id)
+
+            # Update status to running
+            progress.start(len(completed))
+            await firestore.update_test_run_status(
+                test_run_id,
+                TestStatus.RUNNING,
+                processed_documents=len(completed) if completed else None
+            )
+
+            total_processed = 0
+
+            for batch_id in batch_ids:
+                batch = await firestore.get_batch_by_id(batch_id)
+                if not batch:
+                    continue
+
+                # Process batch
+                await pipeline.process_batch(
+                    batch=batch,
+                    layout_library=layout_library,
+                    ocr_library=ocr_library,
+                    test_run_id=test_run_id,
+                    progress_callback=lambda curr, total: progress.update(
+                        total_processed + curr
+                    ),
+                    skip_document_ids=completed,
+                    cancel_token=cancel_token,
+                    stage_stats=stage_stats,
+                )
+
+                total_processed += len(batch.documents)
+
+            # Resumed runs: include timings of documents finished by earlier attempts
+            if completed:
+                async for r in firestore.iter_results_by_test_run(test_run_id):
+                    if r.document_id in completed:
+                        stage_stats.add({
+                            name: timing.model_dump()
+                            for name, timing in r.stage_timings.items()
+                        })
+
+            # Update status to completed (this write carries the final
+            # count and the run's stage timings)
+            await firestore.update_test_run_status(
+                test_run_id,
+                TestStatus.COMPLETED,
+                processed_documents=total_processed,
+                stage_timings=stage_stats.summary(),
+            )
+            progress.processed = total_processed
+            await progress.publish(TestStatus.COMPLETED.value)
+
+        except Exception as e:
+            # Update status to failed, with the last progress a resume starts from
+            await firestore.update_test_run_status(
+                test_run_id,
+                TestStatus.FAILED,
+                processed_documents=progress.processed,
+                error_message=str(e)
+            )
+            await progress.publish(TestStatus.FAILED.value, str(e))
+            raise
+
+        # Fold this run into the global metrics rollups. Outside the try: the
+        # run has completed either way, and the rollup is applied at most once
+        await self._roll_up(test_run)
+
+    async def _roll_up(self, test_run: TestRunInDB) -> None:
+        """
+        Fold a completed run into the metrics rollups from its stored
+        results, read after the COMPLETED write so verifications saved while
+        the run was processing (which record_verification skipped) count.
+        """
+        run_results = [
+            {
+                "overall_accuracy": r.overall_accuracy,
+                "extracted_fields": r.extracted_fields,
+                "verified_accuracy": r.verified_accuracy,
+            }
+            async for r in self.firestore.iter_results_by_test_run(test_run.id)
+        ]
+        await MetricsRollupService(self.firestore).record_test_run(test_run, run_results)
+
+    async def fail(self, test_run_id: str, error_message: str) -> None:
+        """
+        Mark a run FAILED after its job was abandoned (e.g. its worker kept
+        dying), unless it already finished.
+        """
+        test_run = await self.firestore.get_test_run_by_id(test_run_id)
+        if test_run and test_run.status in (TestStatus.PENDING, TestStatus.RUNNING):
+            await self.firestore.update_test_run_status(
+                test_run_id, TestStatus.FAILED, error_message=error_message
+            )
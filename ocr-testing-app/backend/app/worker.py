@@ -0,0 +1,231 @@
+"""
+Court Form OCR Testing App - job worker
+
+Standalone process that pulls jobs from the job queue and runs them, so
+inference scales separately from the API and does not compete with it.
+
+Usage:
+    python -m app.worker [--worker-id ID] [--once]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Awaitable, Callable, Dict
+
+from app.config import get_settings
+from app.models.job import Job, JobKind
+from app.processing.cancellation import CancellationToken
+from app.processing.cold_start import cold_start_profiles
+from app.processing.model_manager import get_model_manager
+from app.services.engine_warmup import get_engine_warmup
+from app.services.firestore import FirestoreService
+from app.services.job_queue import JobQueueBase, get_job_queue
+from app.services.progress import ProgressPublisher
+from app.services.storage import StorageService
+from app.services.test_runner import TestRunnerService
+
+settings = get_settings()
+logger = logging.getLogger("app.worker")
+
+
+@lru_cache()
+def _test_runner() -> TestRunnerService:
+    """Test runner sharing one Firestore and Storage client across jobs."""
+    return TestRunnerService(FirestoreService(), StorageService())
+
+
+async def run_test_run_job(
+    job: Job,
+    cancel_token: CancellationToken,
+    publish_progress: ProgressPublisher,
+) -> None:
+    """Execute a queued test run."""
+    await _test_runner().run(
+        test_run_id=job.payload["test_run_id"],
+        batch_ids=job.payload["batch_ids"],
+        layout_library=job.payload["layout_library"],
+        ocr_library=job.payload["ocr_library"],
+        cancel_token=cancel_token,
+        progress_publisher=publish_progress,
+    )
+
+
+async def fail_test_run_job(job: Job) -> None:
+    """Fail the test run of a job the queue gave up on."""
+    await _test_runner().fail(job.payload["test_run_id"], job.error or "Job failed")
+
+
+JobHandler = Callable[[Job, CancellationToken, ProgressPublisher], Awaitable[None]]
+
+JOB_HANDLERS: Dict[JobKind, JobHandler] = {
+    JobKind.TEST_RUN: run_test_run_job,
+}
+
+# Called for jobs abandoned by the queue (see JobQueueBase.expire_leases)
+JOB_FAILURE_HANDLERS: Dict[JobKind, Callable[[Job], Awaitable[None]]] = {
+    JobKind.TEST_RUN: fail_test_run_job,
+}
+
+
+class _JobMonitor:
+    """
+    Watches a running job from a background thread: renews its lease and
+    sets the cancellation token when cancellation is requested. Inference
+    blocks the event loop for long stretches, so an asyncio task would starve.
+    """
+
+    def __init__(self, queue: JobQueueBase, job_id: str, lease_seconds: int):
+        self.queue = queue
+        self.job_id = job_id
+        self.lease_seconds = lease_seconds
+        self.cancel_token = CancellationToken()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.run(self._watch())
+
+    async def _watch(self):
+        loop = asyncio.get_running_loop()
+        renew_interval = max(self.lease_seconds / 3, 1)
+        next_renewal = loop.time() + renew_interval
+
+        while not self._stop.wait(settings.job_cancel_poll_seconds):
+            try:
+                if not self.cancel_token.cancelled and await self.queue.is_cancel_requested(self.job_id):
+                    logger.info("Cancellation requested for job %s", self.job_id)
+                    self.cancel_token.cancel()
+                if loop.time() >= next_renewal:
+                    await self.queue.heartbeat(self.job_id, self.lease_seconds)
+                    next_renewal = loop.time() + renew_interval
+            except Exception:
+                logger.exception("Failed to check on job %s", self.job_id)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class Worker:
+    """Claims jobs from the queue and runs them one at a time."""
+
+    def __init__(self, queue: JobQueueBase, worker_id: str):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.lease_seconds = settings.job_lease_seconds
+        self._stopping = False
+        self._last_report = float("-inf")
+
+    def stop(self, *_):
+        """Finish the current job, then exit."""
+        logger.info("Worker %s stopping after current job", self.worker_id)
+        self._stopping = True
+
+    async def run_job(self, job: Job) -> None:
+        logger.info("Running %s job %s (attempt %d)", job.kind.value, job.id, job.attempts)
+        handler = JOB_HANDLERS[job.kind]
+        try:
+            with _JobMonitor(self.queue, job.id, self.lease_seconds) as monitor:
+                await handler(
+                    job,
+                    monitor.cancel_token,
+                    partial(self.queue.publish_progress, job.id),
+                )
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            await self.queue.fail(job.id, str(e))
+            return
+        await self.queue.complete(job.id)
+        logger.info("Job %s done", job.id)
+
+    async def report_status(self, force: bool = False) -> None:
+        """
+        Publish this worker's engine cold starts and resident models to the
+        queue (at most once per worker_status_interval unless ``force``),
+        where /api/info reads them.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_report < settings.worker_status_interval:
+            return
+        self._last_report = now
+        try:
+            await self.queue.publish_worker_status(
+                self.worker_id,
+                {
+                    "worker_id": self.worker_id,
+                    "reported_at": datetime.utcnow().isoformat(),
+                    "engine_cold_starts": cold_start_profiles(),
+                    "model_residency": get_model_manager().status(),
+                },
+                ttl_seconds=settings.worker_status_interval * 3,
+            )
+        except Exception:
+            logger.exception("Failed to report status of worker %s", self.worker_id)
+
+    async def fail_expired(self) -> None:
+        """Fail the work of jobs the queue has given up on."""
+        for job in await self.queue.expire_leases():
+            logger.warning("Job %s abandoned: %s", job.id, job.error)
+            try:
+                await JOB_FAILURE_HANDLERS[job.kind](job)
+            except Exception:
+                logger.exception("Failed to record abandoned job %s", job.id)
+
+    async def run(self, once: bool = False) -> None:
+        """Poll for jobs until stopped (or the queue is empty, with ``once``)."""
+        logger.info("Worker %s started", self.worker_id)
+        # Load configured engines before taking work, so runs start warm
+        await asyncio.to_thread(get_engine_warmup().warm_all)
+        await self.report_status(force=True)
+
+        while not self._stopping:
+            await self.fail_expired()
+            job = await self.queue.claim(self.worker_id, self.lease_seconds)
+            if job is None:
+                if once:
+                    break
+                await self.report_status()
+                await asyncio.sleep(settings.worker_poll_interval)
+                continue
+            await self.run_job(job)
+            # Engines may have loaded or been evicted during the job
+            await self.report_status(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the OCR job worker")
+    parser.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Identifier recorded on claimed jobs",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Exit when the queue is empty instead of polling",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if settings.debug else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+
+    worker = Worker(get_job_queue(), args.worker_id)
+    signal.signal(signal.SIGTERM, worker.stop)
+    asyncio.run(worker.run(once=args.once))
+
+
+if __name__ == "__main__":
+    main()
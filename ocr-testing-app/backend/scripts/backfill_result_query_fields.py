@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+CLI script to backfill the denormalized query fields on existing results.
+
+Usage:
+    python backfill_result_query_fields.py
+
+Results created before server-side filtering was added lack the
+`field_names`, `verification_status` and `is_handwritten` fields used by
+the indexed result queries and listings. This script populates them; it is safe to run more than once.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.firestore import FirestoreService
+
+
+async def backfill() -> None:
+    """Populate query fields on results that are missing them."""
+    firestore = FirestoreService()
+    count = await firestore.backfill_result_query_fields()
+    print(f"Backfilled query fields on {count} result(s).")
+
+
+def main():
+    asyncio.run(backfill())
+
+
+if __name__ == "__main__":
+    main()
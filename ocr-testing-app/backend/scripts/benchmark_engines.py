@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+"""
+CLI benchmark for layout detector / OCR engine combinations.
+
+Runs a local directory of documents through the OCRPipelineService logic,
+with local stand-ins for Cloud Storage and Firestore (no GCP access needed),
+and writes a JSON report with throughput, per-stage latency percentiles,
+peak RSS, accuracy and engine cold-start costs (model load time, memory
+and first inference) for each combination.
+
+Usage:
+    python benchmark_engines.py IMAGES_DIR
+    python benchmark_engines.py IMAGES_DIR --layout doctr --ocr tesseract,easyocr
+    python benchmark_engines.py IMAGES_DIR --handwritten --ocr trocr
+    python benchmark_engines.py IMAGES_DIR --output report.json --baseline main.json
+
+Ground truth is optional: a JSON file mapping file names to field_values
+(--ground-truth), or a <name>.json file next to each document. Without it,
+accuracy is not reported.
+
+Each combination runs in a fresh process, so model loads and peak RSS are
+not shared between combinations. The first --warmup documents are processed
+once before the timed pass (lazy model loads happen there). With --baseline,
+exits with status 1 if a combination's throughput or accuracy regressed by
+more than the allowed margin.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.batch import BatchInDB, SyntheticDocument
+from app.processing.cold_start import cold_start_profiles
+from app.processing.layout import list_layout_detectors
+from app.processing.ocr import list_ocr_engines
+from app.processing.timing import StageTimingStats, percentile
+from app.services.document_pages import describe_pages
+from app.services.ocr_pipeline import OCRPipelineService
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+DOCUMENT_SUFFIXES = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".pdf"}
+
+
+class LocalStorage:
+    """Stand-in for StorageService: reads local files, discards uploads."""
+
+    def __init__(self):
+        self.uploaded_bytes = 0
+
+    async def download_file(self, storage_path: str) -> bytes:
+        return Path(storage_path).read_bytes()
+
+    async def download_to_path(self, storage_path: str, path: str) -> None:
+        shutil.copyfile(storage_path, path)
+
+    async def upload_bytes(
+        self, data: bytes, blob_name: str, content_type: str = "image/png"
+    ) -> str:
+        self.uploaded_bytes += len(data)
+        return f"local://{blob_name}"
+
+
+class DiscardResults:
+    """Stand-in for FirestoreService: results only go into the report."""
+
+    async def create_result(self, **kwargs) -> None:
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, in MB."""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def load_documents(images_dir: Path, ground_truth: Optional[Path]) -> List[Dict[str, Any]]:
+    """Build benchmark documents from a directory of images, PDFs and TIFFs."""
+    truth = json.loads(ground_truth.read_text()) if ground_truth else {}
+    documents = []
+    for path in sorted(images_dir.iterdir()):
+        if path.suffix.lower() not in DOCUMENT_SUFFIXES:
+            continue
+        field_values = truth.get(path.name)
+        sidecar = path.with_suffix(".json")
+        if field_values is None and sidecar.exists():
+            field_values = json.loads(sidecar.read_text())
+        documents.append(SyntheticDocument(
+            id=path.stem,
+            storage_path=str(path),
+            field_values=field_values or {},
+            pages=describe_pages(path.read_bytes(), path.name),
+        ).model_dump())
+    return documents
+
+
+def _batch(documents: List[SyntheticDocument], handwritten: bool) -> BatchInDB:
+    return BatchInDB(
+        id="benchmark",
+        batch_number="benchmark",
+        batch_type="handwritten" if handwritten else "synthetic",
+        form_id="benchmark",
+        form_name="benchmark",
+        created_by="benchmark",
+        created_at=datetime.utcnow(),
+        count=len(documents),
+        documents=documents,
+    )
+
+
+async def benchmark(
+    layout_library: str,
+    ocr_library: str,
+    documents: List[Dict[str, Any]],
+    handwritten: bool,
+    warmup: int,
+) -> Dict[str, Any]:
+    """Benchmark one layout/OCR combination."""
+    docs = [SyntheticDocument(**d) for d in documents]
+    storage = LocalStorage()
+    pipeline = OCRPipelineService(storage=storage, firestore=DiscardResults())
+    report: Dict[str, Any] = {
+        "layout_library": layout_library,
+        "ocr_library": ocr_library,
+        "documents": len(docs),
+    }
+
+    try:
+        warmup_start = time.perf_counter()
+        if warmup:
+            await pipeline.process_batch(
+                _batch(docs[:warmup], handwritten), layout_library, ocr_library,
+                test_run_id="benchmark-warmup",
+            )
+        report["warmup_seconds"] = round(time.perf_counter() - warmup_start, 3)
+
+        stats = StageTimingStats()
+        start = time.perf_counter()
+        results = await pipeline.process_batch(
+            _batch(docs, handwritten), layout_library, ocr_library,
+            test_run_id="benchmark", stage_stats=stats,
+        )
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        report["peak_rss_mb"] = peak_rss_mb()
+        report["cold_start"] = cold_start_profiles()
+        return report
+
+    latencies = [
+        sum(t["wall_ms"] for t in r["stage_timings"].values()) for r in results
+    ]
+    report.update({
+        "wall_seconds": round(elapsed, 3),
+        "documents_per_second": round(len(results) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "max": round(max(latencies, default=0.0), 3),
+        },
+        "stage_timings": stats.summary(),
+        "peak_rss_mb": peak_rss_mb(),
+        "payload_bytes": storage.uploaded_bytes,
+        "accuracy": _accuracy(results, docs),
+        "cold_start": cold_start_profiles(),
+    })
+    return report
+
+
+def _accuracy(results: List[Dict[str, Any]], docs: List[SyntheticDocument]) -> Optional[Dict[str, Any]]:
+    """Mean accuracy over documents with ground truth (None if there is none)."""
+    with_truth = {d.id for d in docs if d.field_values}
+    scored = [r for r in results if r["document_id"] in with_truth]
+    if not scored:
+        return None
+
+    field_scores: Dict[str, List[float]] = {}
+    for r in scored:
+        for field in r["extracted_fields"]:
+            field_scores.setdefault(field.field_name, []).append(field.match_score)
+
+    return {
+        "documents": len(scored),
+        "mean": round(sum(r["overall_accuracy"] for r in scored) / len(scored), 4),
+        "fields": {
+            name: round(sum(scores) / len(scores), 4)
+            for name, scores in sorted(field_scores.items())
+        },
+    }
+
+
+def run_combination(
+    layout_library: str,
+    ocr_library: str,
+    documents: List[Dict[str, Any]],
+    handwritten: bool,
+    warmup: int,
+) -> Dict[str, Any]:
+    """Process entry point for one combination."""
+    return asyncio.run(benchmark(layout_library, ocr_library, documents, handwritten, warmup))
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_regression: float,
+    max_accuracy_drop: float,
+) -> List[str]:
+    """Regressions of a report against a baseline report."""
+    previous = {
+        (r["layout_library"], r["ocr_library"]): r for r in baseline.get("results", [])
+    }
+    regressions = []
+    for result in report["results"]:
+        name = f"{result['layout_library'] or '(none)'} + {result['ocr_library']}"
+        before = previous.get((result["layout_library"], result["ocr_library"]))
+        if before is None or "error" in before:
+            continue
+        if "error" in result:
+            regressions.append(f"{name}: failed ({result['error']})")
+            continue
+
+        floor = before["documents_per_second"] * (1 - max_regression)
+        if result["documents_per_second"] < floor:
+            regressions.append(
+                f"{name}: throughput {result['documents_per_second']} docs/s "
+                f"< {floor:.3f} (baseline {before['documents_per_second']})"
+            )
+
+        if result.get("accuracy") and before.get("accuracy"):
+            drop = before["accuracy"]["mean"] - result["accuracy"]["mean"]
+            if drop > max_accuracy_drop:
+                regressions.append(
+                    f"{name}: accuracy {result['accuracy']['mean']} "
+                    f"(baseline {before['accuracy']['mean']})"
+                )
+    return regressions
+
+
+def _names(value: Optional[str], available: List[str]) -> List[str]:
+    if not value:
+        return list(available)
+    names = [n.strip() for n in value.split(",") if n.strip()]
+    unknown = [n for n in names if n not in available]
+    if unknown:
+        print(f"Error: unknown engine(s) {unknown}. Available: {available}")
+        sys.exit(1)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark layout detector and OCR engine combinations on local documents"
+    )
+    parser.add_argument("images_dir", type=Path, help="Directory of images, PDFs or TIFFs")
+    parser.add_argument("--ground-truth", type=Path, help="JSON file: {file name: field_values}")
+    parser.add_argument("--layout", help="Comma-separated layout detectors (default: all)")
+    parser.add_argument("--ocr", help="Comma-separated OCR engines (default: all)")
+    parser.add_argument(
+        "--handwritten", action="store_true",
+        help="Full-page OCR without layout detection (handwritten batches)",
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=1,
+        help="Documents processed before the timed pass (default: 1)",
+    )
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    parser.add_argument(
+        "--in-process", action="store_true",
+        help="Run all combinations in this process (peak RSS is then cumulative)",
+    )
+    parser.add_argument("--baseline", type=Path, help="Earlier report to check for regressions")
+    parser.add_argument(
+        "--max-regression", type=float, default=0.10,
+        help="Allowed fractional throughput drop vs. the baseline (default: 0.10)",
+    )
+    parser.add_argument(
+        "--max-accuracy-drop", type=float, default=0.01,
+        help="Allowed absolute mean accuracy drop vs. the baseline (default: 0.01)",
+    )
+    args = parser.parse_args()
+
+    if not args.images_dir.is_dir():
+        print(f"Error: '{args.images_dir}' is not a directory.")
+        sys.exit(1)
+
+    documents = load_documents(args.images_dir, args.ground_truth)
+    if not documents:
+        print(f"Error: no documents found in '{args.images_dir}'.")
+        sys.exit(1)
+
+    layouts = [""] if args.handwritten else _names(args.layout, list_layout_detectors())
+    ocrs = _names(args.ocr, list_ocr_engines())
+
+    results = []
+    for layout_library, ocr_library in product(layouts, ocrs):
+        print(f"Benchmarking {layout_library or '(no layout)'} + {ocr_library} ...", file=sys.stderr)
+        call = (layout_library, ocr_library, documents, args.handwritten, args.warmup)
+        if args.in_process:
+            result = run_combination(*call)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                result = executor.submit(run_combination, *call).result()
+        results.append(result)
+
+        if "error" in result:
+            print(f"  failed: {result['error']}", file=sys.stderr)
+        else:
+            accuracy = result["accuracy"]["mean"] if result["accuracy"] else "n/a"
+            for profile in result["cold_start"]:
+                print(
+                    f"  {profile['kind']} {profile['name']}: load {profile['load_seconds']} s "
+                    f"(+{profile['load_rss_delta_mb']} MB), "
+                    f"first inference {profile['first_inference_seconds']} s",
+                    file=sys.stderr,
+                )
+            print(
+                f"  {result['documents_per_second']} docs/s, "
+                f"p95 {result['latency_ms']['p95']} ms, "
+                f"peak RSS {result['peak_rss_mb']} MB, accuracy {accuracy}",
+                file=sys.stderr,
+            )
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "images_dir": str(args.images_dir),
+        "documents": len(documents),
+        "handwritten": args.handwritten,
+        "warmup": args.warmup,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.baseline:
+        regressions = compare(
+            report,
+            json.loads(args.baseline.read_text()),
+            args.max_regression,
+            args.max_accuracy_drop,
+        )
+        if regressions:
+            print("\nRegressions against baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+"""
+CLI benchmark for login throughput under concurrency.
+
+Sends bursts of concurrent POST /api/auth/login requests to a running API
+while probing GET /api/health, and reports login throughput and latency
+plus health-check latency during the burst. A healthy event loop keeps
+health checks fast while bcrypt runs in its thread pool; if password checks
+block the loop, health latency climbs with the login latency.
+
+Usage:
+    python benchmark_login.py --email user@example.com --password secret
+    python benchmark_login.py --email user@example.com --password secret \\
+        --url http://localhost:8000 --requests 200 --concurrency 32
+
+Only failed logins count toward the rate limit, so use valid credentials;
+any limited requests are counted as "rate_limited" rather than timed.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.processing.timing import percentile
+
+
+def _request(url: str, body: bytes = None, timeout: float = 30) -> Tuple[int, float]:
+    """Send a request; returns (status code, seconds)."""
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"} if body else {}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, TimeoutError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "max_ms": round(max(latencies) * 1000, 1),
+    }
+
+
+def run_benchmark(
+    base_url: str,
+    email: str,
+    password: str,
+    total: int,
+    concurrency: int,
+    probe_interval: float,
+) -> Dict:
+    """Run one burst of logins with health probes alongside."""
+    login_url = f"{base_url}/api/auth/login"
+    health_url = f"{base_url}/api/health"
+    body = json.dumps({"email": email, "password": password}).encode("utf-8")
+
+    done = threading.Event()
+    health_latencies: List[float] = []
+
+    def probe():
+        while not done.is_set():
+            status, seconds = _request(health_url)
+            if status == 200:
+                health_latencies.append(seconds)
+            done.wait(probe_interval)
+
+    # Baseline health latency with no logins in flight
+    idle = [_request(health_url)[1] for _ in range(10)]
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _request(login_url, body), range(total)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    ok = [seconds for status, seconds in results if status == 200]
+    statuses: Dict[str, int] = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "logins_per_second": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "succeeded": len(ok),
+        "rate_limited": statuses.get("429", 0),
+        "status_codes": statuses,
+        "login_latency": _latency_summary(ok),
+        "health_latency_idle": _latency_summary(idle),
+        "health_latency_during_logins": _latency_summary(health_latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--email", required=True, help="Email of an existing user")
+    parser.add_argument("--password", required=True, help="Password of that user")
+    parser.add_argument("--requests", type=int, default=100, help="Total logins")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 8, 32],
+        help="Concurrent clients; one burst per value (default: 1 8 32)",
+    )
+    parser.add_argument(
+        "--probe-interval", type=float, default=0.05,
+        help="Seconds between health probes during a burst",
+    )
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip("/")
+    status, _ = _request(f"{base_url}/api/health")
+    if status != 200:
+        print(f"Error: API not reachable at {base_url}")
+        sys.exit(1)
+
+    report = {
+        "url": base_url,
+        "runs": [
+            run_benchmark(
+                base_url, args.email, args.password,
+                args.requests, concurrency, args.probe_interval,
+            )
+            for concurrency in args.concurrency
+        ],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
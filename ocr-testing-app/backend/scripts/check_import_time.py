@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Check how long the API process takes to import, and that it stays lean.
+
+Imports app.main in a fresh interpreter with ``-X importtime`` and fails
+(exit code 1) if the import takes longer than the limit or pulls in modules
+the web process should only load on demand (image processing, PDF
+rendering, model frameworks, password hashing).
+
+Usage:
+    python check_import_time.py
+    python check_import_time.py --max-seconds 1.5 --top 20
+    python check_import_time.py --repeat 5
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Top-level packages that must not be imported by `import app.main`
+FORBIDDEN_MODULES = [
+    "numpy",
+    "PIL",
+    "fitz",
+    "cv2",
+    "torch",
+    "paddle",
+    "paddleocr",
+    "easyocr",
+    "doctr",
+    "transformers",
+    "layoutparser",
+    "pytesseract",
+    "passlib",
+    "bcrypt",
+]
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> Tuple[List[Tuple[str, int, int]], float]:
+    """Import a module in a fresh interpreter.
+
+    Returns (module name, self us, cumulative us) per imported module and the
+    total import time in seconds.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f"Error: importing {module} failed")
+
+    modules = []
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append((name, int(self_us), int(cumulative_us)))
+        # Top-level imports (one space of indentation) sum to the total
+        if len(indent) == 1:
+            total_us += int(cumulative_us)
+    return modules, total_us / 1_000_000
+
+
+def forbidden_imports(modules: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Cumulative import time (us) of forbidden top-level packages."""
+    found = {}
+    for name, _, cumulative_us in modules:
+        root = name.split(".")[0]
+        if root in FORBIDDEN_MODULES and root not in found:
+            found[root] = cumulative_us
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check API import time")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument(
+        "--max-seconds", type=float, default=2.0,
+        help="Fail if the import takes longer than this (default: 2.0)",
+    )
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="Measure this many times and keep the fastest (default: 3)",
+    )
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(max(args.repeat, 1))]
+    modules, total = min(runs, key=lambda run: run[1])
+
+    print(f"import {args.module}: {total:.3f}s ({len(modules)} modules)")
+    print("\nSlowest modules (self time):")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: -m[1])[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (cumulative {cumulative_us / 1000:8.1f} ms)  {name}")
+
+    failed = False
+    forbidden = forbidden_imports(modules)
+    if forbidden:
+        failed = True
+        print("\nError: heavy modules imported at startup:")
+        for name, cumulative_us in forbidden.items():
+            print(f"  {name} ({cumulative_us / 1000:.1f} ms)")
+    if total > args.max_seconds:
+        failed = True
+        print(f"\nError: import took {total:.3f}s (limit {args.max_seconds:.3f}s)")
+
+    if failed:
+        sys.exit(1)
+    print("\nOK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+"""
+CLI script to rebuild the global metrics rollups from raw results.
+
+Usage:
+    python rebuild_metrics_rollups.py
+
+Rollups are normally maintained incrementally when runs complete and when
+results are verified. Run this after a schema change, a manual data fix, or
+if the rollups are suspected to have drifted from the underlying results.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.metrics_rollup import MetricsRollupService
+
+
+async def rebuild() -> None:
+    """Recompute all rollup documents."""
+    service = MetricsRollupService()
+    runs = await service.rebuild()
+    print(f"Rebuilt metrics rollups from {runs} completed test run(s).")
+
+
+def main():
+    asyncio.run(rebuild())
+
+
+if __name__ == "__main__":
+    main()
@@ -215,6 +215,35 @@ function ResultsPage() {
               </div>
             </div>
           )}
+
+          {/* Stage Timings */}
+          {Object.keys(summaryData.data.stage_timings || {}).length > 0 && (
+            <div className="mt-4 pt-4 border-t">
+              <h4 className="text-sm font-medium mb-2">Time per Stage (ms)</h4>
+              <table className="text-sm w-full">
+                <thead>
+                  <tr className="text-gray-500 text-left">
+                    <th className="font-normal">Stage</th>
+                    <th className="font-normal text-right">p50</th>
+                    <th className="font-normal text-right">p95</th>
+                    <th className="font-normal text-right">Total</th>
+                    <th className="font-normal text-right">CPU total</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {Object.entries(summaryData.data.stage_timings).map(([stage, t]) => (
+                    <tr key={stage}>
+                      <td>{stage}</td>
+                      <td className="text-right">{t.wall_p50_ms.toFixed(0)}</td>
+                      <td className="text-right">{t.wall_p95_ms.toFixed(0)}</td>
+                      <td className="text-right">{t.wall_total_ms.toFixed(0)}</td>
+                      <td className="text-right">{t.cpu_total_ms.toFixed(0)}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          )}
         </div>
       )}
 
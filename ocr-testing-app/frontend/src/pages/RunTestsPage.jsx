@@ -1,8 +1,15 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { useNavigate } from 'react-router-dom'
 import { syntheticAPI, testsAPI } from '../services/api'
 
+function formatDuration(seconds) {
+  const s = Math.round(seconds)
+  if (s < 60) return `${s}s`
+  if (s < 3600) return `${Math.floor(s / 60)}m ${s % 60}s`
+  return `${Math.floor(s / 3600)}h ${Math.floor((s % 3600) / 60)}m`
+}
+
 function RunTestsPage() {
   const [selectedBatches, setSelectedBatches] = useState([])
   const [layoutLibrary, setLayoutLibrary] = useState('')
@@ -31,46 +38,78 @@ function RunTestsPage() {
     queryFn: () => testsAPI.getLibraries(),
   })
 
-  // Poll for all running test statuses
-  const { data: runningStatusData } = useQuery({
-    queryKey: ['running-test-statuses', runningTests],
-    queryFn: async () => {
-      const statuses = await Promise.all(
-        runningTests.map(async (id) => {
-          try {
-            const res = await testsAPI.getStatus(id)
-            return { id, ...res.data }
-          } catch {
-            return { id, status: 'failed', error_message: 'Failed to fetch status' }
-          }
-        })
-      )
-      return statuses
-    },
-    enabled: runningTests.length > 0,
-    refetchInterval: (data) => {
-      // Keep polling if any test is still running
-      const anyRunning = data?.data?.some(
-        (s) => s.status !== 'completed' && s.status !== 'failed'
-      )
-      return anyRunning ? 2000 : false
-    },
-  })
+  // Live status of running tests, streamed from the server
+  const [runningStatuses, setRunningStatuses] = useState({})
+  const streamsRef = useRef({})
 
-  // Handle status changes - remove completed/failed tests from running list
   useEffect(() => {
-    if (runningStatusData?.data) {
-      const finished = runningStatusData.data.filter(
-        (s) => s.status === 'completed' || s.status === 'failed'
-      )
-      if (finished.length > 0) {
-        setRunningTests((prev) =>
-          prev.filter((id) => !finished.some((f) => f.id === id))
-        )
-        queryClient.invalidateQueries(['tests'])
+    const streams = streamsRef.current
+
+    const finish = (id) => {
+      delete streams[id]
+      setRunningTests((prev) => prev.filter((t) => t !== id))
+      setRunningStatuses((prev) => {
+        const { [id]: _, ...rest } = prev
+        return rest
+      })
+      queryClient.invalidateQueries(['tests'])
+    }
+
+    const onStatus = (status) => {
+      setRunningStatuses((prev) => ({ ...prev, [status.id]: status }))
+      return status.status === 'completed' || status.status === 'failed'
+    }
+
+    // Fall back to polling if the event stream is unavailable
+    const poll = async (id, signal) => {
+      while (!signal.aborted) {
+        try {
+          const res = await testsAPI.getStatus(id)
+          if (onStatus({ id, ...res.data })) return
+        } catch {
+          onStatus({ id, status: 'failed', error_message: 'Failed to fetch status' })
+          return
+        }
+        await new Promise((resolve) => setTimeout(resolve, 2000))
+      }
+    }
+
+    const watch = async (id, signal) => {
+      let finished = false
+      try {
+        await testsAPI.streamEvents(id, (event) => {
+          finished = onStatus(event) || finished
+        }, signal)
+      } catch (e) {
+        if (signal.aborted) return
+        console.warn('Progress stream unavailable, polling instead', e)
       }
+      if (!finished && !signal.aborted) await poll(id, signal)
+      if (!signal.aborted) finish(id)
     }
-  }, [runningStatusData, queryClient])
+
+    runningTests.forEach((id) => {
+      if (!streams[id]) {
+        streams[id] = new AbortController()
+        watch(id, streams[id].signal)
+      }
+    })
+    Object.keys(streams).forEach((id) => {
+      if (!runningTests.includes(id)) {
+        streams[id].abort()
+        delete streams[id]
+      }
+    })
+  }, [runningTests, queryClient])
+
+  // Close all streams on unmount
+  useEffect(() => () => {
+    Object.values(streamsRef.current).forEach((controller) => controller.abort())
+  }, [])
+
+  const runningStatusList = runningTests.map(
+    (id) => runningStatuses[id] || { id, processed_documents: 0, total_documents: 0 }
+  )
 
   // Auto-detect running tests on page load
   useEffect(() => {
@@ -154,6 +193,16 @@ function RunTestsPage() {
     }
   }
 
+  const handleResume = async (testId) => {
+    try {
+      await testsAPI.resume(testId)
+      setRunningTests((prev) => [...prev, testId])
+      queryClient.invalidateQueries(['tests'])
+    } catch (e) {
+      console.error('Resume failed', e)
+    }
+  }
+
   return (
     <div>
       <h2 className="text-2xl font-bold mb-6">Run Tests</h2>
@@ -183,9 +232,9 @@ function RunTestsPage() {
       )}
 
       {/* Running Tests Progress */}
-      {runningStatusData?.data?.length > 0 && (
+      {runningStatusList.length > 0 && (
         <div className="space-y-3 mb-6">
-          {runningStatusData.data.map((testStatus) => (
+          {runningStatusList.map((testStatus) => (
             <div
               key={testStatus.id}
               className="bg-blue-50 border border-blue-200 rounded-lg p-4"
@@ -198,6 +247,13 @@ function RunTestsPage() {
                   </span>
                 </span>
                 <div className="flex items-center gap-4">
+                  {testStatus.documents_per_second > 0 && (
+                    <span className="text-xs text-gray-500">
+                      {testStatus.documents_per_second.toFixed(2)} docs/s
+                      {testStatus.eta_seconds != null &&
+                        ` · ETA ${formatDuration(testStatus.eta_seconds)}`}
+                    </span>
+                  )}
                   <span className="text-sm text-blue-600">
                     {testStatus.processed_documents} /{' '}
                     {testStatus.total_documents} documents
@@ -413,6 +469,14 @@ function RunTestsPage() {
                       Cancel
                     </button>
                   )}
+                  {run.status === 'failed' && (
+                    <button
+                      onClick={() => handleResume(run.id)}
+                      className="text-blue-600 hover:underline text-sm"
+                    >
+                      Resume
+                    </button>
+                  )}
                   {run.status === 'failed' && run.error_message && (
                     <span
                       className="text-red-500 text-xs max-w-xs truncate"
@@ -116,6 +116,38 @@ export const testsAPI = {
     api.get('/tests/options/libraries'),
   cancel: (id) =>
     api.post(`/tests/${id}/cancel`),
+  resume: (id) =>
+    api.post(`/tests/${id}/resume`),
+  // Server-Sent Events over fetch (EventSource can't send the auth header).
+  // Resolves when the stream ends; rejects on HTTP or network errors.
+  streamEvents: async (id, onEvent, signal) => {
+    const token = localStorage.getItem('token')
+    const response = await fetch(`${API_BASE_URL}/tests/${id}/events`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      signal,
+    })
+    if (!response.ok) {
+      throw new Error(`Event stream failed: ${response.status}`)
+    }
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader()
+    let buffer = ''
+    for (;;) {
+      const { value, done } = await reader.read()
+      if (done) return
+      buffer += value
+      let end
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const message = buffer.slice(0, end)
+        buffer = buffer.slice(end + 2)
+        const data = message
+          .split('\n')
+          .filter((line) => line.startsWith('data: '))
+          .map((line) => line.slice(6))
+          .join('\n')
+        if (data) onEvent(JSON.parse(data))
+      }
+    }
+  },
 }
 
 // Results API